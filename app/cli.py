@@ -0,0 +1,244 @@
+from .text_extraction import get_files_in_directory, MAX_WORKERS
+from .text_extraction.constants import MANIFEST_ENABLED, TITLES
+from .text_extraction.containers import trip_summary
+from .text_extraction.output_schema import fill_missing, get_guests_rows
+from .text_extraction.batch_extraction import discover_trip_folders, extract_trip_folders, format_batch_summary
+from .text_extraction.manifest import get_manifest_path
+from .text_extraction import instrumentation
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+from time import perf_counter
+
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ('docx', 'jsonl', 'csv')
+
+
+def get_text_data(customer_data):
+    """
+    Keeps the text prompts and responses of a guest's data, the unpaired layout objects of the
+    older forms can't be serialized (and aren't read by the Word document either).
+    """
+    return {prompt: response for prompt, response in customer_data.items()
+            if isinstance(prompt, str) and isinstance(response, str)}
+
+
+def write_jsonl(extraction_results, output_path, guests_rows=None):
+    """
+    Writes one JSON object per guest form: its file name, error (null if extracted), data and the
+    rows of its column in the Word document by title.
+
+    Args:
+        extraction_results (list): Extraction_result of every guest form
+        output_path (str | Path): path of the JSON Lines file
+        guests_rows (list | None): row values of every guest if already rendered, see get_guests_rows
+    """
+    if guests_rows is None:
+        guests_rows = get_guests_rows(extraction_results)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for result, row_values in zip(extraction_results, guests_rows):
+            record = {'file': Path(result.file_path).name, 'error': result.error,
+                      'customer_data': get_text_data(result.customer_data),
+                      'rows': dict(zip(TITLES, fill_missing(row_values)))}
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def write_csv(extraction_results, output_path, guests_rows=None):
+    """
+    Writes one row per guest form, with a column for every row of the Word document (see
+    OUTPUT_SCHEMA in constants.py).
+
+    Args:
+        extraction_results (list): Extraction_result of every guest form
+        output_path (str | Path): path of the CSV file
+        guests_rows (list | None): row values of every guest if already rendered, see get_guests_rows
+    """
+    if guests_rows is None:
+        guests_rows = get_guests_rows(extraction_results)
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['file', 'error', *TITLES])
+        for result, row_values in zip(extraction_results, guests_rows):
+            writer.writerow([Path(result.file_path).name, result.error or '', *fill_missing(row_values)])
+
+
+def write_trip_output(folder_path, guest_files, extraction_results, output_formats, output_dir):
+    """
+    Writes the outputs of an extracted trip folder. The row values of every guest are rendered
+    once and shared by all the formats.
+
+    Args:
+        folder_path (str | Path): folder containing the trip's guest forms
+        guest_files (list): file names of the guest forms
+        extraction_results (list): Extraction_result of every guest form, in the order of guest_files
+        output_formats (list): 'docx' (the Guest Info document), 'jsonl' and/or 'csv'
+        output_dir (Path): folder where the outputs are written
+
+    Returns:
+        list: path of every written output
+    """
+    guests_rows = get_guests_rows(extraction_results)
+    output_paths = []
+    for output_format in output_formats:
+        if output_format == 'docx':
+            #Imported here so the worker processes, which import this module when spawned, don't load python-docx:
+            from .text_extraction.word_doc import GuestDocumentGenerator
+
+            guest_document = GuestDocumentGenerator(file_path=folder_path, output_dir=output_dir)
+            output_path = guest_document.build_document(guest_files, extraction_results, guests_rows)
+        else:
+            output_path = output_dir / f"Guest Info {Path(folder_path).resolve().name}.{output_format}"
+            if output_format == 'jsonl':
+                write_jsonl(extraction_results, output_path, guests_rows)
+            else:
+                write_csv(extraction_results, output_path, guests_rows)
+        logger.info("Wrote %s", output_path)
+        output_paths.append(output_path)
+    return output_paths
+
+
+def process_trip_folders(folder_paths, output_formats=('docx',), output_dirs=None, max_workers=MAX_WORKERS,
+                         memory_peaks=None):
+    """
+    Extracts the guest forms of every trip folder on one shared process pool (largest folder
+    first) and writes each folder's output as soon as its last form is extracted.
+
+    Args:
+        folder_paths (list): folders containing the trips' guest forms
+        output_formats (list): outputs written for every trip folder, among 'docx' (the Guest Info
+        document), 'jsonl' and 'csv'
+        output_dirs (list | None): folder where the output of every trip folder is written, None
+        writes each output in its trip folder
+        max_workers (int | None): maximum number of extraction processes, None uses every core
+        memory_peaks (dict | None): updated with the memory high-water mark of every extraction
+        process, in bytes by process id
+
+    Returns:
+        list: Trip_summary of every trip folder, folders without guest forms are reported as failed
+    """
+    summaries, trip_files, manifest_paths, trip_outputs = {}, {}, {}, {}
+    for folder_path, output_dir in zip(folder_paths, output_dirs or folder_paths):
+        folder_path = str(folder_path)
+        try:
+            guest_files = get_files_in_directory(directory=folder_path, ext='.pdf')
+            if not guest_files:
+                raise FileNotFoundError(f"No guest forms (.pdf) found in {folder_path}")
+            output_dir = Path(output_dir if output_dir is not None else folder_path)
+            output_dir.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            #One bad folder doesn't stop the others:
+            error = f"{type(e).__name__}: {e}"
+            logger.error("Failed to process %s: %s", folder_path, error)
+            summaries[folder_path] = trip_summary(folder_path, 0, 0, [], 0.0, 0.0, error)
+            continue
+        trip_files[folder_path] = [Path(folder_path) / guest_file for guest_file in guest_files]
+        manifest_paths[folder_path] = get_manifest_path(output_dir)
+        trip_outputs[folder_path] = (guest_files, output_dir)
+
+    def write_output(folder_path, extraction_results):
+        guest_files, output_dir = trip_outputs[folder_path]
+        write_trip_output(folder_path, guest_files, extraction_results, output_formats, output_dir)
+
+    with instrumentation.profiled('batch'):
+        for summary in extract_trip_folders(trip_files, write_output, manifest_paths if MANIFEST_ENABLED else None,
+                                            max_workers=max_workers, memory_peaks=memory_peaks):
+            summaries[summary.folder] = summary
+    return [summaries[str(folder_path)] for folder_path in folder_paths]
+
+
+def get_trip_folders(folders, output_dir=None, recursive=False):
+    """
+    Lists the trip folders to process and where their outputs are written.
+
+    Args:
+        folders (list): trip folders, or root folders searched for trip folders if recursive
+        output_dir (str | None): folder where the outputs are written, None writes each output in
+        its trip folder. With several folders each one gets its own subfolder
+        recursive (bool): whether to process every trip folder found under the given folders
+
+    Returns:
+        tuple: (trip folders, output folder of every trip folder)
+    """
+    trip_folders, output_dirs = [], []
+    for folder in dict.fromkeys(folders):
+        if recursive:
+            found = discover_trip_folders(folder)
+            if not found:
+                logger.warning("No trip folders found in %s", folder)
+        else:
+            found = [folder]
+        for trip_folder in found:
+            subfolder = Path(trip_folder).resolve().relative_to(Path(folder).resolve())
+            if len(folders) > 1:
+                subfolder = Path(Path(folder).resolve().name) / subfolder
+            trip_folders.append(trip_folder)
+            output_dirs.append(os.path.join(output_dir, subfolder) if output_dir is not None else None)
+    return trip_folders, output_dirs
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Extracts the guest forms of one or many trip folders without the GUI.")
+    parser.add_argument('folders', nargs='+', help="trip folders containing the guests' PDF forms")
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help="process every trip folder found under the given folders (e.g. a season root)")
+    parser.add_argument('-f', '--format', dest='output_formats', action='append', choices=OUTPUT_FORMATS,
+                        help="output format, repeat it to write several formats from one extraction (default: docx)")
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help="folder where the outputs are written (default: each trip folder)")
+    parser.add_argument('-w', '--workers', type=int, default=MAX_WORKERS,
+                        help="maximum number of extraction processes (default: every core)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log every written file")
+    parser.add_argument('--timings', choices=('table', 'json'), default=None,
+                        help="time the extraction stages, logged as a table or written as JSON next to each output")
+    parser.add_argument('--profile', metavar='DIR', default=None,
+                        help="write cProfile dumps of the extraction to DIR")
+    args = parser.parse_args(argv)
+    args.output_formats = list(dict.fromkeys(args.output_formats or ['docx']))
+    return args
+
+
+def main(argv=None):
+    """
+    Runs the extraction over every trip folder given on the command line.
+
+    Returns:
+        int: exit code, 0 if every guest form was extracted, 1 if a form or a folder failed
+    """
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose or args.timings else logging.WARNING,
+                        format='%(levelname)s: %(message)s')
+    if args.timings or args.profile:
+        instrumentation.enable(enabled=bool(args.timings), report=args.timings or 'table', profile_dir=args.profile)
+
+    start = perf_counter()
+    trip_folders, output_dirs = get_trip_folders(args.folders, args.output_dir, args.recursive)
+    memory_peaks = {}
+    summaries = process_trip_folders(trip_folders, args.output_formats, output_dirs, args.workers, memory_peaks)
+
+    #Consolidated timings, memory and failures of every trip folder:
+    summary = format_batch_summary(summaries, perf_counter() - start, memory_peaks)
+    if len(summaries) > 1:
+        print(summary)
+    else:
+        logger.info("%s", summary)
+    report_dir = (output_dirs[0] or trip_folders[0]) if len(trip_folders) == 1 else (args.output_dir or os.curdir)
+    instrumentation.emit_report(report_dir)
+
+    failed = not summaries or any(summary.error or summary.failures for summary in summaries)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    #Required for the extraction worker processes when running as a PyInstaller executable:
+    multiprocessing.freeze_support()
+    sys.exit(main())
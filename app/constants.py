@@ -1,2 +1,4 @@
 
-INITIALDIR = './sample_forms/'
\ No newline at end of file
+INITIALDIR = './sample_forms/'
+#Interval (ms) at which the GUI reads the progress posted by the generation thread:
+PROGRESS_POLL_MS = 100
@@ -1,18 +1,31 @@
 import os
-import docx
-import tkinter as tk
-from prettytable import PrettyTable
-from .text_extraction import GuestDocumentGenerator, get_files_in_directory
+from .text_extraction import get_files_in_directory, MAX_WORKERS
+from .text_extraction.constants import TITLES, GUESTS_PER_PAGE
+from .text_extraction.containers import document_result
 
 
-def generate_word_doc(folder_path):
+def generate_word_doc(folder_path, max_workers=MAX_WORKERS, progress_callback=None, cancel_event=None):
     """
     Calls function that extracts all the customer forms in the given folder_path and then calls 
     another function that creates a word document with every customer's information.
+
+    Args:
+        folder_path (str): The directory containing the guest forms.
+        max_workers (int | None): Maximum number of extraction processes, None uses every core.
+        progress_callback (callable | None): Called with the Extraction_result of every guest form once extracted.
+        cancel_event (threading.Event | None): Cancels the extraction once set, raising ExtractionCancelled.
+
+    Returns:
+        Document_result: path of the saved document, Guest_record of every guest (used for the
+        preview) and Extraction_result of every guest form that couldn't be extracted.
     """
+    from .text_extraction.word_doc import GuestDocumentGenerator
+
     guest_document = GuestDocumentGenerator(file_path=folder_path)
     guest_files = get_files_in_directory(directory=folder_path, ext=".pdf")
-    guest_document.generate_document(guest_files=guest_files)
+    failures = guest_document.generate_document(guest_files=guest_files, max_workers=max_workers,
+                                                progress_callback=progress_callback, cancel_event=cancel_event)
+    return document_result(guest_document.document_path, guest_document.guest_records, failures)
 
 
 def get_latest_word_doc(folder_path):
@@ -43,6 +56,8 @@ def extract_tables_from_doc(doc_path):
     Returns:
         list: A list of formatted table strings or an error message if the document cannot be read.
     """
+    import docx
+
     try:
         doc = docx.Document(doc_path)
         tables_text = []
@@ -67,14 +82,29 @@ def format_table(table):
     Returns:
         PrettyTable: A PrettyTable object containing the extracted table data.
     """
+    return format_rows([[cell.text.strip() for cell in row.cells] for row in table.rows])
+
+
+def format_rows(rows):
+    """
+    Formats the text of a table's rows into a PrettyTable object, the first row is the header.
+
+    Args:
+        rows (list): text of the cells of every row
+
+    Returns:
+        PrettyTable: A PrettyTable object containing the table data.
+    """
+    from prettytable import PrettyTable
+
     pretty_table = PrettyTable()
     pretty_table.max_width = 10  # Reduce column width for better visibility
     pretty_table.border = True  # Ensure borders for clear table separation
     pretty_table.padding_width = 1  # Minimize column padding
 
     headers, seen_headers = [], set()
-    for i, cell in enumerate(table.rows[0].cells):
-        header = cell.text.strip()
+    for i, text in enumerate(rows[0]):
+        header = text
         if header in seen_headers:
             header = f"{header}_{i}"  # Ensure unique headers
         seen_headers.add(header)
@@ -82,13 +112,55 @@ def format_table(table):
 
     pretty_table.field_names = headers
 
-    for row in table.rows[1:]:
-        row_data = [cell.text.strip() for cell in row.cells]
+    for row_data in rows[1:]:
         pretty_table.add_row(row_data)
 
     return pretty_table
 
 
+def format_guest_tables(guest_records):
+    """
+    Formats the tables of a generated document from its guest records, the same way
+    extract_tables_from_doc formats them from the saved document.
+
+    Args:
+        guest_records (list): Guest_record of every guest, in the order of the document
+
+    Returns:
+        list: A list of formatted table strings, one per page of the document.
+    """
+    tables_text = []
+    for first_guest in range(0, len(guest_records), GUESTS_PER_PAGE):
+        page_records = guest_records[first_guest:first_guest + GUESTS_PER_PAGE]
+        #Cell text as read back from the document, carriage returns are written as line breaks:
+        columns = [[value.replace('\r', '\n').strip() for value in record.rows] for record in page_records]
+        columns += [[''] * len(TITLES)] * (GUESTS_PER_PAGE - len(page_records))
+        rows = [[title, *guest_values] for title, *guest_values in zip(TITLES, *columns)]
+        tables_text.append(format_rows(rows).get_string(hrules=1))
+        tables_text.append("\n---\n")
+    return tables_text
+
+
+def preview_document(result, preview_text):
+    """
+    Displays a preview of the tables of a document just generated in a ScrolledText widget, built
+    from its guest records so the document isn't read back from the disk.
+
+    Args:
+        result (Document_result): The document returned by generate_word_doc.
+        preview_text (tkinter.scrolledtext.ScrolledText): The text widget to display the table data.
+
+    Returns:
+        None
+    """
+    #Only the GUI previews documents, tkinter is already loaded by then:
+    import tkinter as tk
+
+    preview_text.delete("1.0", tk.END)
+    preview_text.insert(tk.END, f"Preview of {os.path.basename(result.document_path)} (Tables Only):\n\n")
+    preview_text.insert(tk.END, "\n".join(format_guest_tables(result.guest_records)))
+
+
 def preview_latest_doc(folder_path, preview_text):
     """
     Displays a preview of the most recently generated Word document's tables in a ScrolledText widget.
@@ -100,6 +172,9 @@ def preview_latest_doc(folder_path, preview_text):
     Returns:
         None
     """
+    #Only the GUI previews documents, tkinter is already loaded by then:
+    import tkinter as tk
+
     preview_text.delete("1.0", tk.END)
 
     latest_doc_path = get_latest_word_doc(folder_path)
@@ -1,6 +1,10 @@
-from .document_generator import generate_word_doc, preview_latest_doc
+from .constants import PROGRESS_POLL_MS
+from .document_generator import generate_word_doc, preview_document
 from .file_manager import FolderSelect
 from .text_extraction import get_files_in_directory
+import os
+import queue
+import threading
 import tkinter as tk
 import ttkbootstrap as ttk
 from tkinter import scrolledtext
@@ -22,6 +26,13 @@ class AutomationApp(tk.Tk):
         self.geometry("900x600")
         self.minsize(width=700, height=400)
 
+        #Generation thread, its progress queue and cancel flag (None when idle):
+        self._worker = None
+        self._progress_queue = None
+        self._cancel_event = None
+        self._file_rows = {}
+        self._files_done = 0
+
         self._create_widgets()
 
     def _create_widgets(self):
@@ -41,7 +52,18 @@ class AutomationApp(tk.Tk):
         self.directory_selector = FolderSelect(self.main_tab, "Select Guest Folder", self.update_file_list)
         self.directory_selector.pack(padx=15, pady=5)
 
-        ttk.Button(self.main_tab, text="Generate Guest Info File", command=self.generate_guest_info_file).pack(padx=15, pady=5)
+        button_frame = ttk.Frame(self.main_tab)
+        button_frame.pack(padx=15, pady=5)
+        self.generate_button = ttk.Button(button_frame, text="Generate Guest Info File", command=self.generate_guest_info_file)
+        self.generate_button.grid(row=0, column=0, padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_generation, state=tk.DISABLED)
+        self.cancel_button.grid(row=0, column=1, padx=5)
+
+        # Progress of the generation, one step per guest form
+        self.progress_bar = ttk.Progressbar(self.main_tab, mode="determinate", length=300)
+        self.progress_bar.pack(padx=15, pady=5)
+        self.status_label = ttk.Label(self.main_tab, text="")
+        self.status_label.pack(padx=15)
 
         # File list display
         self.file_listbox = tk.Listbox(self.main_tab, height=10, width=40)
@@ -58,20 +80,121 @@ class AutomationApp(tk.Tk):
 
     def generate_guest_info_file(self):
         """
-        Generates the guest information Word document from the PDF files in the selected folder
-        and extracts the guest information summary table from the Word document so it can be 
-        previewed in the application window.
+        Starts generating the guest information Word document from the PDF files in the selected
+        folder. The forms are extracted on a background thread so the window stays responsive, its
+        progress is posted to a queue that the main thread reads (see _poll_progress).
         """
         self.folder_path = self.directory_selector.folder_selected
         if not self.folder_path:
             print("No folder selected.")  # Could replace with a UI alert
             return
+        if self._worker is not None and self._worker.is_alive():
+            return
+
+        #Lists the files again so every row can show its status:
+        self.update_file_list(self.folder_path)
+        files = self.file_listbox.get(0, tk.END)
+        self._file_rows = {file: row for row, file in enumerate(files)}
+        self._files_done = 0
+        self.progress_bar.configure(maximum=max(len(files), 1), value=0)
+        self.status_label.configure(text=f"Extracting {len(files)} guest forms...")
+        self.generate_button.configure(state=tk.DISABLED)
+        self.cancel_button.configure(state=tk.NORMAL)
+
+        self._progress_queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._worker = threading.Thread(target=self._run_generation, daemon=True,
+                                        args=(self.folder_path, self._progress_queue, self._cancel_event))
+        self._worker.start()
+        self.after(PROGRESS_POLL_MS, self._poll_progress)
+
+    def cancel_generation(self):
+        """
+        Asks the generation thread to stop, the forms not extracted yet are dropped and no document is saved.
+        """
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self.cancel_button.configure(state=tk.DISABLED)
+            self.status_label.configure(text="Cancelling...")
+
+    @staticmethod
+    def _run_generation(folder_path, progress_queue, cancel_event):
+        """
+        Generates the Word document on the background thread. Tk widgets must only be touched from
+        the main thread, so every update is posted to progress_queue as a (kind, payload) message.
+        """
+        #The extraction modules are loaded here, after the window is shown:
+        from .text_extraction.parallel_extraction import ExtractionCancelled
+
+        try:
+            result = generate_word_doc(folder_path=folder_path, cancel_event=cancel_event,
+                                       progress_callback=lambda result: progress_queue.put(('file', result)))
+        except ExtractionCancelled:
+            progress_queue.put(('cancelled', None))
+        except Exception as e:
+            progress_queue.put(('error', e))
+        else:
+            progress_queue.put(('done', result))
+
+    def _poll_progress(self):
+        """
+        Applies the messages posted by the generation thread and reschedules itself until the
+        generation is over.
+        """
+        while True:
+            try:
+                kind, payload = self._progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'file':
+                self._show_file_status(payload)
+            else:
+                self._finish_generation(kind, payload)
+                return
+        self.after(PROGRESS_POLL_MS, self._poll_progress)
+
+    def _show_file_status(self, result):
+        """
+        Advances the progress bar and marks the guest form as extracted (or failed) in the file list.
 
-        #Generates word document with summary tables containing guest information
-        generate_word_doc(folder_path=self.folder_path)
+        Args:
+            result (Extraction_result): outcome of extracting a guest form
+        """
+        self._files_done += 1
+        self.progress_bar.configure(value=self._files_done)
+        file = os.path.basename(result.file_path)
+        row = self._file_rows.get(file)
+        if row is None:
+            return
+        self.file_listbox.delete(row)
+        self.file_listbox.insert(row, f"{file} - {'failed' if result.error else 'done'}")
+        if result.error:
+            self.file_listbox.itemconfig(row, foreground="red")
+
+    def _finish_generation(self, kind, payload):
+        """
+        Restores the buttons once the generation thread is over and previews the document.
+
+        Args:
+            kind (str): 'done', 'cancelled' or 'error'
+            payload: the Document_result if done, the exception if error
+        """
+        self._worker = None
+        self.generate_button.configure(state=tk.NORMAL)
+        self.cancel_button.configure(state=tk.DISABLED)
+
+        if kind == 'cancelled':
+            self.status_label.configure(text="Cancelled, no document was generated.")
+            return
+        if kind == 'error':
+            self.status_label.configure(text=f"Failed to generate the document: {payload}")
+            return
 
-        #Extract the tables from Word document and populates the preview window
-        preview_latest_doc(folder_path=self.folder_path, preview_text=self.preview_text)
+        self.progress_bar.configure(value=max(len(self._file_rows), 1))
+        failures = payload.failures
+        self.status_label.configure(text=f"Done, {len(failures)} guest forms couldn't be extracted." if failures else "Done.")
+        #Populates the preview window with the tables of the document just generated
+        preview_document(result=payload, preview_text=self.preview_text)
 
     def update_file_list(self, folder_path, ext='.pdf'):
         """
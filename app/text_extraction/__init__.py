@@ -1,3 +1,26 @@
 from .utils import get_files_in_directory
-from .word_doc import GuestDocumentGenerator
-from .utils import get_files_in_directory
\ No newline at end of file
+from .constants import MAX_WORKERS
+from importlib import import_module
+
+#The heavy modules (python-docx, pdfminer) are imported on first use, so importing the package, e.g. in
+#an extraction worker or while the GUI starts, only loads what is actually needed:
+_LAZY_ATTRIBUTES = {
+    'GuestDocumentGenerator': '.word_doc',
+    'extract_guest_files': '.parallel_extraction',
+    'ExtractionCancelled': '.parallel_extraction',
+    'clear_cache': '.extraction_cache',
+}
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,202 @@
+from .constants import (ACROFORM_FIELD_ALIASES, ACROFORM_MIN_FIELDS, BED_TYPE, CHECK_MAP_GENDER, CUSTOMER_DATA_KEYS,
+                        DIET_OPTIONS, DIET_PREFERENCES, DIET_PREFERENCES_OLD, FIRST_PAGE_DEFAULTS, ROOM_TYPE,
+                        SHIRT_OPTIONS)
+from .form_templates import normalize_text
+import io
+import logging
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import PDFObjRef, resolve1
+from pdfminer.psparser import PSLiteral
+from pdfminer.utils import decode_text
+
+
+logger = logging.getLogger(__name__)
+
+
+def _build_field_keys():
+    """
+    Maps normalized field names to the customer data keys they fill.
+    """
+    field_keys = {normalize_text(key): key for key in CUSTOMER_DATA_KEYS}
+    field_keys.update(ACROFORM_FIELD_ALIASES)
+    return field_keys
+
+
+def _build_option_keys():
+    """
+    Maps the normalized name of every checkbox option (gender, diet, room, bed and shirt size) to
+    its customer data key and value, spelled as the layout parser returns them.
+    """
+    option_keys = {}
+    for key, options in (('gender', CHECK_MAP_GENDER), ('diet preference', {**DIET_PREFERENCES, **DIET_PREFERENCES_OLD}),
+                         ('room type', ROOM_TYPE), ('bed type', BED_TYPE)):
+        for option in options:
+            option_keys.setdefault(normalize_text(option), (key, option))
+    for option in sorted(DIET_OPTIONS):
+        option_keys.setdefault(normalize_text(option), ('diet preference', option))
+    #The layout parser tells adult and youth sizes apart by the column of the checkmark:
+    for option in sorted(SHIRT_OPTIONS):
+        size = ' '.join(option.split())
+        option_keys.setdefault(normalize_text(option), ('shirt size', size + (' (Youth)' if 'Youth' in size else ' (Adult)')))
+    return option_keys
+
+
+FIELD_KEYS = _build_field_keys()
+OPTION_KEYS = _build_option_keys()
+
+
+def decode_value(value):
+    """
+    Converts the value of a form field into text.
+
+    Args:
+        value: /V entry of the field (string, name or array of them)
+
+    Returns:
+        str | None: the field's value, None if it has no value
+    """
+    value = resolve1(value)
+    if isinstance(value, PSLiteral):
+        value = value.name
+    if isinstance(value, bytes):
+        value = decode_text(value)
+    if isinstance(value, list):
+        value = ', '.join(filter(None, map(decode_value, value)))
+    if not isinstance(value, str):
+        return None
+    return value.replace('\r\n', '\n').replace('\r', '\n').strip()
+
+
+def iter_fields(field_refs, parent_name='', inherited_value=None):
+    """
+    Walks the field tree of an AcroForm, yielding its terminal fields (text fields, checkboxes and
+    radio groups). Children inherit the value of their parent, as in the PDF specification.
+
+    Args:
+        field_refs (list): references to the fields of this level
+        parent_name (str): fully qualified name of the parent field
+        inherited_value: value of the parent field
+
+    Yields:
+        tuple: (partial name, full name, tooltip, raw value, references to the field and its widgets)
+    """
+    for field_ref in field_refs:
+        field = resolve1(field_ref)
+        if not isinstance(field, dict):
+            continue
+        partial_name = decode_value(field.get('T')) or ''
+        full_name = '.'.join(filter(None, (parent_name, partial_name)))
+        value = field.get('V', inherited_value)
+        kids = resolve1(field.get('Kids')) or []
+        child_fields = [kid for kid in kids if 'T' in (resolve1(kid) or {})]
+        if child_fields:
+            yield from iter_fields(child_fields, full_name, value)
+        else:
+            yield partial_name, full_name, decode_value(field.get('TU')) or '', resolve1(value), [field_ref, *kids]
+
+
+def get_annotation_pages(document):
+    """
+    Maps the object id of every annotation (form widgets included) to its zero based page number.
+    """
+    annotation_pages = {}
+    for page_number, page in enumerate(PDFPage.create_pages(document)):
+        for annotation in resolve1(page.annots) or []:
+            if isinstance(annotation, PDFObjRef):
+                annotation_pages[annotation.objid] = page_number
+    return annotation_pages
+
+
+def map_fields(fields, annotation_pages):
+    """
+    Maps the AcroForm fields onto the customer data keys read by the Word document. Text fields are
+    matched by name (or tooltip), checkboxes and radio groups by the option they select.
+
+    Args:
+        fields (iterable): fields yielded by iter_fields
+        annotation_pages (dict): page number of every widget, see get_annotation_pages
+
+    Returns:
+        dict: mapping between prompts and responses
+    """
+    mapping = {}
+    for partial_name, full_name, tooltip, raw_value, refs in fields:
+        value = decode_value(raw_value)
+        if not value or value == 'Off':
+            continue
+
+        key = next((FIELD_KEYS[name] for name in map(normalize_text, (partial_name, full_name, tooltip))
+                    if name in FIELD_KEYS), None)
+        if key is None:
+            #Option checkboxes are named after the option, radio groups select it as their value:
+            if isinstance(raw_value, PSLiteral):
+                option = OPTION_KEYS.get(normalize_text(value)) or OPTION_KEYS.get(normalize_text(partial_name))
+                if option:
+                    mapping[option[0]] = option[1]
+            continue
+
+        if isinstance(raw_value, PSLiteral) and normalize_text(value) in OPTION_KEYS:
+            value = OPTION_KEYS[normalize_text(value)][1]
+        #The email on the later pages belongs to the emergency contact:
+        pages = [annotation_pages.get(ref.objid, 0) for ref in refs if isinstance(ref, PDFObjRef)]
+        if key == 'email:' and pages and max(pages) > 0:
+            key = 'emergency email:'
+        mapping[key] = value
+    return mapping
+
+
+def may_have_acroform(data):
+    """
+    Tells from the raw bytes of a PDF whether it can have an AcroForm, without parsing it. The
+    catalog is either written as is, its /AcroForm entry is then visible, or compressed in an
+    object stream.
+
+    Args:
+        data (bytes): contents of the PDF file
+
+    Returns:
+        bool: False if the PDF certainly has no AcroForm
+    """
+    return b'/AcroForm' in data or b'/ObjStm' in data
+
+
+def extract_acroform_data(pdf_file_path, customer_data, min_fields=ACROFORM_MIN_FIELDS) -> bool:
+    """
+    Reads the answers of a fillable (AcroForm) guest form straight from its field values, which is
+    faster and more accurate than matching coordinates on the page layout.
+
+    Args:
+        pdf_file_path (str | Path): path to the guest's PDF form
+        customer_data (dict): mapping between prompts and responses, only updated if the AcroForm is usable
+        min_fields (int): minimum number of recognized and filled fields for the AcroForm to be usable
+
+    Returns:
+        bool: True if the form was read from its AcroForm, False if it must be parsed from the layout
+    """
+    try:
+        with open(pdf_file_path, 'rb') as fp:
+            data = fp.read()
+        #Most guest forms aren't fillable, their document isn't built at all:
+        if not may_have_acroform(data):
+            return False
+        with io.BytesIO(data) as fp:
+            document = PDFDocument(PDFParser(fp))
+            acroform = resolve1(document.catalog.get('AcroForm'))
+            field_refs = resolve1(acroform.get('Fields')) if isinstance(acroform, dict) else None
+            if not field_refs:
+                return False
+            mapping = map_fields(iter_fields(field_refs), get_annotation_pages(document))
+    except Exception as e:
+        #The layout parser reports the errors of unreadable files:
+        logger.debug("Couldn't read the AcroForm of %s: %s", pdf_file_path, e)
+        return False
+
+    if len(mapping) < min_fields:
+        return False
+
+    for key in FIRST_PAGE_DEFAULTS:
+        customer_data.setdefault(key, '')
+    customer_data.update(mapping)
+    return True
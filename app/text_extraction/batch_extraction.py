@@ -0,0 +1,167 @@
+from .constants import MAX_WORKERS, MIN_PARALLEL_FILES, PDF_BACKEND, CACHE_ENABLED
+from .containers import trip_summary
+from .manifest import load_manifest, save_manifest, split_unchanged_files, add_extracted_records
+from .parallel_extraction import format_memory_peaks, get_worker_count, run_extractions
+import logging
+import os
+from time import perf_counter
+
+
+logger = logging.getLogger(__name__)
+
+
+def discover_trip_folders(root, ext='.pdf'):
+    """
+    Finds the trip folders under a root folder: the root itself and every subfolder containing
+    guest forms. Hidden folders are skipped.
+
+    Args:
+        root (str | Path): folder to search
+        ext (str): extension of the guest forms
+
+    Returns:
+        list: paths of the trip folders, sorted
+    """
+    trip_folders = []
+    for folder, subfolders, files in os.walk(root):
+        subfolders[:] = sorted(subfolder for subfolder in subfolders if not subfolder.startswith('.'))
+        if any(f.endswith(ext) for f in files):
+            trip_folders.append(folder)
+    return trip_folders
+
+
+class _Trip:
+    """
+    Tracks the guest forms of a trip folder while the batch is extracted.
+    """
+
+    def __init__(self, folder, pdf_file_paths, manifest_path, backend):
+        self.folder = folder
+        self.pdf_file_paths = pdf_file_paths
+        self.manifest_path = manifest_path
+        if manifest_path is not None:
+            self.previous_records = load_manifest(manifest_path, backend)
+            self.results, self.records, self.pending = split_unchanged_files(pdf_file_paths, self.previous_records)
+        else:
+            self.previous_records = self.records = None
+            self.results = [None] * len(pdf_file_paths)
+            self.pending = [(i, None) for i in range(len(pdf_file_paths))]
+        self.remaining = len(self.pending)
+
+
+def extract_trip_folders(trip_files, folder_callback, manifest_paths=None, max_workers=MAX_WORKERS,
+                         min_parallel_files=MIN_PARALLEL_FILES, backend=PDF_BACKEND, progress_callback=None,
+                         cancel_event=None, use_cache=CACHE_ENABLED, memory_peaks=None):
+    """
+    Extracts the guest forms of many trip folders on one shared pool of isolated worker processes
+    (see run_extractions). The forms are queued largest folder first, so the long trips start right
+    away and the short ones fill the cores at the end, and each folder is handed to folder_callback
+    (e.g. to write its document) as soon as its last form is extracted, while the pool keeps
+    extracting the other folders.
+
+    Args:
+        trip_files (dict): paths to the guests' PDF forms of every trip folder
+        folder_callback (callable): called with the folder and the Extraction_result of every form
+        (in the order of its paths) once the folder is extracted, from the calling thread
+        manifest_paths (dict | None): manifest of every folder (see manifest.py), the unchanged forms
+        are reused and the manifests updated. None extracts every form
+        max_workers (int | None): upper limit of processes, None uses every available core
+        min_parallel_files (int): batches with fewer forms to extract than this are extracted serially
+        backend (str): name of the PDF backend used to lay out the pages, recorded in the manifests
+        progress_callback (callable | None): called with the Extraction_result of every extracted form
+        cancel_event (threading.Event | None): once set, the forms not extracted yet are cancelled
+        use_cache (bool): whether to read and store the mappings in the on-disk cache
+        memory_peaks (dict | None): updated with the memory high-water mark of every extraction
+        process, see run_extractions
+
+    Returns:
+        list: Trip_summary of every folder, in the order of trip_files
+
+    Raises:
+        ExtractionCancelled: if cancel_event was set before every form was extracted
+    """
+    start = perf_counter()
+    manifest_paths = manifest_paths or {}
+    trips = [_Trip(folder, pdf_file_paths, manifest_paths.get(folder), backend)
+             for folder, pdf_file_paths in trip_files.items()]
+    summaries = {}
+
+    def finish(trip):
+        if trip.records is not None:
+            add_extracted_records(trip.records, trip.pdf_file_paths, trip.pending,
+                                  [trip.results[i] for i, _ in trip.pending])
+            if trip.records != trip.previous_records:
+                save_manifest(trip.manifest_path, trip.records, backend)
+        ready_after = perf_counter() - start
+        error = None
+        try:
+            folder_callback(trip.folder, trip.results)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.error("Failed to process %s: %s", trip.folder, error)
+        summaries[trip.folder] = trip_summary(trip.folder, len(trip.pdf_file_paths), len(trip.pending),
+                                              [result for result in trip.results if result.error], ready_after,
+                                              perf_counter() - start - ready_after, error)
+
+    def add_result(trip, i, result):
+        trip.results[i] = result
+        trip.remaining -= 1
+        if result.error:
+            logger.warning("Failed to extract %s: %s", result.file_path, result.error)
+        if progress_callback is not None:
+            progress_callback(result)
+        if trip.remaining == 0:
+            finish(trip)
+
+    #Folders whose forms are all unchanged are ready right away:
+    for trip in trips:
+        if trip.remaining == 0:
+            finish(trip)
+
+    #Largest folders first:
+    jobs = [((trip, i), trip.pdf_file_paths[i])
+            for trip in sorted(trips, key=lambda trip: trip.remaining, reverse=True) for i, _ in trip.pending]
+    num_workers = get_worker_count(len(jobs), max_workers, min_parallel_files)
+    logger.info("Extracting %d guest forms of %d trip folders with %d processes", len(jobs), len(trips), num_workers)
+
+    if jobs:
+        for (trip, i), result in run_extractions(jobs, num_workers, cancel_event, use_cache, memory_peaks=memory_peaks,
+                                                 backend=backend):
+            add_result(trip, i, result)
+
+    return [summaries[trip.folder] for trip in trips]
+
+
+def format_batch_summary(summaries, elapsed, memory_peaks=None):
+    """
+    Formats the outcome of a batch as a text table, followed by the totals, the memory used by the
+    extraction processes and every failure.
+
+    Args:
+        summaries (list): Trip_summary of every folder
+        elapsed (float): duration of the whole batch in seconds
+        memory_peaks (dict | None): memory high-water mark of every extraction process, see
+        run_extractions. None leaves the memory out
+
+    Returns:
+        str: the summary
+    """
+    lines = [f"{'trip folder':<40}{'guests':>8}{'extracted':>11}{'failed':>8}{'ready (s)':>11}{'assemble (s)':>14}"]
+    for summary in summaries:
+        folder = summary.folder if len(summary.folder) <= 38 else '...' + summary.folder[-35:]
+        failed = 'folder' if summary.error else len(summary.failures)
+        lines.append(f"{folder:<40}{summary.guests:>8}{summary.extracted:>11}{failed:>8}"
+                     f"{summary.ready_after:>11.2f}{summary.assemble_time:>14.2f}")
+
+    failures = [failure for summary in summaries for failure in summary.failures]
+    failed_folders = [summary for summary in summaries if summary.error]
+    lines.append(f"\n{len(summaries)} trip folders, {sum(summary.guests for summary in summaries)} guest forms "
+                 f"({sum(summary.extracted for summary in summaries)} extracted) in {elapsed:.2f}s: "
+                 f"{len(failures)} failed forms, {len(failed_folders)} failed folders")
+    if memory_peaks:
+        lines.append(f"Extraction memory: {format_memory_peaks(memory_peaks)}")
+    for summary in failed_folders:
+        lines.append(f"  {summary.folder}: {summary.error}")
+    for failure in failures:
+        lines.append(f"  {failure.file_path}: {failure.error}")
+    return '\n'.join(lines)
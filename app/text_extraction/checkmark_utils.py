@@ -1,13 +1,40 @@
 from .constants import *
+from .form_templates import DEFAULT_TEMPLATE, get_gender_index
+from .spatial_index import SortedIndex
 
 
-def check_selection(checkbox_prompt, customer_checkmark):
+def get_checkbox_kind(checkbox_prompt):
+    """
+    Returns which options a checkbox prompt selects.
+
+    Args:
+        checkbox_prompt (Checkbox_prompt): The prompt defining the checkbox area.
+
+    Returns:
+        tuple: ('gender', 'diet', 'shirt', 'room', 'bed' or None for a plain checkbox, clean prompt)
+    """
+    clean_prompt = checkbox_prompt.field.split(':')[0].strip()
+    if 'Gender' in checkbox_prompt.field:
+        return 'gender', clean_prompt
+    if clean_prompt in DIET_OPTIONS:
+        return 'diet', clean_prompt
+    if clean_prompt in SHIRT_OPTIONS:
+        return 'shirt', clean_prompt
+    if clean_prompt in ROOM_OPTIONS:
+        return 'room', clean_prompt
+    if clean_prompt in BED_OPTIONS:
+        return 'bed', clean_prompt
+    return None, clean_prompt
+
+
+def check_selection(checkbox_prompt, customer_checkmark, template=DEFAULT_TEMPLATE):
     """
     Verifies whether a customer's checkmark is inside a given checkbox prompt.
 
     Args:
         checkbox_prompt: The prompt defining the checkbox area.
         customer_checkmark: The detected checkmark location.
+        template: The revision of the form, holds the coordinates of the options.
 
     Returns:
         A tuple containing the category and selected value if a match is found, otherwise (field, False).
@@ -15,46 +42,75 @@ def check_selection(checkbox_prompt, customer_checkmark):
     if not is_checkmark_inside_checkbox(checkbox_prompt, customer_checkmark):
         return checkbox_prompt.field, False
     
-    clean_prompt = checkbox_prompt.field.split(':')[0].strip()
+    kind, clean_prompt = get_checkbox_kind(checkbox_prompt)
     
-    if 'Gender' in checkbox_prompt.field:
-        return check_gender_selection(checkbox_prompt, customer_checkmark)
+    if kind == 'gender':
+        return check_gender_selection(checkbox_prompt, customer_checkmark, template)
     
-    if clean_prompt in DIET_OPTIONS:
-        return check_diet_preference(customer_checkmark)
+    if kind == 'diet':
+        return check_diet_preference(customer_checkmark, template)
     
-    if clean_prompt in SHIRT_OPTIONS:
+    if kind == 'shirt':
         return check_shirt_size_selection(customer_checkmark, clean_prompt)
     
-    if clean_prompt in ROOM_OPTIONS:
-        return check_room_type_selection(customer_checkmark)
+    if kind == 'room':
+        return check_room_type_selection(customer_checkmark, template)
     
-    if clean_prompt in BED_OPTIONS:
-        return check_bed_type_selection(customer_checkmark)
+    if kind == 'bed':
+        return check_bed_type_selection(customer_checkmark, template)
     
     return checkbox_prompt.field.strip(), True
 
 
-def parse_checkboxes(checkbox, customer_input_dict, container):
+def classify_checkmarks(checkbox_prompts, checkmarks, template=DEFAULT_TEMPLATE):
     """
-    Gets a figure and extract the bounding box coordinates and calculates the average x
-    and y coordinates. Appends the coordinates to checkbox_list for further processing, i.e.
-    mapping the coordinate to a choice on the form.
+    Resolves the checkbox prompts of a page against all its checkmarks at once. Gives the same
+    selections as calling check_selection for every prompt and checkmark (the first checkmark
+    selecting something wins), but each prompt is classified once, only the checkmarks at its
+    height are checked, and the diet, room and bed option under each checkmark is looked up once
+    for the whole page.
 
     Args:
-        checkbox (LTFigure): check mark showing the customer's choice
-        customer_input_dict (dict): list containing checkbox coordinates
-    
+        checkbox_prompts (list): Checkbox_prompt of the page
+        checkmarks (list): Checkbox (checkmark centers) of the page
+        template (Form_template): revision of the form, holds the coordinates of the options
+
     Returns:
-        None
+        list: (prompt, selection) of every prompt with a selection, in the order of checkbox_prompts
     """
-    try:
-        x_min, y_min, x_max, y_max = checkbox.bbox
-        x_avg = (x_min + x_max) / 2
-        y_avg = (y_min + y_max) / 2
-        customer_input_dict['checkmarks'].append(container(y_avg, x_avg))
-    except AttributeError:
-        return
+    if not checkbox_prompts or not checkmarks:
+        return []
+
+    index = template.checkbox_index
+    checkmark_index = SortedIndex(range(len(checkmarks)), key=lambda i: checkmarks[i].y_avg)
+    options = {
+        'diet': ('diet preference', [index.diet.find(checkmark.x_avg) for checkmark in checkmarks]),
+        'room': ('room type', [index.room.find(checkmark.y_avg) for checkmark in checkmarks]),
+        'bed': ('bed type', [index.bed.find(checkmark.y_avg) for checkmark in checkmarks]),
+    }
+
+    selections = []
+    for checkbox_prompt in checkbox_prompts:
+        kind, clean_prompt = get_checkbox_kind(checkbox_prompt)
+        if kind == 'gender':
+            gender_index = get_gender_index(template, checkbox_prompt.x_min)
+        for i in checkmark_index.candidates(checkbox_prompt.y_min, checkbox_prompt.y_max):
+            checkmark = checkmarks[i]
+            if not is_checkmark_inside_checkbox(checkbox_prompt, checkmark):
+                continue
+            if kind == 'gender':
+                prompt, selection = 'gender', gender_index.find(checkmark.x_avg) if gender_index else None
+            elif kind == 'shirt':
+                prompt, selection = check_shirt_size_selection(checkmark, clean_prompt)
+            elif kind is None:
+                prompt, selection = checkbox_prompt.field.strip(), True
+            else:
+                prompt, page_options = options[kind]
+                selection = page_options[i]
+            if selection:
+                selections.append((prompt, selection))
+                break
+    return selections
 
 
 def is_checkmark_inside_checkbox(checkbox_prompt, customer_checkmark):
@@ -65,21 +121,15 @@ def is_checkmark_inside_checkbox(checkbox_prompt, customer_checkmark):
     )
 
 
-def check_gender_selection(checkbox_prompt, customer_checkmark):
+def check_gender_selection(checkbox_prompt, customer_checkmark, template=DEFAULT_TEMPLATE):
     """Determines the gender selection based on the checkmark position."""
-    check_map = CHECK_MAP_GENDER if checkbox_prompt.x_min >= 45 else CHECK_MAP_GENDER_OLD
-    for key, value in check_map.items():
-        if abs(value - customer_checkmark.x_avg) <= CHECKBOX_THRESHOLD:
-            return 'gender', key
-    return 'gender', None
+    gender_index = get_gender_index(template, checkbox_prompt.x_min)
+    return 'gender', gender_index.find(customer_checkmark.x_avg) if gender_index else None
 
 
-def check_diet_preference(customer_checkmark):
+def check_diet_preference(customer_checkmark, template=DEFAULT_TEMPLATE):
     """Determines the diet preference selection."""
-    for key, value in {**DIET_PREFERENCES, **DIET_PREFERENCES_OLD}.items():
-        if abs(value - customer_checkmark.x_avg) <= CHECKBOX_THRESHOLD:
-            return 'diet preference', key
-    return 'diet preference', None
+    return 'diet preference', template.checkbox_index.diet.find(customer_checkmark.x_avg)
 
 
 def check_shirt_size_selection(customer_checkmark, clean_prompt):
@@ -88,17 +138,11 @@ def check_shirt_size_selection(customer_checkmark, clean_prompt):
     return 'shirt size', clean_prompt + size_category
 
 
-def check_room_type_selection(customer_checkmark):
+def check_room_type_selection(customer_checkmark, template=DEFAULT_TEMPLATE):
     """Determines the selected room type."""
-    for key, value in ROOM_TYPE.items():
-        if abs(value - customer_checkmark.y_avg) <= CHECKBOX_THRESHOLD:
-            return 'room type', key
-    return 'room type', None
+    return 'room type', template.checkbox_index.room.find(customer_checkmark.y_avg)
 
 
-def check_bed_type_selection(customer_checkmark):
+def check_bed_type_selection(customer_checkmark, template=DEFAULT_TEMPLATE):
     """Determines the selected bed type."""
-    for key, value in BED_TYPE.items():
-        if abs(value - customer_checkmark.y_avg) <= CHECKBOX_THRESHOLD:
-            return 'bed type', key
-    return 'bed type', None
+    return 'bed type', template.checkbox_index.bed.find(customer_checkmark.y_avg)
@@ -1,40 +1,76 @@
+import os
 import re
 import string
 
 
-TITLES = [
-    'Name', 
-    'Preferred name', 
-    'Address & Phone numbers', 
-	'Birth date', 
-	'Age', 
-	'Gender', 
-	'Email',
-    'Passport country and number', 
-	'Place of issue', 
-	'Date of issue', 
-	'Expiration date',
-    'Room type/Bed type', 
-	'Roommate', 
-	'Emergency contact', 
-	'Diet preference', 
-	'Exclude from diet',
-    'Allergies', 
-	'Life threatening allergies', 
-	'Medications', 
-	'Blood Type',
-    'Other Medical Information', 
-	'Fitness Level', 
-	'Travel/Medical Insurance', 
-	'Flying Doctors',
-    'Special Occasion', 
-	'Height', 
-	'Weight', 
-	'Shirt size', 
-	'Additional Info'
+###-----------------------------------------------------------------------###
+###-----------------------------OUTPUT SCHEMA-----------------------------###
+###-----------------------------------------------------------------------###
+#Rows of a guest's column in the Word document (and columns of the CSV/JSON outputs), compiled into a row renderer
+#by output_schema.py. Every row reads its keys from the customer data (default when missing), joins them with the
+#combiner (str.format template, None keeps the single value as it is) and applies the converter (see CONVERTERS in
+#output_schema.py), if any:
+OUTPUT_SCHEMA = [
+    {'title': 'Name', 'keys': ['full name (as shown on passport):'], 'combiner': None, 'default': 'M', 'converter': None},
+    {'title': 'Preferred name', 'keys': ['preferred name:'], 'combiner': None, 'default': 'M', 'converter': None},
+    #The spaces before the line breaks are kept as the document always had them:
+    {'title': 'Address & Phone numbers', 'keys': ['street address:', 'city:', 'state/province:', 'zip code:', 'phone number:'],
+     'combiner': '{}                 \n{}, {}, {}                \n\n{}-Home', 'default': 'M', 'converter': None},
+    {'title': 'Birth date', 'keys': ['date of birth (mm/dd/yyyy):'], 'combiner': None, 'default': 'M', 'converter': None},
+    {'title': 'Age', 'keys': ['age at time of safari:'], 'combiner': None, 'default': 'M', 'converter': None},
+    {'title': 'Gender', 'keys': ['gender'], 'combiner': None, 'default': 'M', 'converter': None},
+    {'title': 'Email', 'keys': ['email:'], 'combiner': None, 'default': 'M', 'converter': None},
+    {'title': 'Passport country and number', 'keys': ['passport country:', 'passport number:'], 'combiner': '{} \n{}',
+     'default': 'M', 'converter': None},
+    {'title': 'Place of issue', 'keys': ['passport place of issue:'], 'combiner': None, 'default': 'M', 'converter': None},
+    {'title': 'Date of issue', 'keys': ['date of issue:'], 'combiner': None, 'default': 'M', 'converter': None},
+    {'title': 'Expiration date', 'keys': ['passport expiration date:'], 'combiner': None, 'default': 'M', 'converter': None},
+    {'title': 'Room type/Bed type', 'keys': ['room type', 'bed type'], 'combiner': '{} / {}', 'default': 'M', 'converter': None},
+    {'title': 'Roommate', 'keys': ['roommate'], 'combiner': None, 'default': 'M', 'converter': None},
+    {'title': 'Emergency contact', 'keys': ['full name:', 'emergency email:', 'phone number (include country code of outside usa):'],
+     'combiner': '{} \n{}\n{}', 'default': 'M', 'converter': None},
+    {'title': 'Diet preference', 'keys': ['diet preference'], 'combiner': None, 'default': 'M', 'converter': None},
+    {'title': 'Exclude from diet', 'keys': ['diet exclusions'], 'combiner': None, 'default': 'None', 'converter': None},
+    {'title': 'Allergies', 'keys': ['any allergies', 'antibiotic allergies'],
+     'combiner': 'Any allergies: {}\nAntibiotic allergies: {}', 'default': 'None', 'converter': None},
+    {'title': 'Life threatening allergies', 'keys': ['life threatening allergies'],
+     'combiner': 'Life threatening allergies: {}', 'default': 'None', 'converter': None},
+    {'title': 'Medications', 'keys': ['medications'], 'combiner': None, 'default': 'None', 'converter': None},
+    {'title': 'Blood Type', 'keys': ['blood type (if known):'], 'combiner': '{}', 'default': 'M', 'converter': None},
+    {'title': 'Other Medical Information', 'keys': ['equipment', 'physical limitations'], 'combiner': '{} {}',
+     'default': 'M', 'converter': None},
+    {'title': 'Fitness Level', 'keys': ['fitness'], 'combiner': None, 'default': 'M', 'converter': None},
+    {'title': 'Travel/Medical Insurance', 'keys': ['Travel insurance:'], 'combiner': '{}', 'default': 'M', 'converter': None},
+    {'title': 'Flying Doctors', 'keys': ['Flying Doctors:'], 'combiner': '{}', 'default': 'M', 'converter': None},
+    {'title': 'Special Occasion', 'keys': ['what is the occasion:', 'celebrating'], 'combiner': '{} {}', 'default': '',
+     'converter': None},
+    {'title': 'Height', 'keys': ["height (ft' inch''):"], 'combiner': None, 'default': 'M', 'converter': 'height'},
+    {'title': 'Weight', 'keys': ['weight (pounds):', 'weight (lbs):'], 'combiner': '{}{}', 'default': '', 'converter': 'weight'},
+    {'title': 'Shirt size', 'keys': ['shirt size'], 'combiner': '{}', 'default': 'M', 'converter': None},
+    {'title': 'Additional Info', 'keys': ['Additional info:'], 'combiner': '{}', 'default': 'M', 'converter': None},
 ]
+TITLES = [row['title'] for row in OUTPUT_SCHEMA]
+
 
 
+###------------------------------------------------------------------------###
+###-----------------------------PDF EXTRACTION-----------------------------###
+###------------------------------------------------------------------------###
+#Library used to lay out the pages of the guest forms ('pdfminer' or 'pymupdf'):
+PDF_BACKEND = 'pdfminer'
+#Pages of the guest forms that contain prompts (zero based):
+FORM_PAGE_NUMBERS = [0, 1, 2, 3]
+#Parameters used to extract fields from the PDF guest form (pdfminer's LAParams):
+LAPARAMS = {'line_overlap': 0.5, 'char_margin': 2, 'line_margin': 0.5, 'word_margin': 0.1, 
+            'boxes_flow': 0.25, 'detect_vertical': False, 'all_texts': True}
+#Reduce every pdfminer page to its text boxes, figures and shapes as soon as it's laid out, freeing the character level
+#layout before the page is parsed (keeps the workers' memory flat on long scanned forms):
+STREAM_PAGES = True
+#Forms sharing the static layer of a form already parsed only have their "Xi" input figure laid out:
+INPUT_LAYER_FAST_PATH = True
+#Stop laying out pages once every key read by the Word document is resolved (see CUSTOMER_DATA_KEYS):
+EARLY_EXIT_ENABLED = True
+
 
 ###--------------------------------------------------------------------------###
 ###-----------------------------THRESHOLD VALUES-----------------------------###
@@ -94,6 +130,9 @@ DIET_PREFERENCES = {'Regular': 88, 'Vegetarian': 239, 'Vegan': 369.49, 'Gluten-F
                         'Lactose-Free': 110, 'Pescaterian': 271 , 'Other': 534, 'Kosher': 403}
 DIET_PREFERENCES_OLD = {'No preference': 121.73, 'Vegetarian': 201.89, 'Vegan': 259.49, 'Gluten-Free': 343.97, 
                         'Lactose-Free': 432.29, 'Pescaterian': 109.25 , 'Other': 163.01}
+#Diets of the presplit, merged and flat revisions (every option on a single row, no "No preference"):
+DIET_PREFERENCES_CURRENT = {'Regular': 88, 'Pescaterian': 109.25, 'Other': 163.01, 'Vegetarian': 201.89, 'Vegan': 259.49,
+                            'Gluten-Free': 343.97, 'Kosher': 403, 'Lactose-Free': 432.29}
 
 
 ###----------------------------------------------------------------------###
@@ -135,3 +174,127 @@ SHIRT_OPTIONS = {'Adult Small', 'Youth Small', 'Med', 'Large', 'XL','XXL', 'Adul
 SHIRT_LOCATIONS = {'Small': 445, 'Med': 420, 'Large': 395, 'XL': 370,'XXL': 345}
 SHIRT_LOCATIONS_OLD = {'Small': 445, 'Med': 420, 'Large': 395, 'XL': 370,'XXL': 345}
 
+
+###-----------------------------------------------------------------------###
+###-----------------------------FORM TEMPLATES----------------------------###
+###-----------------------------------------------------------------------###
+#Revisions of the guest form. A form uses the first template whose markers (lower case phrases
+#without punctuation) all appear in the static text of its first page and whose first page draws an "Xi" input
+#figure or not, as input_figure says (None matches both). The last template has no markers, it's used for any form
+#that doesn't match a revision and detects the layout at runtime.
+#   presplit: whether the first page prompts are already split, None detects it from the line widths
+#   gender_maps: (min x, map) pairs, the first pair whose min x is <= the Gender prompt's x_min is used. A single
+#   pair applies to every Gender prompt
+#   diet_map, room_map, bed_map: checkmark coordinates of each option
+#The merged revision shares its text lines between two prompts, so it's tested before the presplit one. The
+#acroform revision lays out its pages like the flat one (its answers are form fields, not page content), it's read
+#from its fields (see acroform.py) and only falls back to the flat template:
+FORM_TEMPLATES = [
+    {'name': 'merged', 'markers': ['full name as shown on passport preferred name'], 'input_figure': True,
+     'presplit': False, 'gender_maps': [(float('-inf'), CHECK_MAP_GENDER)], 'diet_map': DIET_PREFERENCES_CURRENT,
+     'room_map': ROOM_TYPE, 'bed_map': BED_TYPE},
+    {'name': 'presplit', 'markers': ['full name as shown on passport', 'preferred name', 'adult small'],
+     'input_figure': True, 'presplit': True, 'gender_maps': [(float('-inf'), CHECK_MAP_GENDER)],
+     'diet_map': DIET_PREFERENCES_CURRENT, 'room_map': ROOM_TYPE, 'bed_map': BED_TYPE},
+    {'name': 'flat', 'markers': ['full name as shown on passport', 'preferred name', 'adult small'],
+     'input_figure': False, 'presplit': True, 'gender_maps': [(float('-inf'), CHECK_MAP_GENDER)],
+     'diet_map': DIET_PREFERENCES_CURRENT, 'room_map': ROOM_TYPE, 'bed_map': BED_TYPE},
+    {'name': 'legacy', 'markers': [], 'input_figure': None, 'presplit': None,
+     'gender_maps': [(45, CHECK_MAP_GENDER), (float('-inf'), CHECK_MAP_GENDER_OLD)],
+     'diet_map': {**DIET_PREFERENCES, **DIET_PREFERENCES_OLD},
+     'room_map': ROOM_TYPE, 'bed_map': BED_TYPE},
+]
+#Finds the single input fields of a line of prompts (email, passport, etc):
+FIELD_PATTERN = re.compile(r'[^\s_][?,\'\"\w+\s+()/-]+:?\s{0,3}_{0,3}')
+#Finds the accomodation fields of a line of prompts:
+ACCOMMODATION_PATTERN = re.compile(r'[^\s_]\w+\s[\w()]*\s?[\w]*\s?[\w)]*')
+
+
+###-----------------------------------------------------------------------###
+###-----------------------------ACROFORM FIELDS---------------------------###
+###-----------------------------------------------------------------------###
+#Fillable (AcroForm) guest forms are read from their field values instead of the page layout:
+ACROFORM_FAST_PATH = True
+#Minimum number of recognized and filled fields for a form to be read from its AcroForm:
+ACROFORM_MIN_FIELDS = 3
+#Keys of the customer data read by the Word document (the keys of every row of OUTPUT_SCHEMA, in order), fields named
+#like them are mapped directly:
+CUSTOMER_DATA_KEYS = list(dict.fromkeys(key for row in OUTPUT_SCHEMA for key in row['keys']))
+#Keys both extraction paths initialize empty on the first page, the long prompts of every page add their lines to them:
+FIRST_PAGE_DEFAULTS = ['family members', 'roommate', 'diet exclusions', 'medications', 'equipment',
+                       'physical limitations']
+#Keys filling the same cell of the Word document, resolving one of them resolves the other:
+CUSTOMER_DATA_ALTERNATIVES = {'weight (lbs):': 'weight (pounds):'}
+#Other field names (lower case, no punctuation) and the customer data key they fill:
+ACROFORM_FIELD_ALIASES = {'emergency contact email': 'emergency email:', 'date of birth': 'date of birth (mm/dd/yyyy):'}
+
+
+
+###-----------------------------------------------------------------------###
+###-----------------------------WORKER OPTIONS----------------------------###
+###-----------------------------------------------------------------------###
+#Number of processes used to extract the guest forms (None uses every available core):
+MAX_WORKERS = None
+#Folders with fewer guest forms than this are extracted serially, starting the pool isn't worth it:
+MIN_PARALLEL_FILES = 4
+#Budget of every guest form, a form exceeding it has its worker killed and is left missing ("M") in the document.
+#Wall-clock seconds per form and resident memory per worker in bytes, None disables the limit (and the isolation
+#of the serial extraction when both are None):
+EXTRACTION_TIMEOUT = 120
+EXTRACTION_MEMORY_LIMIT = 1024 * 1024 * 1024
+#Seconds between two checks of the workers' budgets:
+WORKER_POLL_INTERVAL = 0.1
+#Start methods of the worker processes, the first one the platform supports is used. Workers are never forked from the
+#caller, which may be the GUI's background thread (a fork only copies the calling thread, locks held by the others
+#stay locked in the child):
+WORKER_START_METHODS = ('forkserver', 'spawn')
+
+
+
+###----------------------------------------------------------------------###
+###-----------------------------CACHE OPTIONS----------------------------###
+###----------------------------------------------------------------------###
+#Extracted guest forms are cached on disk, keyed by the PDF contents and these constants:
+CACHE_ENABLED = True
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'guest_form_extraction')
+#Least recently used entries are evicted once the cache grows past this size (bytes):
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+#Bump when the parsing code changes so forms extracted by older versions are parsed again:
+EXTRACTION_VERSION = 2
+#Constants whose values change the extracted customer data, hashed into the cache keys and the manifests. The worker,
+#output and instrumentation options only change how the forms are extracted or written, not what is read from them:
+CACHE_KEY_CONSTANTS = [
+    'FORM_PAGE_NUMBERS', 'LAPARAMS', 'EARLY_EXIT_ENABLED', 'SPLIT_THRESHOLD', 'X_VALUE_PER_CHARACTER',
+    'CHECKBOX_THRESHOLD', 'PUNC_REGEX', 'DESCRIBE_OPTIONS', 'LONG_KEYWORDS', 'CHECKBOX_OPTIONS', 'CHECK_MAP_GENDER',
+    'CHECK_MAP_GENDER_OLD', 'DIET_OPTIONS', 'DIET_PREFERENCES', 'DIET_PREFERENCES_OLD', 'DIET_PREFERENCES_CURRENT', 'ROOM_BED_OPTIONS',
+    'ROOM_OPTIONS', 'ROOM_TYPE', 'ROOM_TYPE_OLD', 'ROOM_TYPE_OLD2', 'BED_OPTIONS', 'BED_TYPE', 'BED_TYPE_OLD',
+    'BED_TYPE_OLD2', 'SHIRT_OPTIONS', 'SHIRT_LOCATIONS', 'SHIRT_LOCATIONS_OLD', 'FORM_TEMPLATES', 'FIELD_PATTERN',
+    'ACCOMMODATION_PATTERN', 'ACROFORM_FAST_PATH', 'ACROFORM_MIN_FIELDS', 'CUSTOMER_DATA_KEYS', 'FIRST_PAGE_DEFAULTS',
+    'CUSTOMER_DATA_ALTERNATIVES', 'ACROFORM_FIELD_ALIASES', 'EXTRACTION_VERSION',
+]
+#Number of page prompt layouts kept in memory, one per page of every form revision in the trip:
+PROMPT_CACHE_SIZE = 32
+#Regenerating a folder only extracts the guest forms added or changed since the manifest saved next to its output:
+MANIFEST_ENABLED = True
+MANIFEST_NAME = '.guest_info_manifest.json'
+
+
+###------------------------------------------------------------------------###
+###-----------------------------INSTRUMENTATION----------------------------###
+###------------------------------------------------------------------------###
+#Times the extraction stages (layout, split_text, mapping, table writes, save) of every file and page:
+INSTRUMENTATION_ENABLED = False
+#'table' logs a summary at the end of generate_document, 'json' writes it next to the document:
+INSTRUMENTATION_REPORT = 'table'
+#Folder where cProfile dumps (.prof) and their pstats summaries are written, None disables profiling:
+PROFILE_DIR = None
+
+
+
+###----------------------------------------------------------------------###
+###-----------------------------WORD DOCUMENT----------------------------###
+###----------------------------------------------------------------------###
+#Writes the guest tables one page at a time straight to the document XML instead of cell by cell through python-docx:
+BULK_TABLE_WRITER = True
+#Guests per table, each page of the document holds one table:
+GUESTS_PER_PAGE = 3
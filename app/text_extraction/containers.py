@@ -13,5 +13,40 @@ entry_tuple = namedtuple(typename='Entry', field_names=['text', 'y_coord', 'x_co
 #Stores the selections/checkmarks made by clients:
 checkbox_tuple = namedtuple(typename='Checkbox', field_names=['y_avg', 'x_avg'])
 
-#Stores
-field_container = namedtuple(typename='Split_field', field_names=['field', 'bbox'])
\ No newline at end of file
+#Stores a top level object of a page summary: stripped text (None for figures and shapes), bounding box, words
+#compared to the prompt keywords and the layout object (None for the fields split out of a line):
+page_item = namedtuple(typename='Page_item', field_names=['text', 'bbox', 'tokens', 'obj'])
+
+#Stores what the parser reads from a page, built in one traversal of its layout (see page_summary.py):
+page_summary = namedtuple(typename='Page_summary', field_names=['pageid', 'content_digest', 'items', 'texts', 'inputs',
+                                                                'checkmarks', 'has_input', 'total_width'])
+
+#Stores the size, modification time and contents digest of a guest form, read together (see manifest.py):
+file_state = namedtuple(typename='File_state', field_names=['size', 'mtime_ns', 'digest'])
+
+#Stores the outcome of extracting a single guest form:
+extraction_result = namedtuple(typename='Extraction_result', field_names=['file_path', 'customer_data', 'error'])
+
+#Stores a revision of the guest form (see FORM_TEMPLATES in constants.py):
+form_template = namedtuple(typename='Form_template', field_names=['name', 'markers', 'input_figure', 'presplit',
+                                                                  'gender_maps', 'diet_map', 'room_map', 'bed_map',
+                                                                  'checkbox_index'])
+
+#Stores the checkbox coordinates of a revision compiled into IntervalIndex (gender: (min x, index) pairs):
+checkbox_index = namedtuple(typename='Checkbox_index', field_names=['gender', 'diet', 'room', 'bed'])
+
+#Stores a page read without layout analysis, lay_out() lays out only its "Xi" input figure:
+input_layer = namedtuple(typename='Input_layer', field_names=['pageid', 'content_digest', 'lay_out'])
+
+#Stores a row of the output schema (see OUTPUT_SCHEMA in constants.py), converter resolved to its function:
+output_column = namedtuple(typename='Output_column', field_names=['title', 'keys', 'combiner', 'default', 'converter'])
+
+#Stores the rows of a guest's column as written in the Word document (missing values are 'M'):
+guest_record = namedtuple(typename='Guest_record', field_names=['file_path', 'rows', 'error'])
+
+#Stores the outcome of generating a Word document, its guest records are used for the preview:
+document_result = namedtuple(typename='Document_result', field_names=['document_path', 'guest_records', 'failures'])
+
+#Stores the outcome of a trip folder processed by the batch scheduler (times in seconds since the batch started):
+trip_summary = namedtuple(typename='Trip_summary', field_names=['folder', 'guests', 'extracted', 'failures',
+                                                                'ready_after', 'assemble_time', 'error'])
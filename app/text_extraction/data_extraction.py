@@ -2,74 +2,102 @@ from .containers import *
 from .checkmark_utils import *
 from .prompt_response_mapping import *
 from .utils import check_for_split_fields
+from .constants import (PDF_BACKEND, FORM_PAGE_NUMBERS, INPUT_LAYER_FAST_PATH, CACHE_ENABLED, PROMPT_CACHE_SIZE,
+                        ACROFORM_FAST_PATH, EARLY_EXIT_ENABLED, CUSTOMER_DATA_KEYS, CUSTOMER_DATA_ALTERNATIVES,
+                        FIRST_PAGE_DEFAULTS)
+from .acroform import extract_acroform_data
+from .form_templates import DEFAULT_TEMPLATE, select_form_template
+from .instrumentation import span, timed
+from .extraction_cache import get_cache_key, load_cached_data, store_cached_data
+from .page_summary import split_field, summarize_page
+from .pdf_backends import get_pdf_backend
+import logging
 import os
 import re
-from pdfminer.high_level import extract_pages
-from pdfminer.layout import LTPage, LAParams, LTText, LTFigure
+from collections import OrderedDict
+from contextlib import closing
+from functools import lru_cache
 
 
-def parse_text(text_field, prompts_dict, container, checkbox_container=None, customer_input = False):
+logger = logging.getLogger(__name__)
+
+
+def parse_text(text_field, prompts_dict, container, checkbox_container=None):
     """
-    Parses out the text and bounding box as a tuple : (x_min, y_min, x_max, y_max). 
-    Append the text to the item_list which can be form input fields or data provided by
-    the user.
+    Sorts a prompt of the form by type using the words of its text, and appends its text and
+    coordinates to the matching list of prompts_dict.
 
     Args:
-        text_field (LTTextBoxHorizontal): text field in the pdf document
+        text_field (Page_item): text box of the page summary, or field split out of it
+        prompts_dict (dict): lists of prompts by prompt type
+        container (type): tuple storing the prompts and long prompts
+        checkbox_container (type): tuple storing the checkbox prompts
     
     Returns:
         None
     """
-    try:
-        text = text_field.get_text().strip()
-    except AttributeError:
-        text = text_field.field.strip()
-    except:
-        return
-    
     #Remove underscores from text
-    text = text.strip('_')
-    text_set = set(text.replace(':', "").split())
+    text = text_field.text.strip('_')
+    text_set = text_field.tokens
 
-    try:
-        if len(text) > 0 :
-            x_min, y_min, x_max, y_max = text_field.bbox
-            if customer_input:
-                prompts_dict['single_input'].append(container(text, y_min, x_min))
-            elif text_set.intersection(LONG_KEYWORDS):
-                prompts_dict['long_prompts'].append(container(text, y_min, x_max))
-            elif text_set.intersection(CHECKBOX_OPTIONS):
-                prompts_dict['checkbox_prompts'].append(checkbox_container(text, x_min, y_min, x_max, y_max))
-            else:
-                prompts_dict['prompts'].append(container(text, y_min, x_max))
-    except AttributeError:
-        return
+    if len(text) > 0 :
+        x_min, y_min, x_max, y_max = text_field.bbox
+        if text_set.intersection(LONG_KEYWORDS):
+            prompts_dict['long_prompts'].append(container(text, y_min, x_max))
+        elif text_set.intersection(CHECKBOX_OPTIONS):
+            prompts_dict['checkbox_prompts'].append(checkbox_container(text, x_min, y_min, x_max, y_max))
+        else:
+            prompts_dict['prompts'].append(container(text, y_min, x_max))
 
 
-def check_for_vectorized_image(layout, customer_input_dict, entry_tuple, checkbox_tuple):
+def check_for_vectorized_image(summary, customer_input_dict):
     """
-    Checks if the layout contains the customer input as a vectorized image. If it does, then it extracts,
-    and parses the customer inputs and store them in the customer_input_dict
+    Checks if the page contains the customer input as a vectorized image. If it does, then its
+    responses and checkmarks (parsed by summarize_page) are stored in the customer_input_dict
 
     Args:
+        summary (Page_summary): summary of the page
+        customer_input_dict (dict): lists of single inputs and checkmarks, updated in place
 
     Returns:
+        bool: True if the page has an "Xi" input figure
+    """
+    if not summary.has_input:
+        return False
+    customer_input_dict['single_input'].extend(summary.inputs)
+    customer_input_dict['checkmarks'].extend(summary.checkmarks)
+    return True
+
+
+@lru_cache(maxsize=4096)
+def match_prompt_fields(text):
     """
-    for lt_obj in layout:
-        try:
-            if "Xi" in lt_obj.name:
-                for sub_item in lt_obj:
-                    if isinstance(sub_item, LTText):
-                        parse_text(text_field=sub_item, prompts_dict=customer_input_dict, \
-                                container=entry_tuple, customer_input=True)
-                    elif isinstance(sub_item, LTFigure):
-                        parse_checkboxes(checkbox=sub_item, customer_input_dict=customer_input_dict, container=checkbox_tuple)
-                return True
-        except AttributeError:
-            continue
-    return False
+    Runs the regular expressions of split_text on a line of prompts. The static prompts are the
+    same on every form of a revision, so the result is cached and each line is only analyzed once.
 
+    Args:
+        text (str): stripped text of the line
 
+    Returns:
+        tuple | None: (fields, length of every field match, accomodation fields), None if the line
+        must not be split
+    """
+    clean_text = re.sub(pattern=PUNC_REGEX, repl='', string=text)
+    text_set = set(clean_text.split())
+
+    if text_set.intersection(LONG_KEYWORDS) or text_set.intersection(DIET_OPTIONS):
+        return None
+
+    my_matches = list(FIELD_PATTERN.finditer(text))
+    split_fields = tuple(match.group() for match in my_matches)
+    span_lengths = tuple(match.end() - match.start() for match in my_matches)
+    sub_fields = ()
+    if len(split_fields) == 1 and len(split_fields[0]) > 80:
+        sub_fields = tuple(ACCOMMODATION_PATTERN.findall(text))
+    return split_fields, span_lengths, sub_fields
+
+
+@timed('split_text')
 def split_text(text_field, field_container):
     """
     Splits the following fields:
@@ -81,25 +109,18 @@ def split_text(text_field, field_container):
     City:, State/Province:
     Zip:, Phone:
     """
-    text = text_field.get_text().strip()
-    clean_text = re.sub(pattern=PUNC_REGEX, repl='', string=text)
-    text_set = set(clean_text.split())
-
-    if text_set.intersection(LONG_KEYWORDS) or text_set.intersection(DIET_OPTIONS):
+    text = text_field.text
+    prompt_fields = match_prompt_fields(text)
+    if prompt_fields is None:
         return [text_field]
     
     #Match form fields:
     #Make mapping for gender and weight:
-    field_pattern = re.compile(r'[^\s_][?,\'\"\w+\s+()/-]+:?\s{0,3}_{0,3}') #finds all the single input fields (email, passport, etc)
-    field_pattern2 = re.compile(r'[^\s_]\w+\s[\w()]*\s?[\w]*\s?[\w)]*') #finds all the accomodation fields
-
-    split_fields = field_pattern.findall(text)
-    my_matches = list(field_pattern.finditer(text))
+    split_fields, span_lengths, sub_fields = prompt_fields
     
     res = []
     if len(split_fields) == 1:
         if len(split_fields[0]) > 80:
-            sub_fields = field_pattern2.findall(text)
             x_min, y_min, x_max, y_max = text_field.bbox
             try:
                 res.append(field_container(field=sub_fields[0].strip(), bbox=(x_min, y_min, x_min + 100, y_max)))
@@ -112,16 +133,16 @@ def split_text(text_field, field_container):
         x_min, y_min, x_max, y_max = text_field.bbox
         
         #First field:
-        text_span = my_matches[0].span()
-        new_x_max = x_min + (text_span[1] - text_span[0]) * X_VALUE_PER_CHARACTER
+        text_span = span_lengths[0]
+        new_x_max = x_min + text_span * X_VALUE_PER_CHARACTER
         if 'Gender' in split_fields[0]:
             res.append(field_container(field=split_fields[0].strip(), bbox=(x_min, y_min, new_x_max + 120, y_max)))
         else:
             res.append(field_container(field=split_fields[0].strip(), bbox=(x_min, y_min, new_x_max, y_max)))
 
         #Second field:
-        text_span = my_matches[1].span()
-        new_x_min = x_max - (text_span[1] - text_span[0]) * X_VALUE_PER_CHARACTER
+        text_span = span_lengths[1]
+        new_x_min = x_max - text_span * X_VALUE_PER_CHARACTER
         if 'Weight' not in split_fields[1]:
             res.append(field_container(field=split_fields[1].strip(), bbox=(new_x_min, y_min, x_max, y_max)))
         else:
@@ -130,29 +151,29 @@ def split_text(text_field, field_container):
         x_min, y_min, x_max, y_max = text_field.bbox
         
         #First field:
-        text_span = my_matches[0].span()
-        new_x_max = x_min + (text_span[1] - text_span[0]) * X_VALUE_PER_CHARACTER
+        text_span = span_lengths[0]
+        new_x_max = x_min + text_span * X_VALUE_PER_CHARACTER
         res.append(field_container(field=split_fields[0].strip(), bbox=(x_min, y_min, new_x_max, y_max)))
 
         #Third field:
-        text_span = my_matches[2].span()
-        new_x_min = x_max - (text_span[1] - text_span[0]) * X_VALUE_PER_CHARACTER
+        text_span = span_lengths[2]
+        new_x_min = x_max - text_span * X_VALUE_PER_CHARACTER
         res.append(field_container(field=split_fields[2].strip(), bbox=(new_x_min, y_min, x_max, y_max)))
 
         #Second field:
-        text_span = my_matches[1].span()
+        text_span = span_lengths[1]
         res.append(field_container(field=split_fields[1].strip(), bbox=(new_x_max+60, y_min, new_x_min-50, y_max)))
     elif len(split_fields) == 4:
         x_min, y_min, x_max, y_max = text_field.bbox
         
         #First field:
-        text_span = my_matches[0].span()
-        new_x_max = x_min + (text_span[1] - text_span[0]) * X_VALUE_PER_CHARACTER + 15
+        text_span = span_lengths[0]
+        new_x_max = x_min + text_span * X_VALUE_PER_CHARACTER + 15
         res.append(field_container(field=split_fields[0].strip(), bbox=(x_min, y_min, new_x_max, y_max)))
 
         #Fourth field:
-        text_span = my_matches[3].span()
-        new_x_min = x_max - (text_span[1] - text_span[0]) * X_VALUE_PER_CHARACTER
+        text_span = span_lengths[3]
+        new_x_min = x_max - text_span * X_VALUE_PER_CHARACTER
         res.append(field_container(field=split_fields[3].strip(), bbox=(new_x_min, y_min, x_max, y_max)))
 
         #Second field:
@@ -165,88 +186,328 @@ def split_text(text_field, field_container):
     return res
 
 
-def extract_prompts(layout, form_fields_dict, prompts_tuple, checkbox_prompt_tuple, field_container, presplit_fields):
+def extract_prompts(summary, form_fields_dict, prompts_tuple, checkbox_prompt_tuple, field_container, presplit_fields):
     """
+    Sorts the text boxes of a page summary into prompts, long prompts and checkbox prompts. Unless
+    the prompts of the form are already split, the lines holding several prompts are split first.
     """
-    for lt_obj in layout:
+    for text_field in summary.texts:
         # Handle built-in form fields
-        if isinstance(lt_obj, LTText):
-            if presplit_fields:
-                parse_text(text_field=lt_obj, prompts_dict=form_fields_dict, container=prompts_tuple, \
+        if presplit_fields:
+            parse_text(text_field=text_field, prompts_dict=form_fields_dict, container=prompts_tuple, \
+                        checkbox_container=checkbox_prompt_tuple)
+        else:
+            text_lst = split_text(text_field=text_field, field_container=field_container)
+            for text_item in text_lst:
+                parse_text(text_field=text_item, prompts_dict=form_fields_dict, container=prompts_tuple, \
                             checkbox_container=checkbox_prompt_tuple)
-            else:
-                text_lst = split_text(text_field=lt_obj, field_container=field_container)
-                for text_item in text_lst:
-                    parse_text(text_field=text_item, prompts_dict=form_fields_dict, container=prompts_tuple, \
-                                checkbox_container=checkbox_prompt_tuple)
 
 
-def parse_layout(layout: LTPage, prompts_to_inputs_mapping, presplit_fields) -> None:
+#Prompts of the pages already parsed, keyed by template, page id, split mode and content digest:
+_form_fields_cache = OrderedDict()
+#Template and split mode of the forms already parsed, keyed by the content digest of their first page:
+_form_template_cache = OrderedDict()
+
+
+def _get_cached(cache, key):
+    """
+    Returns a value of an LRU cache (None if missing) and marks it as recently used.
+    """
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _set_cached(cache, key, value):
+    """
+    Stores a value in an LRU cache, evicting the least recently used one past PROMPT_CACHE_SIZE.
+    """
+    cache[key] = value
+    if len(cache) > PROMPT_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def clear_form_caches():
+    """
+    Forgets the templates and prompts of the forms parsed so far, the next form of every revision
+    is parsed with the full layout again (as in a new worker process).
+    """
+    _form_fields_cache.clear()
+    _form_template_cache.clear()
+    match_prompt_fields.cache_clear()
+
+
+def get_form_fields(summary, presplit_fields, template=DEFAULT_TEMPLATE):
+    """
+    Returns the prompts, long prompts and checkbox prompts of a page. Every filled copy of a form
+    revision has the same static layer, so the prompts are extracted once per template and page
+    (identified by the page's content digest) and reused for the following guests.
+
+    Args:
+        summary (Page_summary): summary of the page, see summarize_page
+        presplit_fields (bool): Whether the prompts of the form are already split.
+        template (Form_template): Revision of the form.
+
+    Returns:
+        dict: lists of prompts_tuple/checkbox_prompt_tuple by prompt type
+    """
+    content_digest = summary.content_digest
+    form_fields_dict = get_cached_form_fields(summary.pageid, content_digest, presplit_fields, template)
+    if form_fields_dict is None:
+        form_fields_dict = {'prompts':[], 'long_prompts':[], 'checkbox_prompts':[]}
+        with span('extract_prompts', page=summary.pageid):
+            extract_prompts(summary, form_fields_dict, prompts_tuple, checkbox_prompt_tuple, split_field, presplit_fields)
+        if content_digest:
+            _set_cached(_form_fields_cache, (template.name, summary.pageid, presplit_fields, content_digest), form_fields_dict)
+            form_fields_dict = {prompt_type: list(prompts) for prompt_type, prompts in form_fields_dict.items()}
+    return form_fields_dict
+
+
+def get_cached_form_fields(pageid, content_digest, presplit_fields, template=DEFAULT_TEMPLATE):
+    """
+    Returns a copy of the prompts cached by get_form_fields, so they are never modified.
+
+    Returns:
+        dict | None: lists of prompts by prompt type, None if the page wasn't parsed yet
+    """
+    if not content_digest:
+        return None
+    form_fields_dict = _get_cached(_form_fields_cache, (template.name, pageid, presplit_fields, content_digest))
+    if form_fields_dict is None:
+        return None
+    return {prompt_type: list(prompts) for prompt_type, prompts in form_fields_dict.items()}
+
+
+def parse_layout(summary, prompts_to_inputs_mapping, presplit_fields, template=DEFAULT_TEMPLATE) -> None:
     """
     Parses the content of a PDF page layout and creates a mapping of the user's inputs to the 
     prompts of the form. It creates this mapping by matching the closest prompts and inputs in the form.
 
     Args:
-        layout (LTPage): The layout object representing the PDF page containing text, images, and containers.
+        summary (Page_summary): The page's text, images and containers, summarized by summarize_page.
         my_page (dict): The list to store the extracted data (text with bounding boxes and image data).
+        presplit_fields (bool): Whether the prompts of the form are already split.
+        template (Form_template): Revision of the form, holds the checkbox coordinates.
 
     Returns:
         None
     """
-    form_fields_dict = {'prompts':[], 'long_prompts':[], 'checkbox_prompts':[]}
     customer_input_dict = {'single_input':[], 'checkmarks':[]}
     
     #Look for customer input in vectorized image:
-    customer_input_found = check_for_vectorized_image(layout, customer_input_dict, entry_tuple, checkbox_tuple)
+    customer_input_found = check_for_vectorized_image(summary, customer_input_dict)
 
     if customer_input_found:
-        extract_prompts(layout, form_fields_dict, prompts_tuple, checkbox_prompt_tuple, field_container, presplit_fields)
-        create_field_entry_mapping(form_fields_dict, customer_input_dict, prompts_to_inputs_mapping, layout.pageid)
+        form_fields_dict = get_form_fields(summary, presplit_fields, template)
+        with span('create_field_entry_mapping', page=summary.pageid):
+            create_field_entry_mapping(form_fields_dict, customer_input_dict, prompts_to_inputs_mapping, summary.pageid, template)
     else:
-        pair_text(layout, prompts_to_inputs_mapping, y_delta = 10.0, x_delta = 25.0)
+        with span('pair_text', page=summary.pageid):
+            pair_text(summary, prompts_to_inputs_mapping, y_delta = 10.0, x_delta = 25.0)
 
     return None
 
 
-def parse_page(doc_pages, client_info) -> None:
+def get_required_keys(keys=CUSTOMER_DATA_KEYS, alternatives=CUSTOMER_DATA_ALTERNATIVES):
     """
-    Iterates through the pages of a document and parses each page's content.
+    Groups the keys read by the Word document into the cells they fill. Keys are compared in
+    lower case, the layout parser keeps the case of some prompts.
+
+    Args:
+        keys (list): customer data keys read by the Word document
+        alternatives (dict): keys filling the same cell as another key
+
+    Returns:
+        list: frozenset of interchangeable keys for every cell
+    """
+    groups = {}
+    for key in keys:
+        groups.setdefault(alternatives.get(key, key).lower(), set()).add(key.lower())
+    return [frozenset(group) for group in groups.values()]
+
+
+REQUIRED_KEYS = get_required_keys()
+
+
+def get_unresolved_keys(mapping, required_keys=REQUIRED_KEYS):
+    """
+    Returns the groups of required_keys without any answered key in the mapping. The keys the
+    parser initializes empty on the first page (see FIRST_PAGE_DEFAULTS) only count once answered.
+    """
+    resolved = {key.lower() for key, value in mapping.items()
+                if isinstance(key, str) and not (isinstance(value, str) and not value.strip())}
+    return [group for group in required_keys if resolved.isdisjoint(group)]
+
+
+def get_accumulated_values(mapping, keys=FIRST_PAGE_DEFAULTS):
+    """
+    Returns the values of the keys whose long prompts add their lines to them on every page, the
+    answer of a page extending them may continue on the next page. Keys not set yet count as empty.
+    """
+    return [mapping.get(key) or '' for key in keys]
+
+
+def is_early_exit(mapping, unresolved_keys, accumulated_values):
+    """
+    Tells whether the parsing can stop after the page just parsed: every key unresolved before the
+    page is now resolved and the page didn't extend any long answer (see get_accumulated_values).
+
+    Args:
+        mapping (dict): mapping between prompts and responses, after the page
+        unresolved_keys (list | None): groups unresolved before the page, None never stops
+        accumulated_values (list): values of the accumulating keys before the page
+
+    Returns:
+        bool: True if the remaining pages can be skipped
+    """
+    return (unresolved_keys is not None and not get_unresolved_keys(mapping, unresolved_keys)
+            and get_accumulated_values(mapping) == accumulated_values)
+
+
+def _log_early_exit(pdf_file_path, pageid, resolved_keys, page_numbers, num_pages):
+    if num_pages is None:
+        return
+    skipped_pages = [page_number + 1 for page_number in page_numbers if pageid < page_number + 1 <= num_pages]
+    if skipped_pages:
+        logger.info("%s: every required key resolved on page %d (last: %s), skipping the remaining requested pages %s",
+                    pdf_file_path, pageid, ', '.join(sorted(min(group) for group in resolved_keys)), skipped_pages)
+
+
+def parse_page(doc_pages, client_info, required_keys=None, pdf_file_path=None, num_pages=None) -> None:
+    """
+    Iterates through the pages of a document and parses each page's content. The form's revision
+    is fingerprinted on the first page and its template is used for every page. The pages are
+    consumed lazily, so once every required key is resolved the remaining pages aren't laid out
+    (see is_early_exit).
 
     Args:
         doc_pages (iterable): An iterable of pages extracted from a PDF document.
         client_info (dict): A mapping of the parsed data for each page.
+        required_keys (list | None): Groups of keys (see get_required_keys) that end the parsing
+        once all of them are resolved, None parses every page.
+        pdf_file_path (str | None): Path of the document, only used to log the early exit.
+        num_pages (int | None): Number of pages of the document, only used to log the early exit.
 
     Returns:
         None: The function modifies the provided `client_info` list, adding data for each parsed page.
     """
     for page in doc_pages:
-        if page.pageid == 1:
-            splitted_fields = check_for_split_fields(page)
-        parse_layout(layout=page, prompts_to_inputs_mapping=client_info, presplit_fields=splitted_fields)
+        #Every step below reads the page from its summary, the layout is only traversed once:
+        summary = summarize_page(page)
+        if summary.pageid == 1:
+            template = select_form_template(summary)
+            splitted_fields = template.presplit
+            if splitted_fields is None:
+                splitted_fields = check_for_split_fields(summary)
+            if summary.content_digest:
+                _set_cached(_form_template_cache, summary.content_digest, (template, splitted_fields))
+        unresolved_keys = get_unresolved_keys(client_info, required_keys) if required_keys else None
+        accumulated_values = get_accumulated_values(client_info)
+        parse_layout(summary=summary, prompts_to_inputs_mapping=client_info, presplit_fields=splitted_fields, 
+                     template=template)
+        if is_early_exit(client_info, unresolved_keys, accumulated_values):
+            _log_early_exit(pdf_file_path, summary.pageid, unresolved_keys, FORM_PAGE_NUMBERS, num_pages)
+            break
     return None
 
 
-def extract_customer_data(pdf_file_path: str, customer_data: dict) -> None:
+def parse_input_layers(input_layers, client_info, required_keys=None, pdf_file_path=None, num_pages=None) -> bool:
     """
-    Extracts customer-specific data from a PDF form, parsing multiple pages if needed.
+    Parses a form whose static layer (template, split mode and prompts of every page) was already
+    parsed on a previous guest's form, laying out only the "Xi" input figure of each page. Gives up
+    as soon as a page doesn't match, the form is then parsed with the full layout.
+
+    Args:
+        input_layers (iterable): Input_layer of every page, see extract_input_layers in pdf_backends
+        client_info (dict): A mapping of the parsed data, only updated if every page matched.
+        required_keys (list | None): Groups of keys ending the parsing once resolved, see parse_page.
+        pdf_file_path (str | None): Path of the document, only used to log the early exit.
+        num_pages (int | None): Number of pages of the document, only used to log the early exit.
+
+    Returns:
+        bool: True if the form was parsed, False if it needs the full layout
+    """
+    mapping = {}
+    for input_layer in input_layers:
+        if input_layer.pageid == 1:
+            known_template = _get_cached(_form_template_cache, input_layer.content_digest)
+            if known_template is None:
+                return False
+            template, splitted_fields = known_template
+
+        form_fields_dict = get_cached_form_fields(input_layer.pageid, input_layer.content_digest, splitted_fields, template)
+        if form_fields_dict is None:
+            return False
+
+        with span('layout_input', page=input_layer.pageid):
+            layout = input_layer.lay_out()
+        customer_input_dict = {'single_input':[], 'checkmarks':[]}
+        if layout is None or not check_for_vectorized_image(summarize_page(layout), customer_input_dict):
+            return False
+        unresolved_keys = get_unresolved_keys(mapping, required_keys) if required_keys else None
+        accumulated_values = get_accumulated_values(mapping)
+        with span('create_field_entry_mapping', page=layout.pageid):
+            create_field_entry_mapping(form_fields_dict, customer_input_dict, mapping, layout.pageid, template)
+        if is_early_exit(mapping, unresolved_keys, accumulated_values):
+            _log_early_exit(pdf_file_path, input_layer.pageid, unresolved_keys, FORM_PAGE_NUMBERS, num_pages)
+            break
+
+    if not mapping:
+        return False
+    client_info.update(mapping)
+    return True
+
+
+def extract_customer_data(pdf_file_path: str, customer_data: dict, backend: str = PDF_BACKEND, 
+                          use_cache: bool = CACHE_ENABLED) -> None:
+    """
+    Extracts customer-specific data from a PDF form, parsing multiple pages if needed. Forms
+    that were already extracted with the same contents and constants are read from the cache.
 
     Args:
         pdf_file_path (str): The path to the PDF file containing the customer's form.
         customer_data (dict): Dictionary that will contain the mapping between prompts 
         and responses
+        backend (str): Name of the library used to lay out the pages ('pdfminer' or 'pymupdf')
+        use_cache (bool): Whether to read and store the mapping in the on-disk cache
 
     Returns:
         None
     """
-    #Parameters used to extract fields from the PDF guest form:
-    laparams = LAParams(line_overlap=0.5, char_margin=2, line_margin=0.5, 
-                        word_margin=0.1, boxes_flow=0.25, detect_vertical=False, all_texts=True)
-    
-    #Extract pages from client's forms
-    pages = extract_pages(pdf_file_path, maxpages=4, page_numbers=[0, 1, 2, 3], laparams=laparams)
-    
-    #Parse form pages:
-    parse_page(pages, customer_data)
+    #Skip the parsing if the form was already extracted:
+    if use_cache:
+        cache_key = get_cache_key(pdf_file_path, backend)
+        cached_data = load_cached_data(cache_key)
+        if cached_data is not None:
+            customer_data.update(cached_data)
+            return
+
+    pdf_backend = get_pdf_backend(backend)
+
+    #Fillable forms are read from their field values:
+    parsed = ACROFORM_FAST_PATH and extract_acroform_data(pdf_file_path, customer_data)
+
+    #Pages after the one resolving every key read by the Word document aren't laid out:
+    required_keys = REQUIRED_KEYS if EARLY_EXIT_ENABLED else None
+    #The skipped pages are only logged, the document isn't opened again to count them otherwise:
+    num_pages = None
+    if required_keys is not None and not parsed and logger.isEnabledFor(logging.INFO):
+        num_pages = pdf_backend.get_page_count(pdf_file_path)
+
+    #Forms sharing the static layer of a form already parsed only need their input figures:
+    if INPUT_LAYER_FAST_PATH and not parsed:
+        with closing(pdf_backend.extract_input_layers(pdf_file_path, page_numbers=FORM_PAGE_NUMBERS)) as input_layers:
+            parsed = parse_input_layers(input_layers, customer_data, required_keys, pdf_file_path, num_pages)
+
+    if not parsed:
+        #Extract pages from client's forms, laid out one at a time as they are parsed
+        with closing(pdf_backend.extract_pages(pdf_file_path, page_numbers=FORM_PAGE_NUMBERS)) as pages:
+            #Parse form pages:
+            parse_page(pages, customer_data, required_keys, pdf_file_path, num_pages)
+
+    if use_cache:
+        store_cached_data(cache_key, customer_data)
     
     return
 
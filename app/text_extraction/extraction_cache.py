@@ -0,0 +1,252 @@
+from . import constants
+from .constants import CACHE_DIR, CACHE_MAX_BYTES, CACHE_KEY_CONSTANTS
+import hashlib
+import importlib
+import json
+import logging
+import marshal
+import os
+import tempfile
+from functools import lru_cache
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUFFIX = '.json'
+#Modules whose code decides what is read from a guest form, editing them invalidates the cached forms:
+EXTRACTION_MODULES = ['acroform', 'checkmark_utils', 'containers', 'data_extraction', 'form_templates',
+                      'layout_primitives', 'page_summary', 'pdf_backends', 'prompt_response_mapping',
+                      'spatial_index', 'utils']
+
+
+def _stable(value):
+    """
+    Converts a constant into a structure with a deterministic repr (sets and dicts are sorted),
+    so the digest doesn't change between runs because of hash randomization.
+    """
+    if isinstance(value, dict):
+        return sorted((repr(_stable(key)), _stable(item)) for key, item in value.items())
+    if isinstance(value, (set, frozenset)):
+        return sorted(repr(_stable(item)) for item in value)
+    if isinstance(value, (list, tuple)):
+        return [_stable(item) for item in value]
+    return repr(value)
+
+
+def get_module_code(module_name):
+    """
+    Returns the code of an extraction module as its loader provides it: the source, or the
+    compiled code where the sources aren't shipped (e.g. the PyInstaller executable).
+
+    Args:
+        module_name (str): name of the module in this package, see EXTRACTION_MODULES
+
+    Returns:
+        bytes | None: source or marshalled code of the module, None if the loader has neither
+    """
+    module = importlib.import_module(f"{__package__}.{module_name}")
+    loader = getattr(module, '__loader__', None)
+    for get_code, encode in (('get_source', str.encode), ('get_code', marshal.dumps)):
+        try:
+            code = getattr(loader, get_code)(module.__name__)
+        except (AttributeError, ImportError, OSError):
+            continue
+        if code is not None:
+            return encode(code)
+    return None
+
+
+@lru_cache(maxsize=1)
+def get_constants_digest():
+    """
+    Hashes the constants that change the extracted customer data (see CACHE_KEY_CONSTANTS: form
+    coordinates, keywords, LAPARAMS, EXTRACTION_VERSION...) and the code of the modules that parse
+    the forms. Changing any of them changes the digest, which invalidates the cached forms. A
+    module whose code can't be read is only covered by EXTRACTION_VERSION.
+
+    Returns:
+        str: hex digest of the constants and the extraction code
+    """
+    values = [(name, _stable(getattr(constants, name))) for name in sorted(CACHE_KEY_CONSTANTS)]
+    digest = hashlib.sha256(repr(values).encode())
+    for module_name in EXTRACTION_MODULES:
+        code = get_module_code(module_name)
+        if code is None:
+            logger.debug("No code to hash for %s, relying on EXTRACTION_VERSION", module_name)
+            code = b''
+        digest.update(f"|{module_name}|".encode())
+        digest.update(code)
+    return digest.hexdigest()
+
+
+def _hash_file(pdf_file_path):
+    """
+    Returns a sha256 object fed with the contents of the file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(pdf_file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest
+
+
+def get_file_digest(pdf_file_path):
+    """
+    Hashes the contents of a guest form.
+
+    Args:
+        pdf_file_path (str | Path): path to the guest's PDF form
+
+    Returns:
+        str: hex digest of the file
+    """
+    return _hash_file(pdf_file_path).hexdigest()
+
+
+def get_cache_key(pdf_file_path, backend):
+    """
+    Builds the cache key of a guest form from its contents, the backend used to lay it out and
+    the constants digest. Renaming or moving the file keeps the key, editing it doesn't.
+
+    Args:
+        pdf_file_path (str | Path): path to the guest's PDF form
+        backend (str): name of the PDF backend
+
+    Returns:
+        str: hex digest identifying the extraction
+    """
+    key = _hash_file(pdf_file_path)
+    key.update(f"|{backend}|{get_constants_digest()}".encode())
+    return key.hexdigest()
+
+
+def is_cacheable(customer_data):
+    """
+    Checks that every text prompt of the mapping has a text response. The unpaired fields of the
+    older forms map to layout objects, which don't survive a JSON round trip.
+    """
+    return all(isinstance(response, str) for prompt, response in customer_data.items() if isinstance(prompt, str))
+
+
+def _cache_path(cache_key, cache_dir):
+    return os.path.join(cache_dir, cache_key + CACHE_SUFFIX)
+
+
+def load_cached_data(cache_key, cache_dir=CACHE_DIR):
+    """
+    Loads the prompt/response mapping of a previously extracted guest form. A hit refreshes the
+    entry's modification time, which is what the LRU eviction orders by.
+
+    Args:
+        cache_key (str): key returned by get_cache_key
+        cache_dir (str): folder containing the cache entries
+
+    Returns:
+        dict | None: the cached mapping, None if the form isn't cached
+    """
+    path = _cache_path(cache_key, cache_dir)
+    try:
+        with open(path, encoding='utf-8') as f:
+            customer_data = dict(json.load(f))
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError) as e:
+        #Unreadable entries are dropped and the form is parsed again:
+        logger.debug("Discarding cache entry %s: %s", path, e)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    return customer_data
+
+
+def store_cached_data(cache_key, customer_data, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """
+    Stores the prompt/response mapping of a guest form. The entry is written to a temporary file
+    and renamed so concurrent workers never read a partial entry. Forms whose mapping contains
+    layout objects as responses (unpaired fields of the older forms) aren't stored, only text
+    survives the round trip.
+
+    Args:
+        cache_key (str): key returned by get_cache_key
+        customer_data (dict): mapping between prompts and responses
+        cache_dir (str): folder containing the cache entries
+        max_bytes (int): size limit of the cache folder
+
+    Returns:
+        bool: True if the entry was stored
+    """
+    if not is_cacheable(customer_data):
+        return False
+    #Non text prompts can't be looked up by the document generator, so only text responses matter:
+    items = [(prompt, response) for prompt, response in customer_data.items() if isinstance(prompt, str)]
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(items, f)
+            os.replace(temp_path, _cache_path(cache_key, cache_dir))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        evict_cache(cache_dir, max_bytes)
+    except OSError as e:
+        logger.debug("Couldn't store cache entry %s: %s", cache_key, e)
+        return False
+    return True
+
+
+def evict_cache(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """
+    Removes the least recently used entries until the cache folder fits within max_bytes.
+
+    Args:
+        cache_dir (str): folder containing the cache entries
+        max_bytes (int): size limit of the cache folder
+
+    Returns:
+        int: number of entries removed
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    total_bytes = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.name.endswith(CACHE_SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_bytes -= size
+        removed += 1
+    return removed
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """
+    Removes every cached guest form.
+
+    Args:
+        cache_dir (str): folder containing the cache entries
+
+    Returns:
+        int: number of entries removed
+    """
+    return evict_cache(cache_dir, max_bytes=-1)
@@ -0,0 +1,108 @@
+from .constants import FORM_TEMPLATES, PUNC_REGEX, CHECKBOX_THRESHOLD
+from .containers import form_template, checkbox_index
+from .spatial_index import IntervalIndex
+
+
+def compile_checkbox_index(template, threshold=CHECKBOX_THRESHOLD):
+    """
+    Compiles the checkbox coordinates of a template definition into interval indexes, so the
+    option under a checkmark is found by bisection.
+
+    Args:
+        template (dict): template definition, see FORM_TEMPLATES
+        threshold (float): maximum distance between a checkmark and the coordinate of its option
+
+    Returns:
+        Checkbox_index: index of the gender (one per gender map), diet, room and bed options
+    """
+    return checkbox_index(gender=tuple((min_x, IntervalIndex(gender_map, threshold))
+                                       for min_x, gender_map in template['gender_maps']),
+                          diet=IntervalIndex(template['diet_map'], threshold),
+                          room=IntervalIndex(template['room_map'], threshold),
+                          bed=IntervalIndex(template['bed_map'], threshold))
+
+
+def build_registry(templates=FORM_TEMPLATES):
+    """
+    Converts the template definitions in constants.py into Form_template tuples, with their
+    checkbox coordinates compiled once.
+
+    Args:
+        templates (list): template definitions, see FORM_TEMPLATES
+
+    Returns:
+        list: Form_template for every revision, in matching order
+    """
+    return [form_template(**{**template, 'markers': tuple(template['markers']),
+                             'checkbox_index': compile_checkbox_index(template)}) for template in templates]
+
+
+FORM_TEMPLATE_REGISTRY = build_registry()
+
+
+def normalize_text(text):
+    """
+    Lower cases the text, removes its punctuation and collapses the whitespace, so markers don't
+    depend on how the backend spaced or split the prompts.
+    """
+    return ' '.join(PUNC_REGEX.sub('', text).lower().split())
+
+
+def get_static_text(summary):
+    """
+    Joins the static text (prompts) of a page. The guest's answers live inside the Xi figure, so
+    only the top level text boxes are used.
+
+    Args:
+        summary (Page_summary): page of the guest form, see summarize_page
+
+    Returns:
+        str: normalized static text, one text box per line
+    """
+    return '\n'.join(normalize_text(item.text) for item in summary.texts)
+
+
+def select_form_template(summary, registry=FORM_TEMPLATE_REGISTRY):
+    """
+    Fingerprints the first page of a guest form and returns the template of its revision.
+
+    Args:
+        summary (Page_summary): first page of the guest form, see summarize_page
+        registry (list): Form_template candidates, the last one is the fallback
+
+    Returns:
+        Form_template: first template whose markers all appear on the page and whose input_figure
+        (None for either) says whether the page draws an "Xi" figure
+    """
+    static_text = None
+    for template in registry:
+        if template.input_figure is not None and template.input_figure != summary.has_input:
+            continue
+        if not template.markers:
+            return template
+        if static_text is None:
+            static_text = get_static_text(summary)
+        if all(marker in static_text for marker in template.markers):
+            return template
+    return registry[-1]
+
+
+def get_gender_index(template, x_min):
+    """
+    Returns the index of the gender checkmark coordinates for a Gender prompt starting at x_min.
+
+    Args:
+        template (Form_template): revision of the guest form
+        x_min (float): left edge of the Gender prompt
+
+    Returns:
+        IntervalIndex | None: index of the x coordinate of every gender option, None if no map applies
+    """
+    for min_x, gender_index in template.checkbox_index.gender:
+        if x_min >= min_x:
+            return gender_index
+    return None
+
+
+#Template used when the revision isn't known (e.g. parsing a single page):
+DEFAULT_TEMPLATE = FORM_TEMPLATE_REGISTRY[-1]
@@ -1,5 +1,4 @@
 import re
-from docx.enum.text import WD_COLOR_INDEX
 
 
 def convert_height(height):
@@ -68,6 +67,9 @@ def format_title_cells(title, data, title_cell):
         data (Cell): The table cell containing data.
         title_cell (Cell): The table cell containing the title.
     """
+    #Imported here so the row values can be computed without loading python-docx:
+    from docx.enum.text import WD_COLOR_INDEX
+
     data_text = data.text.strip()
     
     if not data_text or data_text == "M":
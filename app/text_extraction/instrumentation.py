@@ -0,0 +1,236 @@
+from .constants import INSTRUMENTATION_ENABLED, INSTRUMENTATION_REPORT, PROFILE_DIR
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from time import perf_counter
+
+
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = 'extraction_timings.json'
+#Characters replaced in the profile file names:
+PROFILE_LABEL_REGEX = re.compile(r'[^\w.-]+')
+
+#Runtime settings, changed with enable():
+_settings = {'enabled': INSTRUMENTATION_ENABLED, 'report': INSTRUMENTATION_REPORT, 'profile_dir': PROFILE_DIR}
+#File being extracted by this process, spans are attributed to it:
+_current_file = [None]
+#(stage, file, page) -> [calls, total seconds, max seconds]:
+_records = {}
+
+_NULL_SPAN = nullcontext()
+
+
+def enable(enabled=True, report=INSTRUMENTATION_REPORT, profile_dir=PROFILE_DIR):
+    """
+    Turns the instrumentation on or off at runtime (the defaults come from constants.py).
+
+    Args:
+        enabled (bool): whether spans are recorded
+        report (str): 'table' logs the summary, 'json' writes it next to the document
+        profile_dir (str | None): folder where the cProfile dumps are written, None disables profiling
+    """
+    _settings.update(enabled=enabled, report=report, profile_dir=profile_dir)
+
+
+def get_settings():
+    """
+    Returns the runtime settings, passed to the worker processes so they record the same spans.
+    """
+    return dict(_settings)
+
+
+def is_enabled():
+    """
+    Returns whether spans are recorded.
+    """
+    return _settings['enabled']
+
+
+class _Span:
+    """
+    Times a stage and accumulates the duration in _records.
+    """
+    __slots__ = ('key', 'start')
+
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = perf_counter() - self.start
+        record = _records.get(self.key)
+        if record is None:
+            _records[self.key] = [1, elapsed, elapsed]
+        else:
+            record[0] += 1
+            record[1] += elapsed
+            record[2] = max(record[2], elapsed)
+        return False
+
+
+def span(stage, page=None, file=None):
+    """
+    Times the enclosed block as a stage of the current file. When the instrumentation is disabled
+    a shared no-op context manager is returned, so spans cost a function call.
+
+    Args:
+        stage (str): name of the stage, e.g. 'layout'
+        page (int | None): page id the stage works on
+        file (str | None): file the stage works on, defaults to the file being extracted
+
+    Returns:
+        context manager
+    """
+    if not _settings['enabled']:
+        return _NULL_SPAN
+    return _Span((stage, file if file is not None else _current_file[0], page))
+
+
+def timed(stage):
+    """
+    Decorator timing every call of the function as a stage of the current file.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _settings['enabled']:
+                return func(*args, **kwargs)
+            with _Span((stage, _current_file[0], None)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def current_file(file_path):
+    """
+    Attributes the spans of the enclosed block to file_path.
+    """
+    previous_file = _current_file[0]
+    _current_file[0] = os.path.basename(str(file_path))
+    try:
+        yield
+    finally:
+        _current_file[0] = previous_file
+
+
+@contextmanager
+def profiled(label):
+    """
+    Runs the enclosed block under cProfile when a profile folder is set, the stats are dumped to
+    <profile_dir>/<label>.<pid>.prof (open with pstats or snakeviz) together with a text summary
+    of the 30 most expensive functions.
+
+    Args:
+        label (str): name of the profiled block, used in the file names
+    """
+    profile_dir = _settings['profile_dir']
+    if not profile_dir:
+        yield
+        return
+
+    #Only loaded when profiling:
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(profile_dir, exist_ok=True)
+        path = os.path.join(profile_dir, f"{PROFILE_LABEL_REGEX.sub('_', label)}.{os.getpid()}")
+        profiler.dump_stats(path + '.prof')
+        with open(path + '.txt', 'w', encoding='utf-8') as f:
+            pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(30)
+
+
+def drain():
+    """
+    Returns the recorded spans as plain tuples (so they can be pickled back from the workers) and
+    clears them.
+    """
+    records = [(*key, *record) for key, record in _records.items()]
+    _records.clear()
+    return records
+
+
+def merge(records):
+    """
+    Adds spans drained in another process to this process' records.
+    """
+    for stage, file, page, calls, total, longest in records:
+        record = _records.setdefault((stage, file, page), [0, 0.0, 0.0])
+        record[0] += calls
+        record[1] += total
+        record[2] = max(record[2], longest)
+
+
+def get_report(records):
+    """
+    Summarizes the drained spans.
+
+    Args:
+        records (list): spans returned by drain
+
+    Returns:
+        dict: 'stages' (calls, total, mean and max seconds of every stage), 'files' (seconds per
+        stage of every file) and 'pages' (seconds per stage of every page)
+    """
+    stages, files, pages = {}, {}, []
+    for stage, file, page, calls, total, longest in records:
+        summary = stages.setdefault(stage, {'calls': 0, 'total': 0.0, 'max': 0.0})
+        summary['calls'] += calls
+        summary['total'] += total
+        summary['max'] = max(summary['max'], longest)
+        if file is not None:
+            file_stages = files.setdefault(file, {})
+            file_stages[stage] = file_stages.get(stage, 0.0) + total
+        if page is not None:
+            pages.append({'file': file, 'page': page, 'stage': stage, 'calls': calls, 'total': total})
+    for summary in stages.values():
+        summary['mean'] = summary['total'] / summary['calls']
+    return {'stages': stages, 'files': files, 'pages': pages}
+
+
+def format_report(report):
+    """
+    Formats the stage summary of a report as a text table, slowest stage first.
+    """
+    lines = [f"{'stage':<28}{'calls':>8}{'total (s)':>12}{'mean (ms)':>12}{'max (ms)':>12}"]
+    for stage, summary in sorted(report['stages'].items(), key=lambda item: -item[1]['total']):
+        lines.append(f"{stage:<28}{summary['calls']:>8}{summary['total']:>12.3f}"
+                     f"{summary['mean'] * 1000:>12.2f}{summary['max'] * 1000:>12.2f}")
+    return '\n'.join(lines)
+
+
+def emit_report(output_dir):
+    """
+    Emits the report of the spans recorded since the last report: logged as a table or written as
+    JSON to output_dir, see enable. Does nothing when the instrumentation is disabled.
+
+    Args:
+        output_dir (str | Path): folder where the JSON report is written
+
+    Returns:
+        dict | None: the report, None if the instrumentation is disabled
+    """
+    if not _settings['enabled']:
+        return None
+    report = get_report(drain())
+    if _settings['report'] == 'json':
+        report_path = os.path.join(output_dir, REPORT_NAME)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logger.info("Wrote the timing report %s", report_path)
+    else:
+        logger.info("Extraction timings:\n%s", format_report(report))
+    return report
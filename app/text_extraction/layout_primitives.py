@@ -0,0 +1,88 @@
+class LayoutText:
+    """
+    Text box produced by a PDF backend. Mirrors the parts of pdfminer's LTTextBox used by the
+    parser: the bounding box as (x_min, y_min, x_max, y_max), its width and get_text().
+    """
+    __slots__ = ('text', 'bbox')
+
+    def __init__(self, text, bbox):
+        self.text = text
+        self.bbox = bbox
+
+    @property
+    def width(self):
+        return self.bbox[2] - self.bbox[0]
+
+    def get_text(self):
+        return self.text
+
+    def __repr__(self):
+        return f"<LayoutText {self.bbox} {self.text!r}>"
+
+
+class LayoutFigure:
+    """
+    Figure (form XObject or image) produced by a PDF backend. Mirrors pdfminer's LTFigure: it has
+    a name, a bounding box and can be iterated to get the text boxes and figures drawn inside it.
+    """
+    __slots__ = ('name', 'bbox', 'objs')
+
+    def __init__(self, name, bbox, objs=None):
+        self.name = name
+        self.bbox = bbox
+        self.objs = objs if objs is not None else []
+
+    @property
+    def width(self):
+        return self.bbox[2] - self.bbox[0]
+
+    def __iter__(self):
+        return iter(self.objs)
+
+    def __len__(self):
+        return len(self.objs)
+
+    def __repr__(self):
+        return f"<LayoutFigure({self.name}) {self.bbox}>"
+
+
+class LayoutPage:
+    """
+    Page produced by a PDF backend. Mirrors pdfminer's LTPage: it has a page id (starting at 1),
+    a bounding box and can be iterated to get the top level text boxes and figures. The content
+    digest fingerprints the page's static layer (see pdf_backends.get_content_digest).
+    """
+    __slots__ = ('pageid', 'bbox', 'objs', 'content_digest')
+
+    def __init__(self, pageid, bbox, objs=None, content_digest=None):
+        self.pageid = pageid
+        self.bbox = bbox
+        self.objs = objs if objs is not None else []
+        self.content_digest = content_digest
+
+    def __iter__(self):
+        return iter(self.objs)
+
+    def __len__(self):
+        return len(self.objs)
+
+    def __repr__(self):
+        return f"<LayoutPage({self.pageid}) {self.bbox}>"
+
+
+class LayoutShape:
+    """
+    Vector shape (line, rectangle or curve) produced by a PDF backend. Mirrors pdfminer's LTCurve,
+    only its bounding box is used by the parser.
+    """
+    __slots__ = ('bbox',)
+
+    def __init__(self, bbox):
+        self.bbox = bbox
+
+    @property
+    def width(self):
+        return self.bbox[2] - self.bbox[0]
+
+    def __repr__(self):
+        return f"<LayoutShape {self.bbox}>"
@@ -0,0 +1,219 @@
+from .constants import PDF_BACKEND, MAX_WORKERS, MANIFEST_NAME, CACHE_ENABLED
+from .containers import extraction_result, file_state
+from .extraction_cache import get_constants_digest, get_file_digest, is_cacheable
+from .parallel_extraction import extract_guest_files
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_manifest_path(output_dir, manifest_name=MANIFEST_NAME):
+    """
+    Returns the path of the manifest stored next to a folder's output.
+    """
+    return os.path.join(output_dir, manifest_name)
+
+
+def get_manifest_version(backend=PDF_BACKEND):
+    """
+    Identifies the extraction that produced a manifest, records made with another backend or other
+    constants (see get_constants_digest) are discarded.
+    """
+    return f"{backend}|{get_constants_digest()}"
+
+
+def load_manifest(manifest_path, backend=PDF_BACKEND):
+    """
+    Loads the records of the guest forms extracted by the previous run.
+
+    Args:
+        manifest_path (str): path returned by get_manifest_path
+        backend (str): name of the PDF backend used to extract the forms
+
+    Returns:
+        dict: record (size, mtime_ns, digest and customer_data) of every file name, empty if the
+        manifest is missing, unreadable or outdated
+    """
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.debug("Discarding manifest %s: %s", manifest_path, e)
+        return {}
+    if not isinstance(manifest, dict) or manifest.get('version') != get_manifest_version(backend):
+        return {}
+    return manifest.get('files', {})
+
+
+def save_manifest(manifest_path, records, backend=PDF_BACKEND):
+    """
+    Saves the records of the extracted guest forms. Written to a temporary file and renamed so an
+    interrupted run never leaves a partial manifest.
+
+    Args:
+        manifest_path (str): path returned by get_manifest_path
+        records (dict): record of every file name, see load_manifest
+        backend (str): name of the PDF backend used to extract the forms
+
+    Returns:
+        bool: True if the manifest was saved
+    """
+    manifest_dir = os.path.dirname(manifest_path) or '.'
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=manifest_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': get_manifest_version(backend), 'files': records}, f)
+            os.replace(temp_path, manifest_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    except OSError as e:
+        #The manifest only speeds up the next run, the document is still generated:
+        logger.warning("Couldn't save the manifest %s: %s", manifest_path, e)
+        return False
+    return True
+
+
+def _is_unchanged(record, stat):
+    return record.get('size') == stat.st_size and record.get('mtime_ns') == stat.st_mtime_ns
+
+
+def get_file_state(pdf_file_path):
+    """
+    Stats and hashes a guest form in one step. The file is stat'ed again once hashed, so a file
+    written while it was read never gets the digest of other contents than its size and time.
+
+    Args:
+        pdf_file_path (str | Path): path to the guest's PDF form
+
+    Returns:
+        File_state | None: size, modification time and digest of the file, None if it changed
+        while it was hashed
+
+    Raises:
+        OSError: the file can't be read
+    """
+    stat = os.stat(pdf_file_path)
+    state = file_state(stat.st_size, stat.st_mtime_ns, get_file_digest(pdf_file_path))
+    return state if _is_unchanged(state._asdict(), os.stat(pdf_file_path)) else None
+
+
+def split_unchanged_files(pdf_file_paths, previous_records):
+    """
+    Separates the guest forms that didn't change since the previous run from the ones to extract.
+    A form is unchanged if its size and modification time match its record, or if its contents
+    hash to the same digest (e.g. touched or downloaded again). The forms to extract are stat'ed
+    and hashed before they are extracted, see get_file_state.
+
+    Args:
+        pdf_file_paths (list): paths to the guests' PDF forms
+        previous_records (dict): records returned by load_manifest
+
+    Returns:
+        tuple: (Extraction_result of every file, None for the files to extract; records of the
+        unchanged files; (index, File_state or None) of every file to extract)
+    """
+    records = {}
+    results = [None] * len(pdf_file_paths)
+    pending = []
+
+    for i, pdf_file_path in enumerate(pdf_file_paths):
+        file_name = Path(pdf_file_path).name
+        record = previous_records.get(file_name)
+        state = None
+        try:
+            if record is None or not _is_unchanged(record, os.stat(pdf_file_path)):
+                state = get_file_state(pdf_file_path)
+                #Touched files whose contents didn't change are still reused:
+                if record is not None and state is not None and record.get('digest') == state.digest:
+                    record = {**record, 'size': state.size, 'mtime_ns': state.mtime_ns}
+                else:
+                    record = None
+        except OSError:
+            #Let the extraction report the unreadable file:
+            state, record = None, None
+
+        if record is None:
+            pending.append((i, state))
+        else:
+            records[file_name] = record
+            results[i] = extraction_result(pdf_file_path, dict(record['customer_data']), None)
+
+    return results, records, pending
+
+
+def add_extracted_records(records, pdf_file_paths, pending, extracted):
+    """
+    Adds the records of the freshly extracted guest forms, with the state read before they were
+    extracted. Failed forms, forms holding layout objects and forms changed since they were hashed
+    (e.g. still being copied) are left out so they are extracted again next time.
+
+    Args:
+        records (dict): records of the unchanged files, updated in place
+        pdf_file_paths (list): paths to the guests' PDF forms
+        pending (list): files to extract, as returned by split_unchanged_files
+        extracted (list): Extraction_result of every pending file, in the same order
+    """
+    for (i, state), result in zip(pending, extracted):
+        if state is None or result.error or not is_cacheable(result.customer_data):
+            continue
+        try:
+            if not _is_unchanged(state._asdict(), os.stat(pdf_file_paths[i])):
+                continue
+        except OSError:
+            continue
+        records[Path(pdf_file_paths[i]).name] = {
+            'size': state.size, 'mtime_ns': state.mtime_ns, 'digest': state.digest,
+            'customer_data': {prompt: response for prompt, response in result.customer_data.items()
+                              if isinstance(prompt, str)}
+        }
+
+
+def extract_guest_files_incremental(pdf_file_paths, manifest_path, max_workers=MAX_WORKERS, backend=PDF_BACKEND,
+                                    progress_callback=None, cancel_event=None, use_cache=CACHE_ENABLED):
+    """
+    Extracts the guest forms of a folder, reusing the manifest records of the forms that didn't
+    change since the previous run (see split_unchanged_files). Only the added or changed forms are
+    extracted, the records of removed forms are dropped.
+
+    Args:
+        pdf_file_paths (list): paths to the guests' PDF forms
+        manifest_path (str): path returned by get_manifest_path
+        max_workers (int | None): upper limit of processes, None uses every available core
+        backend (str): name of the PDF backend used to lay out the pages, recorded in the manifest
+        progress_callback (callable | None): called with the Extraction_result of every file, the
+        reused forms are reported first
+        cancel_event (threading.Event | None): cancels the extraction once set, see extract_guest_files
+        use_cache (bool): whether the changed forms are read and stored in the on-disk cache
+
+    Returns:
+        list: Extraction_result for every file, in the order of pdf_file_paths
+    """
+    previous_records = load_manifest(manifest_path, backend)
+    results, records, pending = split_unchanged_files(pdf_file_paths, previous_records)
+
+    if progress_callback is not None:
+        for result in results:
+            if result is not None:
+                progress_callback(result)
+
+    if pending:
+        logger.info("Extracting %d of %d guest forms", len(pending), len(pdf_file_paths))
+        extracted = extract_guest_files([pdf_file_paths[i] for i, _ in pending], max_workers=max_workers,
+                                        progress_callback=progress_callback, cancel_event=cancel_event,
+                                        use_cache=use_cache, backend=backend)
+        for (i, _), result in zip(pending, extracted):
+            results[i] = result
+        add_extracted_records(records, pdf_file_paths, pending, extracted)
+
+    if records != previous_records:
+        save_manifest(manifest_path, records, backend)
+    return results
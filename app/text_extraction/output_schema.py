@@ -0,0 +1,164 @@
+from .constants import OUTPUT_SCHEMA
+from .containers import output_column
+from .formatting_utils import convert_height, convert_weight
+from string import Formatter
+
+
+#Converters the rows of the schema can apply to their value, by name:
+CONVERTERS = {'height': convert_height, 'weight': convert_weight}
+
+
+def build_schema(schema=OUTPUT_SCHEMA, converters=CONVERTERS):
+    """
+    Converts the row definitions in constants.py into Output_column tuples, with their converter
+    looked up by name.
+
+    Args:
+        schema (list): row definitions, see OUTPUT_SCHEMA
+        converters (dict): functions the rows can apply to their value, by name
+
+    Returns:
+        list: Output_column of every row, in order
+
+    Raises:
+        ValueError: a row has no keys, names an unknown converter, or its combiner doesn't take
+        one value per key
+    """
+    columns = []
+    for row in schema:
+        keys = tuple(row['keys'])
+        combiner, converter = row['combiner'], row['converter']
+        if not keys:
+            raise ValueError(f"Row {row['title']!r} of the output schema has no keys")
+        if combiner is None and len(keys) > 1:
+            raise ValueError(f"Row {row['title']!r} of the output schema needs a combiner for its {len(keys)} keys")
+        if combiner is not None:
+            try:
+                combiner.format(*keys)
+            except (IndexError, KeyError):
+                raise ValueError(f"Combiner {combiner!r} of row {row['title']!r} doesn't take {len(keys)} values") from None
+        if converter is not None and converter not in converters:
+            raise ValueError(f"Unknown converter {converter!r} in row {row['title']!r}, expected one of {sorted(converters)}")
+        columns.append(output_column(row['title'], keys, combiner, row['default'],
+                                     converters[converter] if converter is not None else None))
+    return columns
+
+
+def _escape_literal(text):
+    """
+    Escapes literal text to be written inside a generated f-string.
+    """
+    for char, escaped in (('\\', '\\\\'), ('"', '\\"'), ('\n', '\\n'), ('\r', '\\r'), ('\t', '\\t'),
+                          ('{', '{{'), ('}', '}}')):
+        text = text.replace(char, escaped)
+    return text
+
+
+def compile_row_renderer(columns):
+    """
+    Compiles the columns of the schema into a single function returning the values of every row of
+    a guest, like namedtuple compiles its class: the source of one list display (a lookup per key,
+    an f-string per combiner and a call per converter) is generated once and executed, so rendering
+    a guest is one pass over the customer data without interpreting the schema.
+
+    Args:
+        columns (list): Output_column of every row, as returned by build_schema
+
+    Returns:
+        callable: render_row(guest_data) -> list of the values of every row, in order
+    """
+    namespace = {}
+    expressions = []
+    for i, column in enumerate(columns):
+        #The keys and defaults are bound by name, so the generated source never quotes them:
+        values = []
+        for j, key in enumerate(column.keys):
+            namespace[f'key_{i}_{j}'], namespace[f'default_{i}_{j}'] = key, column.default
+            values.append(f"get(key_{i}_{j}, default_{i}_{j})")
+        if column.combiner is None:
+            expression = values[0]
+        else:
+            parts, auto_field = [], 0
+            for literal, field, format_spec, conversion in Formatter().parse(column.combiner):
+                parts.append(_escape_literal(literal))
+                if field is None:
+                    continue
+                if field:
+                    value = values[int(field)]
+                else:
+                    value, auto_field = values[auto_field], auto_field + 1
+                parts.append('{' + value + (f'!{conversion}' if conversion else '') +
+                             (f':{format_spec}' if format_spec else '') + '}')
+            expression = 'f"' + ''.join(parts) + '"'
+        if column.converter is not None:
+            namespace[f'convert_{i}'] = column.converter
+            expression = f"convert_{i}({expression})"
+        expressions.append(f"        {expression},\n")
+    source = "def render_row(guest_data):\n    get = guest_data.get\n    return [\n" + ''.join(expressions) + "    ]\n"
+    exec(compile(source, f'<output schema: {len(columns)} rows>', 'exec'), namespace)
+    render_row = namespace['render_row']
+    render_row.__doc__ = "Returns the value of every row of a guest's column, in the order of the output schema."
+    return render_row
+
+
+OUTPUT_COLUMNS = build_schema()
+render_row = compile_row_renderer(OUTPUT_COLUMNS)
+
+
+def get_row_values(guest_data):
+    """
+    Computes the text of every row of a guest's column, in the order of TITLES.
+
+    Args:
+        guest_data (dict): mapping between the prompts and the guest's responses
+
+    Returns:
+        list: text of every row, the prompts the guest didn't answer default to 'M' (or 'None'),
+        see OUTPUT_SCHEMA in constants.py
+    """
+    return render_row(guest_data)
+
+
+def get_guest_data(extraction):
+    """
+    Returns the data written in a guest's column. A form that couldn't be extracted (e.g. it
+    exceeded its time or memory budget) is left missing ('M'), with the error in Additional Info.
+
+    Args:
+        extraction (Extraction_result): outcome of extracting the guest's form
+
+    Returns:
+        dict: mapping between the prompts and the guest's responses
+    """
+    if not extraction.error:
+        return extraction.customer_data
+    return {**extraction.customer_data, 'Additional info:': f"Not extracted: {extraction.error}"}
+
+
+def get_guests_rows(extraction_results):
+    """
+    Renders the row values of every guest once, so the Word document and the other outputs of a
+    trip share them.
+
+    Args:
+        extraction_results (list): Extraction_result of every guest form
+
+    Returns:
+        list: values of every guest's rows, as returned by get_row_values
+    """
+    return [get_row_values(get_guest_data(extraction)) for extraction in extraction_results]
+
+
+def is_missing(value):
+    """
+    Returns whether a cell value counts as missing, those cells are written as a highlighted 'M'.
+    """
+    value = value.strip()
+    return not value or value == 'M'
+
+
+def fill_missing(row_values):
+    """
+    Returns the row values as written in the document, missing values replaced by 'M'.
+    """
+    return ['M' if is_missing(value) else value for value in row_values]
@@ -0,0 +1,70 @@
+from .containers import page_item, page_summary, entry_tuple, checkbox_tuple
+from .layout_primitives import LayoutFigure, LayoutText
+from pdfminer.layout import LTFigure, LTText
+
+
+def get_prompt_tokens(text):
+    """
+    Returns the words of a stripped text as compared to the prompt keywords (underscores around
+    the text and colons removed).
+    """
+    return frozenset(text.strip('_').replace(':', '').split())
+
+
+def text_item(text, bbox):
+    """
+    Returns the Page_item of a stripped text.
+    """
+    return page_item(text, bbox, get_prompt_tokens(text), None)
+
+
+def split_field(field, bbox):
+    """
+    Returns the Page_item of a field split out of a line of prompts (see split_text).
+    """
+    return text_item(field.strip(), bbox)
+
+
+def summarize_page(layout):
+    """
+    Reduces a page layout to what the parser reads from it, in a single traversal. Every top level
+    text box has its text read and stripped once, with the words compared to the prompt keywords,
+    and the "Xi" input figure (the customer input of vectorized forms) is parsed into responses and
+    checkmarks. The summary is then used for the template, the split mode, the prompts and the
+    mapping instead of going over the layout again.
+
+    Args:
+        layout (LTPage | LayoutPage): page of the guest form
+
+    Returns:
+        Page_summary: page id, content digest, every top level object (Page_item), the text ones,
+        the responses and checkmarks of the first "Xi" figure, whether the page has one and the
+        total width of the top level objects
+    """
+    items, texts, inputs, checkmarks = [], [], [], []
+    has_input = False
+    total_width = 0
+    for lt_obj in layout:
+        bbox = lt_obj.bbox
+        total_width += bbox[2] - bbox[0]
+        if isinstance(lt_obj, (LTText, LayoutText)):
+            text = lt_obj.get_text().strip()
+            item = page_item(text, bbox, get_prompt_tokens(text), lt_obj)
+            texts.append(item)
+        else:
+            #Figures and shapes have no text, pair_text maps them as they are:
+            item = page_item(None, bbox, None, lt_obj)
+            if not has_input and 'Xi' in getattr(lt_obj, 'name', ''):
+                has_input = True
+                for sub_item in lt_obj:
+                    x_min, y_min, x_max, y_max = sub_item.bbox
+                    if isinstance(sub_item, (LTText, LayoutText)):
+                        text = sub_item.get_text().strip().strip('_')
+                        if text:
+                            inputs.append(entry_tuple(text, y_min, x_min))
+                    elif isinstance(sub_item, (LTFigure, LayoutFigure)):
+                        checkmarks.append(checkbox_tuple((y_min + y_max) / 2, (x_min + x_max) / 2))
+        items.append(item)
+
+    return page_summary(layout.pageid, getattr(layout, 'content_digest', None), items, texts, inputs, checkmarks,
+                        has_input, total_width)
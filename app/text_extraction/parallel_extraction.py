@@ -0,0 +1,189 @@
+from .constants import (MAX_WORKERS, MIN_PARALLEL_FILES, CACHE_ENABLED, EXTRACTION_TIMEOUT, EXTRACTION_MEMORY_LIMIT,
+                        PDF_BACKEND)
+from .containers import extraction_result
+from .data_extraction import extract_customer_data
+from .worker_pool import IsolatedWorkerPool, get_peak_memory
+from . import instrumentation
+import logging
+import os
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCancelled(Exception):
+    """
+    Raised when the extraction of a folder is cancelled before every guest form was extracted.
+    """
+
+
+def extract_guest_file(pdf_file_path, use_cache=CACHE_ENABLED, backend=PDF_BACKEND):
+    """
+    Extracts the data of a single guest form. Runs inside the worker processes, so any error is
+    caught and returned instead of raised, that way one bad form doesn't abort the whole document.
+
+    Args:
+        pdf_file_path (str | Path): path to the guest's PDF form
+        use_cache (bool): whether to read and store the mapping in the on-disk cache
+        backend (str): name of the PDF backend used to lay out the pages
+
+    Returns:
+        Extraction_result: the file path, the prompt/response mapping and the error message (None
+        if the extraction succeeded)
+    """
+    customer_data = {}
+    try:
+        with instrumentation.current_file(pdf_file_path), instrumentation.span('extract_file'):
+            extract_customer_data(pdf_file_path, customer_data, backend=backend, use_cache=use_cache)
+    except Exception as e:
+        return extraction_result(pdf_file_path, {}, f"{type(e).__name__}: {e}")
+    return extraction_result(pdf_file_path, customer_data, None)
+
+
+def _extract_in_worker(pdf_file_path, instrumentation_settings=None, use_cache=CACHE_ENABLED, backend=PDF_BACKEND):
+    """
+    Pool entry point, returns the extraction result as a plain tuple so it can be pickled back
+    to the parent process, together with the spans recorded while extracting it.
+    """
+    if instrumentation_settings is not None:
+        instrumentation.enable(**instrumentation_settings)
+    with instrumentation.profiled(f"extract {Path(pdf_file_path).stem}"):
+        result = extract_guest_file(pdf_file_path, use_cache, backend)
+    return tuple(result), instrumentation.drain()
+
+
+def get_worker_count(num_files, max_workers=MAX_WORKERS, min_parallel_files=MIN_PARALLEL_FILES):
+    """
+    Calculates how many processes should be used to extract the given number of files.
+
+    Args:
+        num_files (int): number of guest forms to extract
+        max_workers (int | None): upper limit of processes, None uses every available core
+        min_parallel_files (int): folders with fewer files than this are extracted serially
+
+    Returns:
+        int: number of processes, 1 means the files are extracted in the current process
+    """
+    if num_files < min_parallel_files:
+        return 1
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    return max(1, min(max_workers, num_files))
+
+
+def _check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise ExtractionCancelled("The extraction was cancelled")
+
+
+def format_memory_peaks(memory_peaks):
+    """
+    Describes the memory high-water marks of the extraction processes, e.g. for the logs.
+
+    Args:
+        memory_peaks (dict): peak resident memory in bytes of every process, by process id
+
+    Returns:
+        str: highest and mean peak in MB
+    """
+    if not memory_peaks:
+        return "no extraction process"
+    peaks = list(memory_peaks.values())
+    return (f"{max(peaks) / 2**20:.0f} MB peak ({len(peaks)} processes, "
+            f"mean peak {sum(peaks) / len(peaks) / 2**20:.0f} MB)")
+
+
+def run_extractions(jobs, num_workers, cancel_event=None, use_cache=CACHE_ENABLED, timeout=EXTRACTION_TIMEOUT,
+                    memory_limit=EXTRACTION_MEMORY_LIMIT, memory_peaks=None, backend=PDF_BACKEND):
+    """
+    Extracts guest forms on an IsolatedWorkerPool, a form exceeding its wall-clock or memory budget
+    has its worker killed and is returned with the error instead of stalling the other forms. With
+    a single worker and no budget the forms are extracted in the current process.
+
+    Args:
+        jobs (list): (key, path to the guest's PDF form) of every form, started in this order
+        num_workers (int): number of processes, see get_worker_count
+        cancel_event (threading.Event | None): once set, the forms not extracted yet are cancelled
+        use_cache (bool): whether to read and store the mappings in the on-disk cache
+        timeout (float | None): wall-clock seconds allowed per form, None is unlimited
+        memory_limit (int | None): resident memory allowed per worker in bytes, None is unlimited
+        memory_peaks (dict | None): updated with the memory high-water mark of every process, in bytes
+        by process id (the current process when extracting in it), once the forms are extracted
+        backend (str): name of the PDF backend used to lay out the pages
+
+    Yields:
+        tuple: (key, Extraction_result) of every form, in completion order
+
+    Raises:
+        ExtractionCancelled: if cancel_event was set before every form was extracted
+    """
+    if memory_peaks is None:
+        memory_peaks = {}
+    if num_workers == 1 and timeout is None and memory_limit is None:
+        for key, pdf_file_path in jobs:
+            _check_cancelled(cancel_event)
+            yield key, extract_guest_file(pdf_file_path, use_cache, backend)
+        current_process = {os.getpid(): get_peak_memory()}
+        memory_peaks.update(current_process)
+        logger.info("Extraction memory: %s", format_memory_peaks(current_process))
+        return
+
+    pdf_file_paths = dict(jobs)
+    instrumentation_settings = instrumentation.get_settings()
+    tasks = [(key, (pdf_file_path, instrumentation_settings, use_cache, backend)) for key, pdf_file_path in jobs]
+    with IsolatedWorkerPool(_extract_in_worker, num_workers, timeout, memory_limit) as pool:
+        for key, value, error in pool.imap_unordered(tasks, stop_event=cancel_event):
+            if error is None:
+                result, spans = value
+                instrumentation.merge(spans)
+                result = extraction_result._make(result)
+            else:
+                #Killed for exceeding its budget, or its worker crashed:
+                result = extraction_result(pdf_file_paths[key], {}, error)
+            yield key, result
+        memory_peaks.update(pool.memory_peaks)
+        logger.info("Extraction memory: %s", format_memory_peaks(pool.memory_peaks))
+        #The pool only stops early when cancelled:
+        _check_cancelled(cancel_event)
+
+
+def extract_guest_files(pdf_file_paths, max_workers=MAX_WORKERS, min_parallel_files=MIN_PARALLEL_FILES,
+                        progress_callback=None, cancel_event=None, use_cache=CACHE_ENABLED, backend=PDF_BACKEND):
+    """
+    Extracts the data of every guest form, fanning the files out across a pool of isolated worker
+    processes when there are enough of them (see run_extractions). The results are returned in the
+    same order as pdf_file_paths so the guest columns in the Word document are always filled in the
+    same order.
+
+    Args:
+        pdf_file_paths (list): paths to the guests' PDF forms
+        max_workers (int | None): upper limit of processes, None uses every available core
+        min_parallel_files (int): folders with fewer files than this are extracted by a single process
+        progress_callback (callable | None): called with the Extraction_result of every file as soon
+        as it's extracted (in completion order), from the calling thread
+        cancel_event (threading.Event | None): once set, the forms not extracted yet are cancelled
+        use_cache (bool): whether to read and store the mappings in the on-disk cache
+        backend (str): name of the PDF backend used to lay out the pages
+
+    Returns:
+        list: Extraction_result for every file, in the order of pdf_file_paths
+
+    Raises:
+        ExtractionCancelled: if cancel_event was set before every form was extracted
+    """
+    num_workers = get_worker_count(len(pdf_file_paths), max_workers, min_parallel_files)
+
+    results = [None] * len(pdf_file_paths)
+    for i, result in run_extractions(list(enumerate(pdf_file_paths)), num_workers, cancel_event, use_cache,
+                                     backend=backend):
+        results[i] = result
+        if progress_callback is not None:
+            progress_callback(result)
+
+    #Report the forms that couldn't be extracted:
+    for result in results:
+        if result.error:
+            logger.warning("Failed to extract %s: %s", result.file_path, result.error)
+
+    return results
@@ -0,0 +1,792 @@
+from .constants import LAPARAMS, PDF_BACKEND, STREAM_PAGES
+from .containers import input_layer
+from .instrumentation import span
+from .layout_primitives import LayoutFigure, LayoutPage, LayoutShape, LayoutText
+import hashlib
+import re
+from functools import partial
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.fontmetrics import FONT_METRICS
+from pdfminer.layout import (IndexAssigner, LAParams, LTFigure, LTLayoutContainer, LTPage, LTText,
+                             LTTextLineHorizontal)
+from pdfminer.pdfinterp import LITERAL_FORM, PDFContentParser, PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdftypes import PDFStream, resolve1
+from pdfminer.psparser import PSEOF, PSKeyword, PSLiteral
+from pdfminer.utils import MATRIX_IDENTITY, apply_matrix_pt, get_bound, mult_matrix
+
+
+#Tag of a font subset (ABCDEF+Helvetica), every file embedding a subset of the same font gets a random one:
+SUBSET_PREFIX = re.compile(r'^[A-Z]{6}\+')
+
+class PdfminerBackend:
+    """
+    Lays out the pages of a PDF with pdfminer.six. This is the reference backend, the coordinates
+    and thresholds in constants.py were measured on its output.
+    """
+    name = 'pdfminer'
+
+    def __init__(self, stream_pages=STREAM_PAGES):
+        """
+        Args:
+            stream_pages (bool): whether every page is reduced to a LayoutPage as soon as it's laid
+            out (see compact_layout), so pdfminer's character level objects are freed right away
+        """
+        self.stream_pages = stream_pages
+
+    def extract_pages(self, pdf_file_path, page_numbers):
+        """
+        Lays out the requested pages of a PDF.
+
+        Args:
+            pdf_file_path (str | Path): path to the PDF file
+            page_numbers (list): zero based numbers of the pages to lay out
+
+        Yields:
+            LTPage | LayoutPage: layout of every page, with page ids starting at 1 and the
+            content_digest of its static layer. LayoutPage when streaming pages
+        """
+        #Same loop as pdfminer's extract_pages, the PDFPage is needed for the content digest:
+        with open(pdf_file_path, 'rb') as fp:
+            resource_manager = PDFResourceManager(caching=True)
+            device = PDFPageAggregator(resource_manager, laparams=LAParams(**LAPARAMS))
+            interpreter = PDFPageInterpreter(resource_manager, device)
+            pages = PDFPage.get_pages(fp, page_numbers, maxpages=len(page_numbers), caching=True)
+            for pageid, page in enumerate(pages, start=1):
+                with span('layout', page=pageid):
+                    interpreter.process_page(page)
+                    layout = device.get_result()
+                    if self.stream_pages:
+                        layout = _release_layout(device, layout)
+                layout.content_digest = _pdfminer_content_digest(page, _pdfminer_page_content(page))
+                yield layout
+
+    def extract_input_layers(self, pdf_file_path, page_numbers):
+        """
+        Reads the requested pages of a PDF without laying them out. Each page comes with its
+        content digest and a function that lays out only the first "Xi" figure (the customer input)
+        of the page, the static prompts are skipped.
+
+        Args:
+            pdf_file_path (str | Path): path to the PDF file
+            page_numbers (list): zero based numbers of the pages to read
+
+        Yields:
+            Input_layer: page id (starting at 1), content digest and lay_out function, which returns
+            a page (LTPage, or LayoutPage when streaming pages) containing only the "Xi" figure, or
+            None if the page doesn't draw one
+        """
+        with open(pdf_file_path, 'rb') as fp:
+            resource_manager = PDFResourceManager(caching=True)
+            device = PDFPageAggregator(resource_manager, laparams=LAParams(**LAPARAMS))
+            interpreter = PDFPageInterpreter(resource_manager, device)
+            pages = PDFPage.get_pages(fp, page_numbers, maxpages=len(page_numbers), caching=True)
+            for pageid, page in enumerate(pages, start=1):
+                content = _pdfminer_page_content(page)
+                content_digest = _pdfminer_content_digest(page, content)
+                lay_out = partial(_layout_pdfminer_input, interpreter, device, page, pageid, content, content_digest,
+                                  self.stream_pages)
+                yield input_layer(pageid, content_digest, lay_out)
+
+    def get_page_count(self, pdf_file_path):
+        """
+        Returns the number of pages of a PDF, without laying them out.
+        """
+        with open(pdf_file_path, 'rb') as fp:
+            return sum(1 for _ in PDFPage.get_pages(fp))
+
+
+class PyMuPDFBackend:
+    """
+    Lays out the pages of a PDF with PyMuPDF. MuPDF does the content stream interpretation and
+    text extraction, the characters are then grouped into lines following pdfminer's rules, and the
+    lines into boxes by pdfminer's own code (see _group_boxes), so the parser receives the same
+    text boxes and figures, in the same order.
+    """
+    name = 'pymupdf'
+
+    def extract_pages(self, pdf_file_path, page_numbers):
+        """
+        Lays out the requested pages of a PDF.
+
+        Args:
+            pdf_file_path (str | Path): path to the PDF file
+            page_numbers (list): zero based numbers of the pages to lay out
+
+        Yields:
+            LayoutPage: layout of every page, with page ids starting at 1
+        """
+        #Imported here so the pdfminer backend works without PyMuPDF installed:
+        import pymupdf
+
+        with pymupdf.open(pdf_file_path) as doc:
+            pageid = 0
+            for page_number in page_numbers:
+                if page_number >= doc.page_count:
+                    break
+                pageid += 1
+                with span('layout', page=pageid):
+                    layout = _layout_pymupdf_page(pymupdf, doc, doc[page_number], pageid)
+                yield layout
+
+    def extract_input_layers(self, pdf_file_path, page_numbers):
+        """
+        Reads the requested pages of a PDF without laying them out, see
+        PdfminerBackend.extract_input_layers.
+
+        Yields:
+            Input_layer: page id (starting at 1), content digest and lay_out function, which returns
+            a LayoutPage containing only the "Xi" figure, or None if the page doesn't draw one
+        """
+        import pymupdf
+
+        with pymupdf.open(pdf_file_path) as doc:
+            pageid = 0
+            for page_number in page_numbers:
+                if page_number >= doc.page_count:
+                    break
+                pageid += 1
+                page = doc[page_number]
+                content = page.read_contents()
+                content_digest = _pymupdf_content_digest(doc, page, content)
+                lay_out = partial(_layout_pymupdf_input, pymupdf, doc, page, pageid, content, content_digest)
+                yield input_layer(pageid, content_digest, lay_out)
+
+    def get_page_count(self, pdf_file_path):
+        """
+        Returns the number of pages of a PDF, without laying them out.
+        """
+        import pymupdf
+
+        with pymupdf.open(pdf_file_path) as doc:
+            return doc.page_count
+
+
+def _pdfminer_page_content(page):
+    """
+    Returns the decoded content stream of a pdfminer PDFPage.
+    """
+    return b''.join(stream.get_data() for stream in map(resolve1, page.contents) if isinstance(stream, PDFStream))
+
+
+def _pdfminer_fonts(resources):
+    """
+    Describes the fonts of a pdfminer resource dictionary, without their subset tags.
+    """
+    fonts = resolve1(resources.get('Font', {})) or {}
+    font_names = []
+    for name, font in fonts.items():
+        font = resolve1(font) or {}
+        font_names.append((name, font.get('Subtype'), strip_subset_prefix(font.get('BaseFont')), font.get('Encoding')))
+    return font_names
+
+
+def _pdfminer_static_xobjects(content, resources, path='', seen=None):
+    """
+    Describes the XObjects drawn by a content stream other than the "Xi" figures, and the ones they
+    draw in turn: their content (or image data), matrix, bounding box and fonts.
+
+    Returns:
+        list: (path, attributes, data) of every XObject, see get_content_digest
+    """
+    seen = set() if seen is None else seen
+    xobjects = resolve1(resources.get('XObject', {})) or {}
+    described = []
+    for name, _, _, _ in find_invocations(content, {name for name in xobjects if 'Xi' not in name}):
+        stream = resolve1(xobjects[name])
+        #Resolved XObjects are shared by every invocation, their id identifies them:
+        if not isinstance(stream, PDFStream) or id(stream) in seen:
+            continue
+        seen.add(id(stream))
+        data = stream.get_data()
+        xobject_resources = resolve1(stream.get('Resources')) or {}
+        attributes = (resolve1(stream.get('Matrix')), resolve1(stream.get('BBox')), _pdfminer_fonts(xobject_resources))
+        described.append((path + name, attributes, data))
+        if resolve1(stream.get('Subtype')) is LITERAL_FORM:
+            described.extend(_pdfminer_static_xobjects(data, xobject_resources, path + name + '/', seen))
+    return described
+
+
+def _pdfminer_content_digest(page, content):
+    """
+    Returns the content digest of a pdfminer PDFPage.
+    """
+    return get_content_digest(PdfminerBackend.name, content, _pdfminer_fonts(page.resources), page.mediabox,
+                              _pdfminer_static_xobjects(content, page.resources))
+
+
+def _layout_pdfminer_input(interpreter, device, page, pageid, content, content_digest, stream_pages=STREAM_PAGES):
+    """
+    Lays out the first "Xi" figure of a pdfminer PDFPage. The page is interpreted with its content
+    stripped down to the figure's invocation, so the figure is identical to the one in the full
+    layout (figures are analyzed on their own) but the static prompts are never laid out.
+
+    Returns:
+        LTPage | LayoutPage | None: page containing only the "Xi" figure, None if the page doesn't
+        draw one
+    """
+    xobjects = resolve1(page.resources.get('XObject', {})) or {}
+    isolated = isolate_invocation(content, {name for name in xobjects if 'Xi' in name})
+    if isolated is None:
+        return None
+
+    page.contents = [PDFStream({}, isolated[2])]
+    interpreter.process_page(page)
+    layout = device.get_result()
+    if stream_pages:
+        layout = _release_layout(device, layout)
+    layout.pageid = pageid
+    layout.content_digest = content_digest
+    return layout
+
+
+def compact_layout(layout):
+    """
+    Reduces a pdfminer layout object to the primitives read by the parser: the text and bounding
+    box of text boxes, the name, bounding box and contents of figures and the bounding box of
+    everything else. Parsing the result gives the same data as parsing the pdfminer objects, which
+    keep every character (with its font and matrix) alive as long as the page is referenced.
+
+    Args:
+        layout (LTPage | LTComponent): page, or object of a page, laid out by pdfminer
+
+    Returns:
+        LayoutPage | LayoutText | LayoutFigure | LayoutShape: the equivalent primitive
+    """
+    if isinstance(layout, LTPage):
+        return LayoutPage(layout.pageid, layout.bbox, [compact_layout(lt_obj) for lt_obj in layout],
+                          getattr(layout, 'content_digest', None))
+    if isinstance(layout, LTText):
+        return LayoutText(layout.get_text(), layout.bbox)
+    if isinstance(layout, LTFigure):
+        return LayoutFigure(layout.name, layout.bbox, [compact_layout(lt_obj) for lt_obj in layout])
+    return LayoutShape(layout.bbox)
+
+
+def _release_layout(device, layout):
+    """
+    Returns the compact layout of the page just laid out by device, dropping the aggregator's
+    reference so the pdfminer objects are freed before the page is parsed.
+    """
+    device.result = None
+    return compact_layout(layout)
+
+
+PDF_BACKENDS = {backend.name: backend for backend in (PdfminerBackend, PyMuPDFBackend)}
+
+
+def get_pdf_backend(name=PDF_BACKEND):
+    """
+    Returns the PDF backend registered under the given name.
+
+    Args:
+        name (str): name of the backend, see PDF_BACKENDS
+
+    Returns:
+        PdfminerBackend | PyMuPDFBackend: backend instance
+    """
+    try:
+        return PDF_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown PDF backend {name!r}, expected one of {sorted(PDF_BACKENDS)}") from None
+
+
+###-------------------------------------------------------------------------###
+###-----------------------------CONTENT STREAMS-----------------------------###
+###-------------------------------------------------------------------------###
+def parse_operators(content):
+    """
+    Splits a decoded content stream into its operators.
+
+    Args:
+        content (bytes): decoded content stream
+
+    Yields:
+        tuple: (operator, operands, start, end) where start and end are the byte offsets of the
+        operator and its operands in the content stream
+    """
+    parser = PDFContentParser([PDFStream({}, content)])
+    operands, start = [], None
+    while True:
+        try:
+            pos, obj = parser.nextobject()
+        except PSEOF:
+            break
+        if isinstance(obj, PSKeyword):
+            yield obj.name, operands, pos if start is None else start, pos + len(obj.name)
+            operands, start = [], None
+        else:
+            start = pos if start is None else start
+            operands.append(obj)
+
+
+def track_ctm(content, ctm=MATRIX_IDENTITY):
+    """
+    Walks the operators of a content stream keeping track of the current transformation matrix
+    (q, Q and cm operators), like pdfminer's interpreter does.
+
+    Args:
+        content (bytes): decoded content stream
+        ctm (tuple): transformation matrix in effect when the content stream starts
+
+    Yields:
+        tuple: (operator, operands, start, end, ctm) with the matrix in effect after the operator
+    """
+    stack = []
+    for operator, operands, start, end in parse_operators(content):
+        if operator == b'q':
+            stack.append(ctm)
+        elif operator == b'Q' and stack:
+            ctm = stack.pop()
+        elif operator == b'cm' and len(operands) == 6:
+            ctm = mult_matrix(tuple(float(value) for value in operands), ctm)
+        yield operator, operands, start, end, ctm
+
+
+def _invoked_name(operator, operands, names):
+    """
+    Returns the name of the XObject drawn by a "Do" operator, None for any other operator.
+    """
+    if operator == b'Do' and operands and isinstance(operands[-1], PSLiteral) and operands[-1].name in names:
+        return operands[-1].name
+    return None
+
+
+def find_invocations(content, names, ctm=MATRIX_IDENTITY):
+    """
+    Finds where the given XObjects are drawn in a content stream, keeping track of the current
+    transformation matrix (q, Q and cm operators).
+
+    Args:
+        content (bytes): decoded content stream
+        names (set): names of the XObjects in the resources of the content stream
+        ctm (tuple): transformation matrix in effect when the content stream starts
+
+    Returns:
+        list: (name, ctm, start, end) for every "Do" operator drawing one of the XObjects
+    """
+    invocations = []
+    for operator, operands, start, end, ctm in track_ctm(content, ctm):
+        name = _invoked_name(operator, operands, names)
+        if name is not None:
+            invocations.append((name, ctm, start, end))
+    return invocations
+
+
+def isolate_invocation(content, names):
+    """
+    Strips a content stream down to the first "Do" operator drawing one of the given XObjects.
+    Only the q, Q and cm operators before it are kept, so an interpreter reaches the XObject with
+    exactly the same transformation matrix without drawing anything else.
+
+    Args:
+        content (bytes): decoded content stream
+        names (set): names of the XObjects to look for
+
+    Returns:
+        tuple | None: (name, ctm, stripped content), None if none of the XObjects is drawn
+    """
+    chunks = []
+    for operator, operands, start, end, ctm in track_ctm(content):
+        if operator in (b'q', b'Q', b'cm'):
+            chunks.append(content[start:end])
+            continue
+        name = _invoked_name(operator, operands, names)
+        if name is not None:
+            chunks.append(content[start:end])
+            return name, ctm, b'\n'.join(chunks)
+    return None
+
+
+def remove_invocations(content, invocations):
+    """
+    Removes the "Do" operators found by find_invocations from a content stream.
+
+    Args:
+        content (bytes): decoded content stream
+        invocations (list): (name, ctm, start, end) tuples
+
+    Returns:
+        bytes: content stream without the invocations
+    """
+    chunks, position = [], 0
+    for _, _, start, end in invocations:
+        chunks.append(content[position:start])
+        position = end
+    chunks.append(content[position:])
+    return b' '.join(chunks)
+
+
+def transform_bbox(bbox, matrix):
+    """
+    Transforms a bounding box the same way pdfminer computes the bounding box of a figure.
+
+    Args:
+        bbox (tuple): (x_min, y_min, x_max, y_max)
+        matrix (tuple): transformation matrix
+
+    Returns:
+        tuple: bounding box of the transformed corners
+    """
+    x_min, y_min, x_max, y_max = bbox
+    return get_bound(apply_matrix_pt(matrix, (x, y)) for x in (x_min, x_max) for y in (y_min, y_max))
+
+
+def strip_subset_prefix(font_name):
+    """
+    Returns the name of a font without its subset tag (ABCDEF+Helvetica becomes Helvetica).
+
+    Args:
+        font_name (str | bytes | PSLiteral | None): base font name
+
+    Returns:
+        str | None: name of the font, None if it doesn't have one
+    """
+    if isinstance(font_name, PSLiteral):
+        font_name = font_name.name
+    if isinstance(font_name, bytes):
+        font_name = font_name.decode('latin-1')
+    if not isinstance(font_name, str):
+        return font_name
+    return SUBSET_PREFIX.sub('', font_name)
+
+
+def get_content_digest(backend_name, content, fonts, mediabox, xobjects=()):
+    """
+    Fingerprints the static layer of a page: the content stream that draws the prompts and
+    invokes the "Xi" figure, the fonts it uses, the other XObjects it draws (e.g. prompts drawn
+    in a /Fm0 form XObject) and the page size. The guest's answers live in the "Xi" form XObject,
+    so every filled copy of the same form revision has the same digest.
+
+    Args:
+        backend_name (str): name of the backend, the layouts of different backends aren't mixed
+        content (bytes): decoded content stream of the page
+        fonts (list): tuples describing the fonts in the page resources, without subset tags
+        mediabox (tuple): media box of the page
+        xobjects (list): (path, attributes, data) of every XObject the static layer draws: its
+            name (prefixed by the names of the XObjects drawing it), a tuple describing its matrix,
+            bounding box and fonts, and its decoded content
+
+    Returns:
+        str: hex digest of the static layer
+    """
+    digest = hashlib.blake2b(content, digest_size=16)
+    digest.update(repr((backend_name, sorted(map(repr, fonts)), tuple(mediabox))).encode())
+    for path, attributes, data in xobjects:
+        digest.update(repr((path, attributes, len(data))).encode())
+        digest.update(data)
+    return digest.hexdigest()
+
+
+###--------------------------------------------------------------------------###
+###-----------------------------PYMUPDF LAYOUT-------------------------------###
+###--------------------------------------------------------------------------###
+def _get_matrix(doc, xref):
+    """
+    Reads the /Matrix entry of a form XObject, the identity matrix if it doesn't have one.
+    """
+    key_type, value = doc.xref_get_key(xref, 'Matrix')
+    if key_type != 'array':
+        return MATRIX_IDENTITY
+    return tuple(float(number) for number in value.strip('[]').split())
+
+
+def _get_xobjects(page, invoker):
+    """
+    Returns the form XObjects and images drawn directly by the page (invoker 0) or by a form XObject.
+
+    Returns:
+        dict: XObject name to (xref, bbox), bbox is None for images
+    """
+    xobjects = {name: (xref, tuple(bbox)) for xref, name, parent, bbox in page.get_xobjects() if parent == invoker}
+    for image in page.get_images(full=True):
+        if image[-1] == invoker:
+            xobjects.setdefault(image[7], (image[0], None))
+    return xobjects
+
+
+def _layout_figures(doc, xobjects, invocations, origin):
+    """
+    Creates the figures drawn by the given invocations, a form XObject covers its transformed
+    /BBox and an image covers the transformed unit square, as in pdfminer.
+    """
+    figures = []
+    for name, ctm, _, _ in invocations:
+        xref, bbox = xobjects[name]
+        if bbox is None:
+            bbox, matrix = (0, 0, 1, 1), ctm
+        else:
+            matrix = mult_matrix(_get_matrix(doc, xref), ctm)
+        figures.append(LayoutFigure(name, _translate(transform_bbox(bbox, matrix), origin)))
+    return figures
+
+
+def _translate(bbox, origin):
+    """
+    Moves a bounding box from PDF user space to pdfminer's coordinates, which start at the
+    lower left corner of the media box.
+    """
+    return (bbox[0] - origin[0], bbox[1] - origin[1], bbox[2] - origin[0], bbox[3] - origin[1])
+
+
+def _set_page_contents(doc, page, content):
+    """
+    Replaces the content stream of a page, only in memory since the document is never saved.
+    MuPDF interprets the contents again on the next text extraction, no page reload is needed.
+    """
+    xrefs = page.get_contents()
+    doc.update_stream(xrefs[0], content, compress=False)
+    for xref in xrefs[1:]:
+        doc.update_stream(xref, b'', compress=False)
+
+
+def _font_descent(span):
+    """
+    Returns the descent of a span's font as a fraction of the font size. pdfminer uses the AFM
+    metrics for the standard 14 fonts and the font's own metrics for the rest.
+    """
+    metrics = FONT_METRICS.get(span['font'])
+    if metrics:
+        return metrics[0]['Descent'] / 1000
+    return span['descender']
+
+
+def _extract_chars(pymupdf, page, origin):
+    """
+    Extracts the characters of a page as (char, x_min, y_min, x_max, y_max) in pdfminer's
+    coordinates. Like pdfminer, a character box spans from the font's descent to the font size.
+    """
+    a, b, c, d, e, f = ~page.transformation_matrix
+    text = page.get_text('rawdict', clip=pymupdf.INFINITE_RECT(), flags=pymupdf.TEXT_PRESERVE_WHITESPACE |
+                         pymupdf.TEXT_PRESERVE_LIGATURES | pymupdf.TEXT_INHIBIT_SPACES)
+    x_offset, y_offset = e - origin[0], f - origin[1]
+    chars = []
+    for block in text['blocks']:
+        for line in block.get('lines', ()):
+            for span in line['spans']:
+                size = span['size']
+                descent = _font_descent(span) * size
+                for char in span['chars']:
+                    if char.get('synthetic'):
+                        continue
+                    x_min, _, x_max, _ = char['bbox']
+                    baseline = char['origin'][1]
+                    #Transform the left and right end of the baseline back to PDF coordinates:
+                    left, right = a * x_min + c * baseline + x_offset, a * x_max + c * baseline + x_offset
+                    y_min = b * x_min + d * baseline + y_offset + descent
+                    chars.append((char['c'], min(left, right), y_min, max(left, right), y_min + size))
+    return chars
+
+
+def _is_halign(char0, char1, line_overlap, char_margin):
+    """
+    pdfminer's rule to decide whether two consecutive characters belong to the same text line.
+    """
+    _, x0_min, y0_min, x0_max, y0_max = char0
+    _, x1_min, y1_min, x1_max, y1_max = char1
+    if y1_min > y0_max or y0_min > y1_max:
+        return False
+    voverlap = min(abs(y0_min - y1_max), abs(y0_max - y1_min))
+    if min(y0_max - y0_min, y1_max - y1_min) * line_overlap >= voverlap:
+        return False
+    if x1_min <= x0_max and x0_min <= x1_max:
+        hdistance = 0
+    else:
+        hdistance = min(abs(x0_min - x1_max), abs(x0_max - x1_min))
+    return hdistance < max(x0_max - x0_min, x1_max - x1_min) * char_margin
+
+
+def _group_lines(chars, laparams):
+    """
+    Groups consecutive characters into text lines, adding a space between words like pdfminer.
+
+    Returns:
+        list: (text, bbox) for every non blank line, the text ends with a newline
+    """
+    runs, current = [], []
+    for char in chars:
+        if current and not _is_halign(current[-1], char, laparams['line_overlap'], laparams['char_margin']):
+            runs.append(current)
+            current = []
+        current.append(char)
+    if current:
+        runs.append(current)
+
+    lines = []
+    for run in runs:
+        text, line_x_max = [], None
+        for char, x_min, y_min, x_max, y_max in run:
+            margin = laparams['word_margin'] * max(x_max - x_min, y_max - y_min)
+            if line_x_max is not None and line_x_max < x_min - margin:
+                text.append(' ')
+            text.append(char)
+            line_x_max = x_max
+        text = ''.join(text) + '\n'
+        if not text.isspace():
+            lines.append((text, (min(c[1] for c in run), min(c[2] for c in run),
+                                 max(c[3] for c in run), max(c[4] for c in run))))
+    return lines
+
+
+def _group_boxes(lines, laparams, bbox):
+    """
+    Groups text lines into text boxes and orders the boxes with pdfminer's own code: the lines
+    are handed to LTLayoutContainer as stand-ins carrying only their bounding box, so the
+    neighbor search, the order of the lines inside a box and the reading order of the boxes
+    (hierarchical grouping driven by boxes_flow) are the ones of the pdfminer backend.
+
+    Args:
+        lines (list): (text, bbox) of every line, as returned by _group_lines
+        laparams (dict): layout parameters, see LAPARAMS
+        bbox (tuple): bounding box of the page or figure the lines are laid out in
+
+    Returns:
+        list: LayoutText for every box, in pdfminer's order
+    """
+    params = LAParams(**laparams)
+    texts = {}
+    for text, line_bbox in lines:
+        line = LTTextLineHorizontal(params.word_margin)
+        line.set_bbox(line_bbox)
+        texts[line] = text
+
+    container = LTLayoutContainer(bbox)
+    boxes = list(container.group_textlines(params, list(texts)))
+    #Same as LTLayoutContainer.analyze, which also needs the characters:
+    if params.boxes_flow is None:
+        for box in boxes:
+            box.analyze(params)
+        boxes.sort(key=lambda box: (-box.y0, box.x0))
+    else:
+        assigner = IndexAssigner()
+        for group in container.group_textboxes(params, boxes):
+            group.analyze(params)
+            assigner.run(group)
+        boxes.sort(key=lambda box: box.index)
+    return [LayoutText(''.join(texts[line] for line in box), box.bbox) for box in boxes]
+
+
+def _layout_text(pymupdf, page, origin, bbox):
+    """
+    Lays out the text currently drawn by a page into text boxes, bbox is the one of the page or
+    of the figure containing the text (see _group_boxes).
+    """
+    chars = _extract_chars(pymupdf, page, origin)
+    return _group_boxes(_group_lines(chars, LAPARAMS), LAPARAMS, bbox)
+
+
+def _pymupdf_fonts(page):
+    """
+    Describes the fonts of a PyMuPDF page without their subset tags, grouped by the XObject using
+    them (0 for the page itself).
+    """
+    fonts = {}
+    for _, _, font_type, base_font, name, encoding, referencer in page.get_fonts(full=True):
+        fonts.setdefault(referencer, []).append((font_type, strip_subset_prefix(base_font), name, encoding))
+    return fonts
+
+
+def _pymupdf_static_xobjects(doc, page, content, fonts, invoker=0, path='', seen=None):
+    """
+    Describes the XObjects drawn by a content stream other than the "Xi" figures, and the ones they
+    draw in turn, see _pdfminer_static_xobjects.
+
+    Returns:
+        list: (path, attributes, data) of every XObject, see get_content_digest
+    """
+    seen = set() if seen is None else seen
+    xobjects = _get_xobjects(page, invoker)
+    described = []
+    for name, _, _, _ in find_invocations(content, {name for name in xobjects if 'Xi' not in name}):
+        xref, bbox = xobjects[name]
+        if xref in seen:
+            continue
+        seen.add(xref)
+        data = doc.xref_stream(xref) or b''
+        described.append((path + name, (doc.xref_get_key(xref, 'Matrix'), bbox, fonts.get(xref, [])), data))
+        if bbox is not None:
+            described.extend(_pymupdf_static_xobjects(doc, page, data, fonts, xref, path + name + '/', seen))
+    return described
+
+
+def _pymupdf_content_digest(doc, page, content):
+    """
+    Returns the content digest of a PyMuPDF page, read before its streams are rewritten.
+    """
+    fonts = _pymupdf_fonts(page)
+    return get_content_digest(PyMuPDFBackend.name, content, fonts.get(0, []), tuple(page.mediabox),
+                              _pymupdf_static_xobjects(doc, page, content, fonts))
+
+
+def _layout_input_figure(pymupdf, doc, page, figure, invocation, xobjects, origin):
+    """
+    Lays out the text and figures drawn inside an "Xi" form XObject (the customer input). The
+    page content is replaced by the XObject's invocation and the XObject's own content by itself
+    without the nested checkmarks, which become figures.
+    """
+    name, ctm, _, _ = invocation
+    xref, bbox = xobjects[name]
+    if bbox is None:
+        return
+    xi_content = doc.xref_stream(xref)
+    xi_xobjects = _get_xobjects(page, invoker=xref)
+    xi_ctm = mult_matrix(_get_matrix(doc, xref), ctm)
+    xi_invocations = find_invocations(xi_content, set(xi_xobjects), xi_ctm)
+
+    doc.update_stream(xref, remove_invocations(xi_content, xi_invocations), compress=False)
+    _set_page_contents(doc, page, b'q %f %f %f %f %f %f cm /%s Do Q' % (*ctm, name.encode('latin-1')))
+    figure.objs = (_layout_text(pymupdf, page, origin, figure.bbox) +
+                   _layout_figures(doc, xi_xobjects, xi_invocations, origin))
+    doc.update_stream(xref, xi_content, compress=False)
+
+
+def _layout_pymupdf_input(pymupdf, doc, page, pageid, content, content_digest):
+    """
+    Lays out the first "Xi" figure of a page, the static prompts are skipped.
+
+    Returns:
+        LayoutPage | None: page containing only the "Xi" figure, None if the page doesn't draw one
+    """
+    mediabox = page.mediabox
+    origin = (mediabox.x0, mediabox.y0)
+    xobjects = _get_xobjects(page, invoker=0)
+    invocations = [invocation for invocation in find_invocations(content, set(xobjects)) if 'Xi' in invocation[0]]
+    if not invocations:
+        return None
+
+    figures = _layout_figures(doc, xobjects, invocations[:1], origin)
+    _layout_input_figure(pymupdf, doc, page, figures[0], invocations[0], xobjects, origin)
+    return LayoutPage(pageid, (0, 0, mediabox.width, mediabox.height), figures, content_digest)
+
+
+def _layout_pymupdf_page(pymupdf, doc, page, pageid):
+    """
+    Lays out a single page. The page content is rewritten in memory so MuPDF extracts each
+    layer separately: first the page's own text (the form prompts) without any XObject, then the
+    text of every "Xi" form XObject (the customer input) without the checkmarks nested inside it.
+
+    Returns:
+        LayoutPage: text boxes, shapes and figures of the page
+    """
+    mediabox = page.mediabox
+    origin = (mediabox.x0, mediabox.y0)
+    content = page.read_contents()
+    content_digest = _pymupdf_content_digest(doc, page, content)
+
+    xobjects = _get_xobjects(page, invoker=0)
+    invocations = find_invocations(content, set(xobjects))
+    figures = _layout_figures(doc, xobjects, invocations, origin)
+
+    #Static layer: page text and vector shapes without any XObject:
+    _set_page_contents(doc, page, remove_invocations(content, invocations))
+    objs = _layout_text(pymupdf, page, origin, (0, 0, mediabox.width, mediabox.height))
+    for drawing in page.get_drawings():
+        rect = drawing['rect'] * ~page.transformation_matrix
+        objs.append(LayoutShape(_translate((rect.x0, rect.y0, rect.x1, rect.y1), origin)))
+
+    #Customer input layer: text and figures drawn inside the "Xi" form XObjects:
+    for figure, invocation in zip(figures, invocations):
+        if 'Xi' in invocation[0]:
+            _layout_input_figure(pymupdf, doc, page, figure, invocation, xobjects, origin)
+
+    return LayoutPage(pageid, (0, 0, mediabox.width, mediabox.height), objs + figures, content_digest)
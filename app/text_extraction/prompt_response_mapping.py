@@ -1,4 +1,8 @@
-from .checkmark_utils import check_selection
+from .checkmark_utils import classify_checkmarks
+from .constants import FIRST_PAGE_DEFAULTS
+from .form_templates import DEFAULT_TEMPLATE
+from .spatial_index import SortedIndex
+from operator import attrgetter
 
 
 
@@ -50,28 +54,58 @@ def neighbors(field, response, y_delta = 10.0, x_delta = 25.0, multiline=False):
         return  vertical_dist < (y_delta)*6 and vertical_dist > 0
 
 
+def neighbor_window(field, y_delta = 10.0, multiline=False):
+    """
+    Returns the vertical window a response has to be in to pass neighbors(). The window is
+    slightly wider than the exact bounds, neighbors() still makes the final decision.
 
-def create_field_entry_mapping(form_fields, customer_inputs, mapping, page_num):
+    Args:
+        field (namedtuple): contains the field text, y coordinate and x coordinate for a 
+                            prompt in the form
+        y_delta (float): maximum y distance between prompt and user reponse
+        multiline (bool): whether the prompt's response can span several lines
+
+    Returns:
+        tuple: (y_low, y_high) bounds of the window
+    """
+    margin = 1.0
+    if not multiline:
+        return field.y_coord - y_delta - margin, field.y_coord + y_delta + margin
+
+    if 'members' in field.field:
+        return field.y_coord - (y_delta)*11 - margin, field.y_coord + margin
+    elif 'fitness' in field.field:
+        return field.y_coord - (y_delta)*3 - margin, field.y_coord + (y_delta)*3 + margin
+    else:
+        return field.y_coord - (y_delta)*6 - margin, field.y_coord + margin
+
+
+def create_field_entry_mapping(form_fields, customer_inputs, mapping, page_num, template=DEFAULT_TEMPLATE):
     """
     This creates a dictionary to organize form data using form fields as the keys
     and customer input, including checkboex, as the values
 
     Args:
+        form_fields (dict): prompts, long prompts and checkbox prompts of the page
+        customer_inputs (dict): single inputs and checkmarks of the page
+        mapping (dict): mapping between prompts and responses, updated in place
+        page_num (int): page id, starting at 1
+        template (Form_template): revision of the form, holds the checkbox coordinates
     
     Returns:
+        None
     """
     if page_num == 1:
-        mapping['family members'] = ""
-        mapping['roommate'] = ''
-        mapping['diet exclusions'] = ''
-        mapping['medications'] = ''
-        mapping['equipment'] = ''
-        mapping['physical limitations'] = ''
+        for key in FIRST_PAGE_DEFAULTS:
+            mapping[key] = ''
+
+    #Index the responses by height so each prompt only checks the ones next to it:
+    input_index = SortedIndex(customer_inputs['single_input'], key=attrgetter('y_coord'))
 
     # Mapping short prompts to response
     count = 0
     for field in form_fields['prompts']:
-        for customer_input in customer_inputs['single_input']:
+        for customer_input in input_index.candidates(*neighbor_window(field)):
             if neighbors(field, customer_input):
                 if 'Please describe' in field.field:
                     key = check_allergy_information(field)
@@ -86,7 +120,7 @@ def create_field_entry_mapping(form_fields, customer_inputs, mapping, page_num):
     
     # Mapping long prompts to response
     for long_field in form_fields['long_prompts']:
-        for customer_input in customer_inputs['single_input']:
+        for customer_input in input_index.candidates(*neighbor_window(long_field, multiline=True)):
             if neighbors(long_field, customer_input, multiline=True):
                 if 'roommate' in long_field.field:
                     mapping['roommate'] = customer_input.text
@@ -106,27 +140,57 @@ def create_field_entry_mapping(form_fields, customer_inputs, mapping, page_num):
                         mapping['celebrating'] = customer_input.text
     
     # Mapping choice prompts (checkbox) to response
-    for checkbox_promp in form_fields['checkbox_prompts']:
-        for customer_checkmark in customer_inputs['checkmarks']:
-            prompt, selection = check_selection(checkbox_promp, customer_checkmark)
-            if selection:
-                mapping[prompt.lower()] = selection
-                break
+    selections = classify_checkmarks(form_fields['checkbox_prompts'], customer_inputs['checkmarks'], template)
+    for prompt, selection in selections:
+        mapping[prompt.lower()] = selection
     return
 
 
-def pair_text(layout, prompts_to_inputs_mapping, y_delta = 10.0, x_delta = 25.0):
-    for prompt in layout:
-        for response in layout:
-            if (prompt != response) and\
-                abs(prompt.bbox[2] - response.bbox[0]) < x_delta and \
-                abs(prompt.bbox[1] - response.bbox[1]) < y_delta:
-                try:
-                    prompt = prompt.get_text().strip()
-                    response = response.get_text().strip()
-                except AttributeError:
-                    pass
-                if layout.pageid > 1 and 'Email' in prompt:
+def pair_text(summary, prompts_to_inputs_mapping, y_delta = 10.0, x_delta = 25.0):
+    """
+    Fallback used when the form has no vectorized inputs: pairs every layout object (prompt) with
+    the first object in layout order whose left edge is within x_delta of the prompt's right edge
+    and whose bottom is within y_delta of the prompt's bottom.
+
+    The objects are indexed by their left edge and by their bottom, each prompt only checks the
+    objects inside the narrower of its two windows, and the text of every object was already read
+    once by summarize_page.
+
+    Args:
+        summary (Page_summary): page containing the text boxes, see summarize_page
+        prompts_to_inputs_mapping (dict): mapping between prompts and responses, updated in place
+        y_delta (float): maximum y distance between prompt and user reponse
+        x_delta (float): maximum x distance between prompt's right edge and user reponse
+
+    Returns:
+        None
+    """
+    items = summary.items
+    positions = range(len(items))
+    left_edge_index = SortedIndex(positions, key=lambda i: items[i].bbox[0])
+    bottom_index = SortedIndex(positions, key=lambda i: items[i].bbox[1])
+    margin = 1.0
+
+    for i, item in enumerate(items):
+        x_max, y_min = item.bbox[2], item.bbox[1]
+        x_window = (x_max - x_delta - margin, x_max + x_delta + margin)
+        y_window = (y_min - y_delta - margin, y_min + y_delta + margin)
+        if left_edge_index.count(*x_window) < bottom_index.count(*y_window):
+            candidates = left_edge_index.candidates(*x_window)
+        else:
+            candidates = bottom_index.candidates(*y_window)
+
+        for j in candidates:
+            if (i != j) and\
+                abs(x_max - items[j].bbox[0]) < x_delta and \
+                abs(y_min - items[j].bbox[1]) < y_delta:
+                #Objects without text are mapped as they are:
+                prompt, response = item.obj, items[j].obj
+                if item.text is not None:
+                    prompt = item.text
+                    if items[j].text is not None:
+                        response = items[j].text
+                if summary.pageid > 1 and 'Email' in prompt:
                     prompts_to_inputs_mapping['Emergency ' + prompt] = response
                 else:
                     prompts_to_inputs_mapping[prompt] = response
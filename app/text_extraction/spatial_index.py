@@ -0,0 +1,80 @@
+from bisect import bisect_left, bisect_right
+
+
+class SortedIndex:
+    """
+    Indexes layout items (responses, checkmarks, text boxes...) by one of their coordinates, so a
+    prompt only has to check the items inside its window instead of every item on the page.
+    """
+    __slots__ = ('items', 'order', 'keys')
+
+    def __init__(self, items, key):
+        """
+        Args:
+            items (list): items to index, their order is kept in the query results
+            key (callable): returns the indexed coordinate of an item
+        """
+        self.items = items
+        coords = [key(item) for item in items]
+        self.order = sorted(range(len(items)), key=coords.__getitem__)
+        self.keys = [coords[i] for i in self.order]
+
+    def count(self, low, high):
+        """
+        Returns the number of items whose coordinate is within [low, high].
+        """
+        return max(0, bisect_right(self.keys, high) - bisect_left(self.keys, low))
+
+    def candidates(self, low, high):
+        """
+        Returns the items whose coordinate is within [low, high], in their original order so the
+        callers resolve ties (first or last match wins) exactly like a full scan.
+
+        Args:
+            low (float): start of the window
+            high (float): end of the window
+
+        Returns:
+            list: items inside the window
+        """
+        start = bisect_left(self.keys, low)
+        end = bisect_right(self.keys, high)
+        if start >= end:
+            return []
+        return [self.items[i] for i in sorted(self.order[start:end])]
+
+
+class IntervalIndex:
+    """
+    Resolves a coordinate to the option whose center is within radius of it, e.g. the checkbox
+    option under a checkmark. The intervals [center - radius, center + radius] are split once into
+    disjoint segments, each holding the option that wins it, so a lookup is a single bisection
+    instead of a scan of every option.
+    """
+    __slots__ = ('bounds', 'on_bound', 'between')
+
+    def __init__(self, centers, radius):
+        """
+        Args:
+            centers (dict): center coordinate of every option, when intervals overlap the option
+            listed first wins (like a scan in insertion order)
+            radius (float): maximum distance between a coordinate and the center of its option
+        """
+        def first_covering(coord):
+            #Same test as the scan it replaces, so the bounds resolve identically despite rounding:
+            return next((key for key, center in centers.items() if abs(center - coord) <= radius), None)
+
+        self.bounds = sorted({bound for center in centers.values() for bound in (center - radius, center + radius)})
+        #Option at every bound, and strictly between two consecutive bounds (None outside them):
+        self.on_bound = [first_covering(bound) for bound in self.bounds]
+        self.between = [None] + [first_covering((low + high) / 2) for low, high in zip(self.bounds, self.bounds[1:])]
+        self.between.append(None)
+
+    def find(self, coord):
+        """
+        Returns the option covering coord, None if no option is within radius of it.
+        """
+        i = bisect_left(self.bounds, coord)
+        if i < len(self.bounds) and self.bounds[i] == coord:
+            return self.on_bound[i]
+        return self.between[i]
@@ -0,0 +1,72 @@
+from .constants import TITLES
+from .output_schema import is_missing
+import re
+from docx.oxml.ns import qn
+from lxml.etree import SubElement
+
+
+#WordprocessingML tags written by the bulk writer:
+W_P, W_R, W_T, W_TAB, W_BR = qn('w:p'), qn('w:r'), qn('w:t'), qn('w:tab'), qn('w:br')
+W_RPR, W_HIGHLIGHT, W_VAL = qn('w:rPr'), qn('w:highlight'), qn('w:val')
+W_TC, W_TCPR, XML_SPACE = qn('w:tc'), qn('w:tcPr'), qn('xml:space')
+#Tabs and line breaks are written as their own elements, like python-docx does:
+TEXT_BREAK_REGEX = re.compile(r'([\t\r\n])')
+
+
+def _append_run(paragraph, text, highlight=False):
+    """
+    Appends a run containing text to a paragraph element, producing the same XML as python-docx's
+    Paragraph.add_run (one w:t per stretch of text, w:tab and w:br for tabs and line breaks).
+    """
+    run = SubElement(paragraph, W_R)
+    if highlight:
+        SubElement(SubElement(run, W_RPR), W_HIGHLIGHT).set(W_VAL, 'yellow')
+    for part in TEXT_BREAK_REGEX.split(text):
+        if part == '\t':
+            SubElement(run, W_TAB)
+        elif part == '\r' or part == '\n':
+            SubElement(run, W_BR)
+        elif part:
+            t = SubElement(run, W_T)
+            t.text = part
+            if len(part.strip()) < len(part):
+                t.set(XML_SPACE, 'preserve')
+
+
+def _set_cell_text(tc, text):
+    """
+    Replaces the contents of a cell element with a single paragraph containing text, like
+    assigning python-docx's Cell.text.
+    """
+    for child in list(tc):
+        if child.tag != W_TCPR:
+            tc.remove(child)
+    _append_run(SubElement(tc, W_P), text)
+
+
+def write_table(table, guests_rows):
+    """
+    Fills a table created by GuestDocumentGenerator.create_table with the columns of up to three
+    guests in a single pass over its rows. The cell elements are written directly instead of going
+    through python-docx's Cell objects (which search the table again on every access), the XML is
+    the same as populate_table filling the guests one after the other: missing values are written
+    as 'M', and the title of a row is highlighted in yellow when the first guest misses it, followed
+    by an empty highlighted run for every other guest missing it.
+
+    Args:
+        table (Table): empty table of the page
+        guests_rows (list): values of every guest of the page, as returned by get_row_values
+
+    Returns:
+        None
+    """
+    for tr, title, row_values in zip(table._tbl.tr_lst, TITLES, zip(*guests_rows)):
+        title_tc, *data_tcs = tr.iterchildren(W_TC)
+        title_paragraph = title_tc.find(W_P)
+        for guest, (data_tc, value) in enumerate(zip(data_tcs, row_values)):
+            missing = is_missing(value)
+            _set_cell_text(data_tc, 'M' if missing else value)
+            if guest == 0:
+                _append_run(title_paragraph, title, highlight=missing)
+            elif missing:
+                _append_run(title_paragraph, '', highlight=True)
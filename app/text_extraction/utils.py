@@ -1,6 +1,5 @@
 import os
 from .constants import SPLIT_THRESHOLD
-from docx.enum.section import WD_ORIENT
 
 
 def get_files_in_directory(directory, ext='.pdf'):
@@ -29,6 +28,9 @@ def change_orientation(document):
     Returns:
         None
     """
+    #Imported here so the extraction doesn't load python-docx:
+    from docx.enum.section import WD_ORIENT
+
     #Select section of word document where table will go:
     current_section = document.sections[0]
 
@@ -39,7 +41,7 @@ def change_orientation(document):
 
 
 
-def check_for_split_fields(layout):
+def check_for_split_fields(summary):
     """
     Checks if the fields of the PDF are pre-split based on the average length of text in the 
     first page of the PDF. If the average text length is less than SPLIT_THRESHOLD (user defined global
@@ -49,16 +51,12 @@ def check_for_split_fields(layout):
     result in proper text split.
 
     Args:
-        layout (LTPage): page containing the elements of the pdf document.
+        summary (Page_summary): summary of the page, holds the total width of its elements.
     
     Returns:
         bool: True is the fields are split, False otherwise
     """
-    num_items = len(layout._objs)
-    total_width = 0
-
-    for item in layout:
-        total_width += item.width
+    num_items = len(summary.items)
 
-    return True if (total_width / num_items < SPLIT_THRESHOLD) else False
+    return True if (summary.total_width / num_items < SPLIT_THRESHOLD) else False
 
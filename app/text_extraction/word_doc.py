@@ -1,7 +1,12 @@
-from .constants import TITLES
+from .constants import TITLES, MAX_WORKERS, MANIFEST_ENABLED, CACHE_ENABLED, BULK_TABLE_WRITER, GUESTS_PER_PAGE
+from .containers import guest_record
 from .utils import change_orientation
-from .data_extraction import extract_customer_data
-from .formatting_utils import convert_height, convert_weight, format_title_cells
+from .parallel_extraction import extract_guest_files
+from .manifest import extract_guest_files_incremental, get_manifest_path
+from . import instrumentation
+from .formatting_utils import format_title_cells
+from .output_schema import get_guest_data, get_guests_rows, get_row_values, fill_missing
+from .table_writer import write_table
 from docx import Document
 from docx.shared import Inches
 from docx.enum.text import WD_COLOR_INDEX
@@ -13,15 +18,20 @@ class GuestDocumentGenerator:
     A class to generate Word documents containing guest information tables.
     """
     
-    def __init__(self, file_path):
+    def __init__(self, file_path, output_dir=None):
         """
         Initializes the GuestDocumentGenerator with a specified file path.
         
         Args:
             file_path (str): The directory containing guest files.
+            output_dir (str | None): The directory where the document is saved, None saves it next to the guest files.
         """
         self.file_path = file_path
+        self.output_dir = output_dir if output_dir is not None else file_path
         self.document = Document()
+        #Set once the document is generated:
+        self.document_path = None
+        self.guest_records = []
         self.set_page_format()
     
     def set_page_format(self):
@@ -51,181 +61,91 @@ class GuestDocumentGenerator:
         p.add_run(f'{start_date} thru {end_date}\t').font.highlight_color = WD_COLOR_INDEX.YELLOW
         p.add_run('\nCountries: MISSING').font.highlight_color = WD_COLOR_INDEX.YELLOW
     
-    def create_table(self, page_num, num_rows=29, num_cols=4):
+    def create_table(self, page_num, num_rows=None, num_cols=4):
         """
         Creates a new table formatted to fit within a single page.
         
         Args:
             page_num (int): page number currently being processed
-            num_rows (int): Number of rows in the table.
+            num_rows (int | None): Number of rows in the table, None has a row per title of the output schema.
             num_cols (int): Number of columns in the table.
         
         Returns:
             Table: Empty table object to be populated with guest information
         """
+        if num_rows is None:
+            num_rows = len(TITLES)
         if page_num != 0:
             self.document.add_page_break()
         table = self.document.add_table(rows=num_rows, cols=num_cols)
         table.style = "Table Grid"
         return table
 
-    def populate_table(self, table, guest_data, guest):
+    def populate_table(self, table, guest_data, guest, row_values=None):
         """
         Populates table in word document with all the client information and makes
-        a call to the format_title_cells function.
+        a call to the format_title_cells function. Reference implementation of
+        write_table, used when BULK_TABLE_WRITER is disabled.
 
         Args:
             table (Table): table for storing client data
             guest_data (list): contains tuples of paired data (field, data)
             guest (int): the number of the guest (position)
+            row_values (list | None): values of the guest's rows if already rendered
 
         Returns:
-            None
+            list: values of the guest's rows, as returned by get_row_values
         """
         #Retrieve title cells:
         title_cells = table.columns[0].cells
         #Add client data:
         data_cells = table.columns[guest + 1].cells
-
-        #Name:
-        ind = 0
-        data_cells[ind].text = guest_data.get('full name (as shown on passport):', 'M')
-        ind += 1
-
-        #Preferred Name:
-        data_cells[ind].text = guest_data.get('preferred name:', 'M')
-        ind += 1
-        
-        #Address:
-        data_cells[ind].text = f"{str(guest_data.get('street address:', 'M'))} \
-                \n{guest_data.get('city:', 'M')}, {guest_data.get('state/province:', 'M')}, {guest_data.get('zip code:', 'M')}\
-                \n\n{guest_data.get('phone number:', 'M')}-Home"
-        ind += 1
-        
-        #Birth date:
-        response = guest_data.get('date of birth (mm/dd/yyyy):', 'M')
-        data_cells[ind].text = response
-        ind += 1
-        
-        #Age:
-        data_cells[ind].text = guest_data.get('age at time of safari:', 'M')
-        ind += 1
-        
-        #Gender:
-        data_cells[ind].text = guest_data.get('gender', 'M')
-        ind += 1
-
-        #Email:
-        data_cells[ind].text = guest_data.get('email:', 'M')
-        ind += 1
-        
-        #Passport country/number:
-        data_cells[ind].text = f"{guest_data.get('passport country:', 'M')} \n{guest_data.get('passport number:', 'M')}"
-        ind += 1
-        
-        #Place of Issue:
-        data_cells[ind].text = guest_data.get('passport place of issue:', 'M')
-        ind += 1
-
-        #Date of Issue:
-        data_cells[ind].text = guest_data.get('date of issue:', 'M')
-        ind += 1
-        
-        #Expiration Date:
-        data_cells[ind].text = guest_data.get('passport expiration date:', 'M')
-        ind += 1
-        
-        #Room Type:
-        data_cells[ind].text = f"{guest_data.get('room type', 'M')} / {guest_data.get('bed type', 'M')}"
-        ind += 1
-        
-        #Room Mate:
-        data_cells[ind].text = guest_data.get('roommate', 'M')
-        ind += 1
-        
-        #Emergency contact:
-        data_cells[ind].text = f"{guest_data.get('full name:', 'M')} \n{guest_data.get('emergency email:', 'M')}" +\
-                                f"\n{guest_data.get('phone number (include country code of outside usa):', 'M')}"
-        ind += 1
-        
-        #Special Diet:
-        data_cells[ind].text = guest_data.get('diet preference', 'M')
-        ind += 1
-
-        #Exclude from Diet:
-        data_cells[ind].text = guest_data.get('diet exclusions', 'None')
-        ind += 1
-        
-        #Allergies:
-        data_cells[ind].text = f"Any allergies: {guest_data.get('any allergies', 'None')}" +\
-                            f"\nAntibiotic allergies: {guest_data.get('antibiotic allergies', 'None')}"
-        ind += 1
-
-        #Allergies life threatening:
-        data_cells[ind].text = f"Life threatening allergies: {guest_data.get('life threatening allergies', 'None')}"
-        ind += 1
-        
-        #Medications:
-        data_cells[ind].text = guest_data.get('medications', 'None')
-        ind += 1
-        
-        #Blood type:
-        data_cells[ind].text = f"{guest_data.get('blood type (if known):', 'M')}"
-        ind += 1
-
-        #Other Medical information:
-        data_cells[ind].text = guest_data.get("equipment", 'M') + ' ' + guest_data.get("physical limitations", 'M')
-        ind += 1
-
-        #Fitness Level:
-        data_cells[ind].text = guest_data.get('fitness', 'M')
-        ind += 1
-
-        #Travel/Medical insurance:
-        data_cells[ind].text = f"{guest_data.get('Travel insurance:', 'M')}"
-        ind += 1
-
-        #Flying Doctors:
-        data_cells[ind].text = f"{guest_data.get('Flying Doctors:', 'M')}"
-        ind += 1
-
-        #Special Occasions:
-        data_cells[ind].text = guest_data.get('what is the occasion:', '') + " " + guest_data.get('celebrating', '')
-        ind += 1
-
-        #Height:
-        data_cells[ind].text = convert_height(guest_data.get("height (ft' inch''):", 'M'))
-        ind += 1
-        
-        #Weight:
-        data_cells[ind].text = convert_weight(guest_data.get("weight (pounds):", '') + guest_data.get("weight (lbs):", ''))
-        ind += 1
-        
-        #Shirt size:
-        data_cells[ind].text = f"{guest_data.get('shirt size', 'M')}"
-        ind += 1
-
-        #Additional info:
-        data_cells[ind].text = f"{guest_data.get('Additional info:', 'M')}"
-        ind += 1
-
-        ###------Add an extra row to the table if needed (could be based on a condition):-------###
-        # row_cells = table.add_row().cells 
-        # row_cells[0].text = 'Apple'
-        # row_cells[1].text = '10'
+        if row_values is None:
+            row_values = get_row_values(guest_data)
+        for data_cell, value in zip(data_cells, row_values):
+            data_cell.text = value
 
         #Format all the cells based on input or lack of input:
         for title, data_cell, title_cell in zip(TITLES, data_cells, title_cells):
             format_title_cells(title, data_cell, title_cell)
         
-        return None
+        return row_values
 
-    def generate_document(self, guest_files):
+    def populate_page(self, table, extractions, bulk=BULK_TABLE_WRITER, guests_rows=None):
         """
-        Generates a Word document containing guest information and saves it.
-        
+        Populates the table of a page with the data of its guests.
+
         Args:
-            guest_files (list): List of guest file names.
+            table (Table): table of the page
+            extractions (list): Extraction_result of the (up to GUESTS_PER_PAGE) guests of the page
+            bulk (bool): whether to write the whole table at once with write_table, instead of
+            one guest at a time with populate_table (same output, several times slower)
+            guests_rows (list | None): row values of the guests if already rendered, see get_guests_rows
+
+        Returns:
+            list: row values of every guest of the page
+        """
+        if guests_rows is None:
+            guests_rows = get_guests_rows(extractions)
+        if bulk:
+            write_table(table, guests_rows)
+            return guests_rows
+        return [self.populate_table(table, get_guest_data(extraction), guest, row_values)
+                for guest, (extraction, row_values) in enumerate(zip(extractions, guests_rows))]
+
+    def build_document(self, guest_files, extraction_results, guests_rows=None):
+        """
+        Fills the document with the guests' extracted data and saves it. The path of the document
+        and the Guest_record of every guest (its rows as written) are kept in document_path and
+        guest_records.
+
+        Args:
+            guest_files (list): List of guest file names, the trip name is read from the first one.
+            extraction_results (list): Extraction_result of every guest form, in the order of guest_files.
+            guests_rows (list | None): Row values of every guest if already rendered for another output, see get_guests_rows.
+
+        Returns:
+            str: The path of the saved document.
         """
         # Rotate page if there are more than 2 guests:
         num_guests = len(guest_files)
@@ -237,16 +157,61 @@ class GuestDocumentGenerator:
         trip_name = " ".join(full_name)
         self.create_header(trip_name, "MISSING", "MISSING")
 
-        page_num = 0
-        for guest_num, guest_file in enumerate(guest_files):
-            if guest_num % 3 == 0:
-                table = self.create_table(page_num)
-                page_num += 1
-            guest_info_dict = {}
-            extract_customer_data(Path(f"{self.file_path}/{guest_file}"), guest_info_dict)
-            self.populate_table(table, guest_info_dict, guest_num % 3)
-    
-        self.document.save(f'{self.file_path}/Guest Info {full_name[1]} {full_name[0]}.docx')
-
-
+        # Fill one table of GUESTS_PER_PAGE guests per page
+        if guests_rows is None:
+            guests_rows = get_guests_rows(extraction_results)
+        for page_num, first_guest in enumerate(range(0, num_guests, GUESTS_PER_PAGE)):
+            table = self.create_table(page_num)
+            with instrumentation.span('populate_table', page=page_num + 1):
+                page_guests = slice(first_guest, first_guest + GUESTS_PER_PAGE)
+                self.populate_page(table, extraction_results[page_guests], guests_rows=guests_rows[page_guests])
+
+        self.document_path = f'{self.output_dir}/Guest Info {full_name[1]} {full_name[0]}.docx'
+        with instrumentation.span('save_document'):
+            self.document.save(self.document_path)
+
+        #Rows as written in the document, for previews without reading it back:
+        self.guest_records = [guest_record(extraction.file_path, fill_missing(row_values), extraction.error)
+                              for extraction, row_values in zip(extraction_results, guests_rows)]
+        return self.document_path
+
+    def generate_document(self, guest_files, max_workers=MAX_WORKERS, use_manifest=MANIFEST_ENABLED,
+                          progress_callback=None, cancel_event=None, use_cache=CACHE_ENABLED):
+        """
+        Generates a Word document containing guest information and saves it. The guest forms are
+        extracted in parallel, a guest whose form couldn't be extracted is left with missing ("M")
+        values instead of aborting the document (see build_document). When the instrumentation is
+        enabled, the timings of every stage are reported once the document is saved (see
+        instrumentation.py).
+        
+        Args:
+            guest_files (list): List of guest file names.
+            max_workers (int | None): Maximum number of extraction processes, None uses every core.
+            use_manifest (bool): Whether to only extract the forms changed since the manifest next to the document.
+            progress_callback (callable | None): Called with the Extraction_result of every guest form once extracted.
+            cancel_event (threading.Event | None): Cancels the extraction once set, no document is saved.
+            use_cache (bool): Whether the extracted forms are read and stored in the on-disk cache.
 
+        Returns:
+            list: Extraction_result of every guest form that couldn't be extracted.
+        """
+        with instrumentation.profiled('generate_document'):
+            # Extract every guest form before filling the tables
+            guest_paths = [Path(f"{self.file_path}/{guest_file}") for guest_file in guest_files]
+            with instrumentation.span('extract_files'):
+                if use_manifest:
+                    manifest_path = get_manifest_path(self.output_dir)
+                    extraction_results = extract_guest_files_incremental(guest_paths, manifest_path, max_workers=max_workers,
+                                                                         progress_callback=progress_callback,
+                                                                         cancel_event=cancel_event, use_cache=use_cache)
+                else:
+                    extraction_results = extract_guest_files(guest_paths, max_workers=max_workers,
+                                                             progress_callback=progress_callback, cancel_event=cancel_event,
+                                                             use_cache=use_cache)
+
+            self.build_document(guest_files, extraction_results)
+
+        #Summary of the timed stages (only when the instrumentation is enabled):
+        instrumentation.emit_report(self.output_dir)
+
+        return [extraction for extraction in extraction_results if extraction.error]
@@ -0,0 +1,239 @@
+from .constants import WORKER_POLL_INTERVAL, WORKER_START_METHODS
+import logging
+import multiprocessing
+import sys
+from collections import deque
+from multiprocessing.connection import wait
+from time import monotonic
+import psutil
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_peak_memory():
+    """
+    Returns the highest resident memory of the current process so far in bytes (its high-water
+    mark), or its current resident memory where the platform doesn't track the peak.
+    """
+    memory_info = psutil.Process().memory_info()
+    #Windows:
+    if hasattr(memory_info, 'peak_wset'):
+        return memory_info.peak_wset
+    try:
+        import resource
+    except ImportError:
+        return memory_info.rss
+    #Kilobytes on Linux, bytes on macOS:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def get_worker_context(function, start_methods=WORKER_START_METHODS):
+    """
+    Returns the multiprocessing context the workers are started with, see WORKER_START_METHODS.
+    The fork server imports the module of function once, the workers it forks then start with it
+    loaded.
+
+    Args:
+        function (callable): module level function run by the workers
+        start_methods (tuple): start methods by preference
+
+    Returns:
+        multiprocessing.context.BaseContext: context of the first supported start method
+    """
+    available = multiprocessing.get_all_start_methods()
+    start_method = next((method for method in start_methods if method in available), 'spawn')
+    context = multiprocessing.get_context(start_method)
+    if start_method == 'forkserver' and function.__module__ != '__main__':
+        context.set_forkserver_preload([function.__module__])
+    return context
+
+
+def _worker_main(conn, function):
+    """
+    Worker process loop: runs function on the arguments received on conn and sends back
+    (True, value, peak memory), or (False, error message, peak memory) if it raised, until None
+    is received.
+    """
+    while True:
+        try:
+            args = conn.recv()
+        except EOFError:
+            break
+        if args is None:
+            break
+        try:
+            reply = (True, function(*args))
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        conn.send((*reply, get_peak_memory()))
+
+
+class _Worker:
+    """
+    A worker process, its end of the pipe and the task it's running.
+    """
+
+    def __init__(self, context, function):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, function), daemon=True)
+        self.process.start()
+        #The parent keeps only its end so a dead worker is seen as EOF:
+        child_conn.close()
+        self.task = None
+        self.started = None
+
+    def run(self, task):
+        self.task = task
+        self.started = monotonic()
+        self.conn.send(task[1])
+
+    def get_memory(self):
+        """
+        Returns the resident memory of the worker in bytes, 0 if it already exited.
+        """
+        try:
+            return psutil.Process(self.process.pid).memory_info().rss
+        except psutil.Error:
+            return 0
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.process.join()
+        self.conn.close()
+
+
+class IsolatedWorkerPool:
+    """
+    Runs tasks on worker processes watched from the calling thread. A task running longer than
+    timeout, or whose worker grows past memory_limit bytes, gets its worker killed and replaced,
+    so a pathological file never stalls the rest of the tasks. A worker that crashes (e.g. killed
+    by the OS) only fails its own task. Use as a context manager, the workers are killed on exit.
+
+    The memory high-water mark of every worker is kept in memory_peaks (bytes by process id), as
+    reported by the worker after each task or sampled while checking its budget, to size the
+    number of workers and the memory budget.
+    """
+
+    def __init__(self, function, num_workers, timeout=None, memory_limit=None, poll_interval=WORKER_POLL_INTERVAL,
+                 start_methods=WORKER_START_METHODS):
+        """
+        Args:
+            function (callable): module level function run by the workers, it's pickled by
+            reference (the workers import its module) and its arguments and return value must be
+            picklable
+            num_workers (int): number of worker processes
+            timeout (float | None): wall-clock seconds allowed per task, None is unlimited
+            memory_limit (int | None): resident memory allowed per worker in bytes, None is unlimited
+            poll_interval (float): seconds between two checks of the budgets
+            start_methods (tuple): start methods of the workers by preference, see get_worker_context
+        """
+        self.function = function
+        self.num_workers = max(1, num_workers)
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.poll_interval = poll_interval
+        self._context = get_worker_context(function, start_methods)
+        self._workers = []
+        self.memory_peaks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(kill=exc_type is not None)
+        return False
+
+    def close(self, kill=False):
+        """
+        Stops every worker, kill terminates them without waiting for their current task.
+        """
+        for worker in self._workers:
+            worker.stop(kill=kill or worker.task is not None)
+        self._workers = []
+
+    def _record_memory(self, worker, memory):
+        pid = worker.process.pid
+        self.memory_peaks[pid] = max(self.memory_peaks.get(pid, 0), memory)
+
+    def _check_budget(self, worker, now):
+        """
+        Returns why a busy worker must be stopped, None while it's within its budget.
+        """
+        if self.timeout is not None and now - worker.started > self.timeout:
+            return f"TimeoutError: took longer than {self.timeout:g}s"
+        if self.memory_limit is not None:
+            memory = worker.get_memory()
+            self._record_memory(worker, memory)
+            if memory > self.memory_limit:
+                return f"MemoryError: used {memory / 2**20:.0f} MB, more than {self.memory_limit / 2**20:.0f} MB"
+        return None
+
+    def _replace(self, worker, respawn):
+        """
+        Kills a worker, a new one takes its place if tasks are still queued.
+        """
+        worker.stop(kill=True)
+        if respawn:
+            self._workers[self._workers.index(worker)] = _Worker(self._context, self.function)
+        else:
+            self._workers.remove(worker)
+
+    def imap_unordered(self, tasks, stop_event=None):
+        """
+        Runs the tasks, yielding their outcome in completion order.
+
+        Args:
+            tasks (iterable): (key, arguments tuple) of every task, started in this order
+            stop_event (threading.Event | None): once set, no more outcomes are yielded and the
+            tasks not finished yet are left to close() to kill
+
+        Yields:
+            tuple: (key, value, error), error is None if the task succeeded, otherwise value is None
+            and error describes the failure (exception raised, budget exceeded or worker crash)
+        """
+        queue = deque(tasks)
+        while len(self._workers) < min(self.num_workers, len(queue)):
+            self._workers.append(_Worker(self._context, self.function))
+        has_budget = self.timeout is not None or self.memory_limit is not None
+
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return
+            for worker in self._workers:
+                if worker.task is None and queue:
+                    worker.run(queue.popleft())
+            busy = {worker.conn: worker for worker in self._workers if worker.task is not None}
+            if not busy:
+                return
+
+            poll_interval = self.poll_interval if has_budget or stop_event is not None else None
+            ready = wait(list(busy), timeout=poll_interval)
+            now = monotonic()
+            for conn, worker in busy.items():
+                key = worker.task[0]
+                if conn in ready:
+                    try:
+                        succeeded, value, peak_memory = conn.recv()
+                    except (EOFError, OSError):
+                        worker.process.join()
+                        error = f"WorkerCrashed: the worker process exited with code {worker.process.exitcode}"
+                        self._replace(worker, respawn=bool(queue))
+                        yield key, None, error
+                        continue
+                    worker.task = None
+                    self._record_memory(worker, peak_memory)
+                    yield (key, value, None) if succeeded else (key, None, value)
+                else:
+                    error = self._check_budget(worker, now)
+                    if error is not None:
+                        logger.debug("Stopping the worker of task %s: %s", key, error)
+                        self._replace(worker, respawn=bool(queue))
+                        yield key, None, error
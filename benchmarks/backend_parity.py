@@ -0,0 +1,93 @@
+"""
+Checks that every PDF backend produces the same customer data as the pdfminer backend.
+
+Usage (from the repository root):
+    python -m benchmarks.backend_parity <folder with guest forms> [<folder> ...]
+
+Prints every prompt whose response differs between backends together with the extraction time
+of each backend, and exits with status 1 if any form differs.
+"""
+import os
+import sys
+import time
+from app.text_extraction.data_extraction import extract_customer_data
+from app.text_extraction.pdf_backends import PDF_BACKENDS
+
+
+REFERENCE_BACKEND = 'pdfminer'
+
+
+def normalize(value):
+    """
+    Makes layout objects comparable across backends. The pair_text fallback can map raw layout
+    objects (e.g. checkmark figures) instead of strings, those are compared by text or position.
+
+    Args:
+        value: key or value of the customer data
+
+    Returns:
+        str | bool | None: comparable representation of the value
+    """
+    if value is None or isinstance(value, (str, bool)):
+        return value
+    if hasattr(value, 'get_text'):
+        return value.get_text()
+    return f"<{getattr(value, 'name', 'object')} at {tuple(round(coord, 2) for coord in value.bbox)}>"
+
+
+def extract_with_backends(pdf_file_path, timings):
+    """
+    Extracts a guest form with every backend.
+
+    Args:
+        pdf_file_path (str): path to the guest form
+        timings (dict): accumulated extraction time per backend, updated in place
+
+    Returns:
+        dict: customer data per backend name
+    """
+    results = {}
+    for backend in PDF_BACKENDS:
+        start = time.perf_counter()
+        customer_data = {}
+        extract_customer_data(pdf_file_path, customer_data, backend=backend, use_cache=False)
+        timings[backend] = timings.get(backend, 0) + time.perf_counter() - start
+        results[backend] = {normalize(key): normalize(value) for key, value in customer_data.items()}
+    return results
+
+
+def compare_folders(folders):
+    """
+    Compares the backends on every PDF in the given folders.
+
+    Args:
+        folders (list): folders containing guest forms
+
+    Returns:
+        int: number of forms whose customer data differs between backends
+    """
+    timings, num_files, num_mismatches = {}, 0, 0
+    for folder in folders:
+        for file_name in sorted(f for f in os.listdir(folder) if f.endswith('.pdf')):
+            results = extract_with_backends(os.path.join(folder, file_name), timings)
+            num_files += 1
+            reference = results[REFERENCE_BACKEND]
+            for backend, customer_data in results.items():
+                if customer_data == reference:
+                    continue
+                num_mismatches += 1
+                print(f"{file_name}: {backend} differs from {REFERENCE_BACKEND}")
+                for key in sorted(set(reference) | set(customer_data), key=str):
+                    if reference.get(key) != customer_data.get(key):
+                        print(f"    {key!r}: {reference.get(key)!r} != {customer_data.get(key)!r}")
+
+    print(f"{num_files} forms compared, {num_mismatches} mismatches")
+    for backend, seconds in timings.items():
+        print(f"{backend:>10}: {seconds:.2f}s ({seconds / max(num_files, 1) * 1000:.1f} ms per form)")
+    return num_mismatches
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    sys.exit(1 if compare_folders(sys.argv[1:]) else 0)
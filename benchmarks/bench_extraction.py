@@ -0,0 +1,207 @@
+"""
+Times the extraction pipeline on synthetic trips of 1, 10, 100 and 1000 guests (see
+synthetic_forms.py) and saves the results to JSON, so regressions can be compared between commits.
+
+Benchmarks:
+    extract_customer_data       every form of the trip, one after the other, without the disk cache
+    create_field_entry_mapping  the Xi input pages of the trip, prompts and inputs already laid out
+    pair_text                   the pages of flat forms (no Xi figure), already laid out
+    generate_document           the whole Word document, without the manifest or the disk cache
+
+Usage (from the repository root):
+    python -m benchmarks.bench_extraction [--sizes 1 10 100] [--repeats 3] [--output results.json]
+                                          [--compare previous_results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import cycle, islice
+from benchmarks.synthetic_forms import generate_trip
+from app.text_extraction import GuestDocumentGenerator, get_files_in_directory
+from app.text_extraction.constants import FORM_PAGE_NUMBERS
+from app.text_extraction.data_extraction import (check_for_vectorized_image, clear_form_caches, extract_customer_data,
+                                                 get_form_fields)
+from app.text_extraction.form_templates import select_form_template
+from app.text_extraction.page_summary import summarize_page
+from app.text_extraction.pdf_backends import get_pdf_backend
+from app.text_extraction.prompt_response_mapping import create_field_entry_mapping, pair_text
+from app.text_extraction.utils import check_for_split_fields
+
+
+DEFAULT_SIZES = [1, 10, 100, 1000]
+DEFAULT_OUTPUT = 'bench_extraction.json'
+#Distinct forms laid out for the mapping benchmarks, they are reused to reach the trip size:
+PAGE_POOL_SIZE = 8
+
+
+def get_commit():
+    """
+    Returns the short hash of the checked out commit, None outside a git repository.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_pages(pdf_file_paths, backend):
+    """
+    Lays out and summarizes the pages of the given forms once, so the mapping benchmarks only time
+    the mapping.
+
+    Args:
+        pdf_file_paths (list): guest forms to lay out
+        backend (str): name of the PDF backend
+
+    Returns:
+        tuple: (arguments of create_field_entry_mapping for every page with an Xi figure, summary of
+        every page without one), both as one list of pages per form since a mapping spans the pages
+    """
+    xi_forms, flat_forms = [], []
+    pdf_backend = get_pdf_backend(backend)
+    for pdf_file_path in pdf_file_paths:
+        xi_pages, flat_pages = [], []
+        for page in pdf_backend.extract_pages(pdf_file_path, page_numbers=FORM_PAGE_NUMBERS):
+            summary = summarize_page(page)
+            if summary.pageid == 1:
+                template = select_form_template(summary)
+                presplit_fields = template.presplit
+                if presplit_fields is None:
+                    presplit_fields = check_for_split_fields(summary)
+            customer_inputs = {'single_input': [], 'checkmarks': []}
+            if check_for_vectorized_image(summary, customer_inputs):
+                form_fields = get_form_fields(summary, presplit_fields, template)
+                xi_pages.append((form_fields, customer_inputs, summary.pageid, template))
+            else:
+                flat_pages.append(summary)
+        if xi_pages:
+            xi_forms.append(xi_pages)
+        if flat_pages:
+            flat_forms.append(flat_pages)
+    return xi_forms, flat_forms
+
+
+def time_runs(function, repeats):
+    """
+    Runs function repeats times.
+
+    Returns:
+        list: duration of every run in seconds
+    """
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def run_benchmarks(sizes, repeats, work_dir, backend, max_workers):
+    """
+    Runs every benchmark for every trip size.
+
+    Args:
+        sizes (list): number of guests of every trip
+        repeats (int): runs of every benchmark, the best one is reported
+        work_dir (str): folder where the trips and documents are written
+        backend (str): name of the PDF backend
+        max_workers (int | None): extraction processes used by generate_document
+
+    Returns:
+        list: result of every benchmark and size
+    """
+    results = []
+
+    def record(benchmark, guests, durations):
+        best = min(durations)
+        results.append({'benchmark': benchmark, 'guests': guests, 'repeats': len(durations), 'best_s': best,
+                        'mean_s': sum(durations) / len(durations), 'per_guest_ms': best * 1000 / guests})
+        print(f"{benchmark:<28}{guests:>6}{best:>12.3f}s{best * 1000 / guests:>12.2f}ms/guest", flush=True)
+
+    pool_paths = generate_trip(os.path.join(work_dir, 'pool'), PAGE_POOL_SIZE, 'mixed', seed=1)
+    xi_forms, flat_forms = prepare_pages(pool_paths, backend)
+
+    for guests in sizes:
+        trip_folder = os.path.join(work_dir, f'trip_{guests}')
+        pdf_file_paths = generate_trip(trip_folder, guests, 'mixed')
+
+        def extract_trip():
+            clear_form_caches()
+            for pdf_file_path in pdf_file_paths:
+                extract_customer_data(pdf_file_path, {}, backend=backend, use_cache=False)
+        record('extract_customer_data', guests, time_runs(extract_trip, repeats))
+
+        guest_xi_forms = list(islice(cycle(xi_forms), guests))
+        def map_xi_pages():
+            for xi_pages in guest_xi_forms:
+                mapping = {}
+                for form_fields, customer_inputs, pageid, template in xi_pages:
+                    create_field_entry_mapping(form_fields, customer_inputs, mapping, pageid, template)
+        record('create_field_entry_mapping', guests, time_runs(map_xi_pages, repeats))
+
+        guest_flat_forms = list(islice(cycle(flat_forms), guests))
+        def pair_flat_pages():
+            for flat_pages in guest_flat_forms:
+                mapping = {}
+                for summary in flat_pages:
+                    pair_text(summary, mapping, y_delta = 10.0, x_delta = 25.0)
+        record('pair_text', guests, time_runs(pair_flat_pages, repeats))
+
+        guest_files = get_files_in_directory(trip_folder, ext='.pdf')
+        output_dir = os.path.join(work_dir, f'output_{guests}')
+        os.makedirs(output_dir, exist_ok=True)
+        def generate_document():
+            guest_document = GuestDocumentGenerator(file_path=trip_folder, output_dir=output_dir)
+            guest_document.generate_document(guest_files, max_workers=max_workers, use_manifest=False, use_cache=False)
+        record('generate_document', guests, time_runs(generate_document, repeats))
+
+    return results
+
+
+def compare_results(results, previous):
+    """
+    Prints the ratio between the best times of two runs, above 1 means slower than before.
+    """
+    previous_times = {(result['benchmark'], result['guests']): result['best_s'] for result in previous['results']}
+    print(f"\nCompared to {previous.get('commit') or 'previous run'} ({previous.get('timestamp', '?')}):")
+    for result in results:
+        previous_time = previous_times.get((result['benchmark'], result['guests']))
+        if previous_time:
+            print(f"{result['benchmark']:<28}{result['guests']:>6}{result['best_s'] / previous_time:>10.2f}x")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Times the extraction pipeline on synthetic trips.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="number of guests of every trip")
+    parser.add_argument('--repeats', type=int, default=1, help="runs of every benchmark, the best one is reported")
+    parser.add_argument('--backend', default='pdfminer', help="PDF backend ('pdfminer' or 'pymupdf')")
+    parser.add_argument('--workers', type=int, default=None, help="extraction processes of generate_document")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="JSON file the results are written to")
+    parser.add_argument('--compare', default=None, help="JSON results of a previous run to compare with")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"{'benchmark':<28}{'guests':>6}{'best':>13}{'':>18}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run_benchmarks(args.sizes, args.repeats, work_dir, args.backend, args.workers)
+
+    report = {'commit': get_commit(), 'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+              'backend': args.backend, 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare_results(results, json.load(f))
+    sys.exit(0)
@@ -0,0 +1,141 @@
+"""
+Times the import of the application's entry points, each in a fresh interpreter, and checks that
+the extraction entry points don't load the GUI or python-docx. Exits with 1 when a lean entry
+point loads a forbidden module or is slower than --max-ratio times the compared run, so it can
+guard against import regressions.
+
+Entry points:
+    main            main.py as imported by a spawned worker process (the GUI isn't started)
+    package         app.text_extraction
+    extraction      app.text_extraction.parallel_extraction, what a worker needs to extract a form
+    cli             app.cli
+    gui             app.gui, for reference (needs tkinter)
+
+Usage (from the repository root):
+    python -m benchmarks.bench_imports [--repeats 5] [--output results.json] [--compare previous_results.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+from benchmarks.bench_extraction import get_commit
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = 'bench_imports.json'
+GUI_MODULES = ['tkinter', 'ttkbootstrap', 'prettytable']
+DOCX_MODULES = ['docx']
+#Module imported by every entry point and the modules it must not load:
+ENTRY_POINTS = {
+    'main': ('main', GUI_MODULES + DOCX_MODULES + ['pdfminer']),
+    'package': ('app.text_extraction', GUI_MODULES + DOCX_MODULES + ['pdfminer']),
+    'extraction': ('app.text_extraction.parallel_extraction', GUI_MODULES + DOCX_MODULES),
+    'cli': ('app.cli', GUI_MODULES + DOCX_MODULES),
+    'gui': ('app.gui', []),
+}
+#Run in the fresh interpreter, prints the import time and the loaded top level packages as JSON:
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'modules': sorted({{name.split('.')[0] for name in sys.modules}})}}))
+"""
+
+
+def time_import(module):
+    """
+    Imports a module in a fresh interpreter started from the repository root.
+
+    Returns:
+        dict: import time in seconds and top level packages loaded, None if the import failed
+    """
+    process = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT.format(module=module)], cwd=ROOT_DIR,
+                             capture_output=True, text=True)
+    if process.returncode != 0:
+        print(f"Importing {module} failed: {process.stderr.strip().splitlines()[-1]}", file=sys.stderr)
+        return None
+    return json.loads(process.stdout.splitlines()[-1])
+
+
+def run_benchmarks(entry_points, repeats):
+    """
+    Times every entry point and lists the forbidden modules it loaded.
+
+    Args:
+        entry_points (list): names of the entry points, see ENTRY_POINTS
+        repeats (int): imports of every entry point, the best one is reported
+
+    Returns:
+        list: result of every entry point that could be imported
+    """
+    results = []
+    for name in entry_points:
+        module, forbidden = ENTRY_POINTS[name]
+        runs = [time_import(module) for _ in range(repeats)]
+        if None in runs:
+            continue
+        best = min(run['seconds'] for run in runs)
+        loaded = sorted(set(forbidden).intersection(runs[0]['modules']))
+        results.append({'benchmark': name, 'module': module, 'repeats': repeats, 'best_s': best,
+                        'forbidden_loaded': loaded})
+        print(f"{name:<12}{module:<42}{best * 1000:>9.1f}ms  {', '.join(loaded) or 'ok'}", flush=True)
+    return results
+
+
+def compare_results(results, previous, max_ratio):
+    """
+    Prints the ratio between the best times of two runs, above 1 means slower than before.
+
+    Returns:
+        list: entry points slower than max_ratio times the previous run
+    """
+    previous_times = {result['benchmark']: result['best_s'] for result in previous['results']}
+    print(f"\nCompared to {previous.get('commit') or 'previous run'} ({previous.get('timestamp', '?')}):")
+    regressions = []
+    for result in results:
+        previous_time = previous_times.get(result['benchmark'])
+        if previous_time:
+            ratio = result['best_s'] / previous_time
+            print(f"{result['benchmark']:<12}{ratio:>10.2f}x")
+            if ratio > max_ratio:
+                regressions.append(result['benchmark'])
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Times the import of the application's entry points.")
+    parser.add_argument('entry_points', nargs='*', metavar='entry_point',
+                        help=f"entry points to import, among {', '.join(ENTRY_POINTS)} (default: all)")
+    parser.add_argument('--repeats', type=int, default=5, help="imports of every entry point, the best one is reported")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="JSON file the results are written to")
+    parser.add_argument('--compare', default=None, help="JSON results of a previous run to compare with")
+    parser.add_argument('--max-ratio', type=float, default=1.5,
+                        help="slowdown against the compared run reported as a regression")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.entry_points if name not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"unknown entry points: {', '.join(unknown)}")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"{'entry':<12}{'module':<42}{'best':>11}  forbidden modules loaded")
+    results = run_benchmarks(args.entry_points or list(ENTRY_POINTS), args.repeats)
+
+    report = {'commit': get_commit(), 'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'python': sys.version.split()[0], 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    failed = [result['benchmark'] for result in results if result['forbidden_loaded']]
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            failed += compare_results(results, json.load(f), args.max_ratio)
+    if failed:
+        print(f"\nImport regressions: {', '.join(failed)}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,98 @@
+"""
+Benchmarks the pair_text fallback against the original all-pairs scan on synthetic pages with many
+text boxes, and checks both produce the same mapping.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pair_text [<number of text boxes> ...]
+"""
+import random
+import sys
+import time
+from app.text_extraction.layout_primitives import LayoutPage, LayoutText
+from app.text_extraction.page_summary import summarize_page
+from app.text_extraction.prompt_response_mapping import pair_text
+
+
+DEFAULT_SIZES = [50, 200, 800, 2000]
+REPEATS = 3
+
+
+def pair_text_reference(layout, prompts_to_inputs_mapping, y_delta = 10.0, x_delta = 25.0):
+    """
+    Original implementation of pair_text, compares every layout object against every other.
+    """
+    for prompt in layout:
+        for response in layout:
+            if (prompt != response) and\
+                abs(prompt.bbox[2] - response.bbox[0]) < x_delta and \
+                abs(prompt.bbox[1] - response.bbox[1]) < y_delta:
+                try:
+                    prompt = prompt.get_text().strip()
+                    response = response.get_text().strip()
+                except AttributeError:
+                    pass
+                if layout.pageid > 1 and 'Email' in prompt:
+                    prompts_to_inputs_mapping['Emergency ' + prompt] = response
+                else:
+                    prompts_to_inputs_mapping[prompt] = response
+                break
+
+
+def make_page(num_boxes, seed=0):
+    """
+    Builds a page of prompt/response rows in two columns, with a bit of jitter so some rows
+    overlap, like a dense free text form.
+
+    Args:
+        num_boxes (int): number of text boxes on the page
+        seed (int): random seed
+
+    Returns:
+        LayoutPage: synthetic page
+    """
+    rng = random.Random(seed)
+    objs = []
+    row_height = 700 / max(num_boxes // 4, 1)
+    for i in range(num_boxes // 2):
+        column = i % 2
+        y_min = 50 + (i // 2) * row_height + rng.uniform(-2, 2)
+        x_min = 40 + column * 280 + rng.uniform(-3, 3)
+        width = rng.uniform(60, 120)
+        objs.append(LayoutText(f"Prompt {i}:\n", (x_min, y_min, x_min + width, y_min + 10)))
+        x_min += width + rng.uniform(0, 30)
+        objs.append(LayoutText(f"Response {i}\n", (x_min, y_min, x_min + 100, y_min + 10)))
+    rng.shuffle(objs)
+    return LayoutPage(2, (0, 0, 612, 792), objs)
+
+
+def pair_summarized_text(layout, prompts_to_inputs_mapping):
+    """
+    Summarizes the page and runs pair_text on it, as parse_layout does.
+    """
+    pair_text(summarize_page(layout), prompts_to_inputs_mapping)
+
+
+def time_function(function, page):
+    """
+    Returns the best time of REPEATS runs and the mapping produced.
+    """
+    best = float('inf')
+    for _ in range(REPEATS):
+        mapping = {}
+        start = time.perf_counter()
+        function(page, mapping)
+        best = min(best, time.perf_counter() - start)
+    return best, mapping
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'boxes':>6} {'all pairs':>12} {'indexed':>12} {'speedup':>8}")
+    for size in sizes:
+        page = make_page(size)
+        reference_time, reference = time_function(pair_text_reference, page)
+        indexed_time, mapping = time_function(pair_summarized_text, page)
+        if list(mapping.items()) != list(reference.items()):
+            sys.exit(f"pair_text output differs from the reference on a page with {size} boxes")
+        print(f"{size:>6} {reference_time * 1000:>10.2f}ms {indexed_time * 1000:>10.2f}ms "
+              f"{reference_time / indexed_time:>7.1f}x")
@@ -0,0 +1,444 @@
+"""
+Generates synthetic filled guest forms for benchmarking and parity checks.
+
+The forms mimic the structure of the real guest PDFs: the static prompts are drawn in the page
+content stream and the guest's answers live in a form XObject named "Xi0" (text inputs plus one
+nested form XObject per checkmark), with the checkmarks at the coordinates in constants.py. The
+"flat" revision writes the answers straight into the page content instead, which exercises the
+pair_text fallback, and the "acroform" revision stores them as fillable form fields. The static
+prompts can also be drawn in a form XObject named "Fm0", as some PDF editors save them.
+
+Usage (from the repository root):
+    python -m benchmarks.synthetic_forms <folder> [<number of guests>] [<revision>]
+"""
+import os
+import random
+import sys
+from app.text_extraction.constants import SHIRT_LOCATIONS
+from app.text_extraction.form_templates import DEFAULT_TEMPLATE
+from pdfminer.fontmetrics import FONT_METRICS
+
+
+FONT_SIZE = 10
+HELVETICA_WIDTHS = FONT_METRICS['Helvetica'][1]
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+
+FIRST_NAMES = ['John', 'Maria', 'Wei', 'Amara', 'Lukas', 'Sofia', 'Ravi', 'Emma', 'Kenji', 'Olivia']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Okafor', 'Muller', 'Rossi', 'Patel', 'Jones', 'Sato', 'Brown']
+CITIES = [('Denver', 'CO', '80202'), ('Austin', 'TX', '73301'), ('Seattle', 'WA', '98101'), ('Boston', 'MA', '02108')]
+COUNTRIES = ['USA', 'Canada', 'Germany', 'Japan']
+DIETS = ['Regular', 'Vegetarian', 'Vegan', 'Gluten-Free', 'Lactose-Free', 'Pescatarian', 'Other', 'Kosher']
+SHIRTS = ['Adult Small', 'Med', 'Large', 'XL', 'XXL']
+ROOMS = ['Single', 'Shared', 'Family Tent  ___']
+BEDS = ['Single rooms', 'Twin (one per bed)', 'Double (Shared)']
+
+#Checkmark coordinates of the form revision the parser falls back to (see FORM_TEMPLATES in constants.py):
+GENDER_X = DEFAULT_TEMPLATE.gender_maps[0][1]
+#The diet prompts are spelled as in DIET_OPTIONS, the coordinate map spells Pescatarian differently:
+DIET_X = {('Pescatarian' if diet == 'Pescaterian' else diet): x for diet, x in DEFAULT_TEMPLATE.diet_map.items()
+          if diet in DIETS or diet == 'Pescaterian'}
+ROOM_Y = dict(DEFAULT_TEMPLATE.room_map)
+BED_Y = dict(DEFAULT_TEMPLATE.bed_map)
+SHIRT_Y = {('Adult Small' if shirt == 'Small' else shirt): y for shirt, y in SHIRT_LOCATIONS.items()}
+
+#Field names of the answers without a prompt of their own in the acroform revision:
+LONG_PROMPT_FIELDS = {'Names of family members traveling with you:': 'Family members', 
+                      'Name of your roommate (if applicable):': 'Roommate',
+                      'Foods to exclude from your diet:': 'Diet exclusions',
+                      'If yes, please list medications below:': 'Medications',
+                      'More medications, continued below:': 'Medications',
+                      'Medical equipment needed:': 'Equipment',
+                      'Any physical limitations or conditions:': 'Physical limitations',
+                      'Are you celebrating anything? Tell us below:': 'Celebrating',
+                      'Describe your fitness level:': 'Fitness'}
+
+REVISIONS = ('presplit', 'merged', 'flat', 'acroform')
+
+
+def text_width(text, size=FONT_SIZE):
+    """
+    Computes the width of a string drawn in Helvetica.
+
+    Args:
+        text (str): text to measure
+        size (float): font size
+
+    Returns:
+        float: width of the text in PDF units
+    """
+    return sum(HELVETICA_WIDTHS.get(char, 556) for char in text) * size / 1000
+
+
+def random_guest(rng):
+    """
+    Creates a random set of guest answers.
+
+    Args:
+        rng (random.Random): random number generator
+
+    Returns:
+        dict: guest answers keyed by the names used in the form layouts
+    """
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    city, state, zip_code = rng.choice(CITIES)
+    return {
+        'name': f'{first} {last}',
+        'preferred': first,
+        'email': f'{first.lower()}.{last.lower()}@example.com',
+        'phone': f'555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}',
+        'street': f'{rng.randint(1, 9999)} Main Street',
+        'city': city,
+        'state': state,
+        'zip': zip_code,
+        'dob': f'{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(1940, 2010)}',
+        'age': str(rng.randint(10, 80)),
+        'passport_country': rng.choice(COUNTRIES),
+        'passport_number': str(rng.randint(10**8, 10**9 - 1)),
+        'place_of_issue': rng.choice(COUNTRIES),
+        'date_of_issue': f'{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/2020',
+        'expiration': f'{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/2030',
+        'gender': rng.choice(list(GENDER_X)),
+        'room': rng.choice(ROOMS),
+        'bed': rng.choice(BEDS),
+        'shirt': rng.choice(SHIRTS),
+        'diet': rng.choice(DIETS),
+        'emergency_name': f'{rng.choice(FIRST_NAMES)} {last}',
+        'emergency_email': f'family.{last.lower()}@example.com',
+        'emergency_phone': f'+1 555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}',
+        'blood': rng.choice(['A+', 'B-', 'O+', 'AB+']),
+        'height': f"{rng.randint(4, 6)}' {rng.randint(0, 11)}''",
+        'weight': str(rng.randint(100, 250)),
+        'occasion': rng.choice(['Birthday', 'Anniversary', 'Honeymoon']),
+        'insurance': rng.choice(['Yes', 'No']),
+        'flying_doctors': rng.choice(['Yes', 'No']),
+        'family': [f'{rng.choice(FIRST_NAMES)} {last}' for _ in range(rng.randint(1, 3))],
+        'roommate': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+        'exclusions': rng.choice(['Mushrooms', 'Shellfish', 'Peanuts']),
+        'medications': rng.choice(['Ibuprofen', 'Insulin', 'Malarone']),
+        'equipment': rng.choice(['CPAP machine', 'Walking stick']),
+        'limitations': rng.choice(['Bad knee', 'Asthma']),
+        'fitness': rng.choice(['Hikes weekly', 'Moderate', 'Runs marathons']),
+        'celebrating': rng.choice(['50th birthday', 'Retirement']),
+        'allergies': rng.choice(['Pollen', 'Cats']),
+        'life_threatening': rng.choice(['Bee stings', 'Peanuts']),
+        'antibiotics': rng.choice(['Penicillin', 'Sulfa']),
+        'additional': rng.choice(['Window seat please', 'Late arrival']),
+    }
+
+
+def _short_rows(guest, page):
+    """
+    Returns the short prompt rows of a page as lists of (prompt, answer) pairs.
+    """
+    if page == 0:
+        return [
+            [('Full name (as shown on passport):', guest['name']), ('Preferred name:', guest['preferred'])],
+            [('Email:', guest['email']), ('Phone number:', guest['phone'])],
+            [('Street address:', guest['street']), ('City:', guest['city'])],
+            [('State/Province:', guest['state']), ('Zip code:', guest['zip'])],
+            [('Date of birth (mm/dd/yyyy):', guest['dob']), ('Age at time of safari:', guest['age'])],
+            [('Passport country:', guest['passport_country']), ('Passport number:', guest['passport_number'])],
+            [('Passport place of issue:', guest['place_of_issue']), ('Date of issue:', guest['date_of_issue'])],
+            [('Passport expiration date:', guest['expiration'])],
+        ]
+    if page == 1:
+        return [
+            [('Full name:', guest['emergency_name']), ('Email:', guest['emergency_email'])],
+            [('Phone number (include country code of outside USA):', guest['emergency_phone'])],
+            [('Blood type (if known):', guest['blood']), ("Height (ft' inch''):", guest['height'])],
+            [('Weight (pounds):', guest['weight']), ('What is the occasion:', guest['occasion'])],
+            [('Travel insurance:', guest['insurance']), ('Flying Doctors:', guest['flying_doctors'])],
+        ]
+    return [
+        [('Please describe:', guest['allergies'], 'Any allergies')],
+        [('Additional info:', guest['additional'])],
+    ]
+
+
+def _long_prompts(guest, page):
+    """
+    Returns the multiline prompts of a page as (prompt, y, answers) tuples.
+    """
+    if page == 1:
+        return [
+            ('Names of family members traveling with you:', 600, guest['family']),
+            ('Name of your roommate (if applicable):', 460, [guest['roommate']]),
+            ('Foods to exclude from your diet:', 380, [guest['exclusions']]),
+            ('If yes, please list medications below:', 300, [guest['medications']]),
+            ('Medical equipment needed:', 220, [guest['equipment']]),
+            ('Any physical limitations or conditions:', 140, [guest['limitations']]),
+        ]
+    if page == 2:
+        long_prompts = [
+            ('Are you celebrating anything? Tell us below:', 600, [guest['celebrating']]),
+            ('Describe your fitness level:', 520, [guest['fitness']]),
+        ]
+        #Long answers continued on the last page, only drawn for the guests having one:
+        if guest.get('more_medications'):
+            long_prompts.append(('More medications, continued below:', 260, guest['more_medications']))
+        return long_prompts
+    return []
+
+
+class _Page:
+    """
+    Collects the static prompt layer and the guest input layer of a single page.
+    """
+
+    def __init__(self):
+        self.prompts = []
+        self.inputs = []
+        self.checkmarks = []
+        #(field name, answer or None for checkboxes, x, y) of every answer, used by the acroform revision:
+        self.fields = []
+
+    def prompt(self, text, x, y):
+        self.prompts.append((text, x, y))
+        return x + text_width(text)
+
+    def answer(self, text, x, y, field=None):
+        self.inputs.append((text, x, y))
+        self.fields.append((field, text, x, y))
+
+    def check(self, x, y, field=None):
+        self.checkmarks.append((x, y))
+        self.fields.append((field, None, x, y))
+
+
+def _layout_form(guest, revision):
+    """
+    Lays out every page of a guest form for the given revision.
+
+    Args:
+        guest (dict): guest answers created by random_guest
+        revision (str): one of REVISIONS
+
+    Returns:
+        list: _Page objects, one per form page
+    """
+    pages = [_Page(), _Page(), _Page()]
+    gap = 20 if revision == 'flat' else 6
+
+    for page_num, page in enumerate(pages):
+        y = 740
+        for row in _short_rows(guest, page_num):
+            if revision == 'merged' and len(row) == 2:
+                #Both prompts share a single text line, the second one ending at the right margin:
+                (first_prompt, first_answer), (second_prompt, second_answer) = row
+                padding = ' ' * int((400 - text_width(first_prompt + second_prompt)) / text_width(' '))
+                line_end = page.prompt(first_prompt + padding + second_prompt, 36, y)
+                page.answer(first_answer, 36 + text_width(first_prompt) + gap, y, first_prompt)
+                page.answer(second_answer, line_end + gap, y, second_prompt)
+            else:
+                for column, (prompt, answer, *field) in enumerate(row):
+                    prompt_end = page.prompt(prompt, 36 + column * 290, y)
+                    page.answer(answer, prompt_end + gap, y, field[0] if field else prompt)
+            y -= 20
+        for prompt, prompt_y, answers in _long_prompts(guest, page_num):
+            page.prompt(prompt, 36, prompt_y)
+            for line, answer in enumerate(answers):
+                page.answer(answer, 48, prompt_y - 15 - 12 * line, LONG_PROMPT_FIELDS[prompt])
+
+    first, second, third = pages
+    #Gender options share one line with the prompt:
+    gender_x = 60 if revision == 'merged' else 150
+    gender = guest['gender'] if revision != 'merged' else 'Male'
+    first.prompt('Gender:' + ' ' * 4 + 'Male' + ' ' * 8 + 'Female' + ' ' * 8 + 'Non-specified' + ' ' * 12, gender_x, 580)
+    first.check(GENDER_X[gender], 583, gender)
+
+    #Room and bed type options are stacked vertically:
+    for room, room_y in ROOM_Y.items():
+        first.prompt(room, 100, room_y - 2)
+    for bed, bed_y in BED_Y.items():
+        first.prompt(bed, 400, bed_y - 2)
+    first.check(110, ROOM_Y[guest['room']] + 1, guest['room'])
+    first.check(410, BED_Y[guest['bed']] + 1, guest['bed'])
+
+    #Shirt sizes and diets move to later pages in the merged revision to keep page 1 lines wide:
+    shirt_page, shirt_x = (second, 470) if revision == 'merged' else (first, 100)
+    for shirt, shirt_y in SHIRT_Y.items():
+        shirt_page.prompt(shirt, shirt_x, shirt_y - 2)
+    shirt_page.check(shirt_x + 5, SHIRT_Y[guest['shirt']] + 1, guest['shirt'])
+
+    diet_page, diet_top = (third, 520) if revision == 'merged' else (first, 300)
+    for diet_num, (diet, diet_x) in enumerate(DIET_X.items()):
+        diet_page.prompt(diet, diet_x - 5, diet_top - 20 * diet_num)
+    diet_page.check(DIET_X[guest['diet']], diet_top - 20 * list(DIET_X).index(guest['diet']) + 3, guest['diet'])
+
+    #Allergy descriptions are positioned by height on the page:
+    third.prompt('Please describe:', 36, 160)
+    third.answer(guest['life_threatening'], 36 + text_width('Please describe:') + gap, 160, 'Life threatening allergies')
+    third.prompt('Please describe:', 36, 80)
+    third.answer(guest['antibiotics'], 36 + text_width('Please describe:') + gap, 80, 'Antibiotic allergies')
+    return pages
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _text_ops(items):
+    return ''.join(f'BT /F1 {FONT_SIZE} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET\n' for text, x, y in items)
+
+
+class _PdfWriter:
+    """
+    Minimal PDF writer producing the object structure used by the guest forms.
+    """
+
+    def __init__(self):
+        self.objects = []
+
+    def add(self, body):
+        self.objects.append(body)
+        return len(self.objects)
+
+    def stream(self, dictionary, data):
+        data = data.encode('latin-1')
+        return self.add(f'<< {dictionary} /Length {len(data)} >>\nstream\n'.encode('latin-1') + data + b'\nendstream')
+
+    def write(self, path, root):
+        out = bytearray(b'%PDF-1.6\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for num, body in enumerate(self.objects, start=1):
+            offsets.append(len(out))
+            if isinstance(body, str):
+                body = body.encode('latin-1')
+            out += f'{num} 0 obj\n'.encode('latin-1') + body + b'\nendobj\n'
+        xref = len(out)
+        out += f'xref\n0 {len(self.objects) + 1}\n0000000000 65535 f \n'.encode('latin-1')
+        out += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('latin-1')
+        out += f'trailer\n<< /Size {len(self.objects) + 1} /Root {root} 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('latin-1')
+        with open(path, 'wb') as pdf_file:
+            pdf_file.write(out)
+
+
+def _acroform_widgets(writer, page):
+    """
+    Adds a form field for every answer of the page: text fields named after their prompt and
+    checkboxes named after their option, all filled.
+
+    Returns:
+        list: object ids of the fields
+    """
+    values = {}
+    for field, text, x, y in page.fields:
+        if text is None:
+            values[field] = (None, x, y)
+        elif field in values:
+            #Multiline answers (e.g. family members) fill a single field:
+            values[field] = (values[field][0] + '\n' + text, *values[field][1:])
+        else:
+            values[field] = (text, x, y)
+
+    widgets = []
+    for field, (text, x, y) in values.items():
+        if text is None:
+            rect = f'{x - 4:.2f} {y - 4:.2f} {x + 4:.2f} {y + 4:.2f}'
+            widgets.append(writer.add(f'<< /Type /Annot /Subtype /Widget /FT /Btn /T ({_escape(field)}) /V /Yes '
+                                      f'/AS /Yes /Rect [{rect}] >>'))
+        else:
+            rect = f'{x:.2f} {y - 2:.2f} {x + 200:.2f} {y + FONT_SIZE:.2f}'
+            widgets.append(writer.add(f'<< /Type /Annot /Subtype /Widget /FT /Tx /T ({_escape(field)}) '
+                                      f'/V ({_escape(text)}) /Rect [{rect}] >>'))
+    return widgets
+
+
+def write_guest_form(path, guest, revision='presplit', static_xobject=False, font_tag=None):
+    """
+    Writes a filled guest form to disk.
+
+    Args:
+        path (str | Path): destination of the PDF
+        guest (dict): guest answers created by random_guest
+        revision (str): one of REVISIONS
+        static_xobject (bool): whether the prompts are drawn in a "Fm0" form XObject instead of
+            the page content
+        font_tag (str | None): subset tag of the font (e.g. 'ABCDEF'), written as ABCDEF+Helvetica
+
+    Returns:
+        None
+    """
+    writer = _PdfWriter()
+    base_font = f'{font_tag}+Helvetica' if font_tag else 'Helvetica'
+    font = writer.add(f'<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>')
+    checkmark = writer.stream('/Type /XObject /Subtype /Form /BBox [0 0 8 8]',
+                              '0 g 1 4 m 3 1 l 7 7 l 6 7 l 3 3 l 2 4 l f\n')
+    #The page tree is written once every page exists:
+    pages_id = writer.add('null')
+    page_ids, fields = [], []
+    for page in _layout_form(guest, revision):
+        annots = ''
+        if revision == 'flat':
+            content = _text_ops(page.prompts) + _text_ops(page.inputs)
+            content += ''.join(f'q 1 0 0 1 {x - 4:.2f} {y - 4:.2f} cm /Ck Do Q\n' for x, y in page.checkmarks)
+            resources = f'<< /Font << /F1 {font} 0 R >> /XObject << /Ck {checkmark} 0 R >> >>'
+        elif revision == 'acroform':
+            content = _text_ops(page.prompts)
+            resources = f'<< /Font << /F1 {font} 0 R >> >>'
+            widgets = _acroform_widgets(writer, page)
+            fields.extend(widgets)
+            annots = ' /Annots [' + ' '.join(f'{widget} 0 R' for widget in widgets) + ']'
+        else:
+            xi_content = _text_ops(page.inputs)
+            xi_content += ''.join(f'q 1 0 0 1 {x - 4:.2f} {y - 4:.2f} cm /Ck{num} Do Q\n'
+                                  for num, (x, y) in enumerate(page.checkmarks))
+            xi_checks = ' '.join(f'/Ck{num} {checkmark} 0 R' for num in range(len(page.checkmarks)))
+            xi = writer.stream(f'/Type /XObject /Subtype /Form /BBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+                               f'/Resources << /Font << /F1 {font} 0 R >> /XObject << {xi_checks} >> >>', xi_content)
+            resources = f'<< /Font << /F1 {font} 0 R >> /XObject << /Xi0 {xi} 0 R >> >>'
+            if static_xobject:
+                fm = writer.stream(f'/Type /XObject /Subtype /Form /BBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+                                   f'/Resources << /Font << /F1 {font} 0 R >> >>', _text_ops(page.prompts))
+                content = 'q 1 0 0 1 0 0 cm /Fm0 Do Q\nq 1 0 0 1 0 0 cm /Xi0 Do Q\n'
+                resources = f'<< /Font << /F1 {font} 0 R >> /XObject << /Fm0 {fm} 0 R /Xi0 {xi} 0 R >> >>'
+            else:
+                content = _text_ops(page.prompts) + 'q 1 0 0 1 0 0 cm /Xi0 Do Q\n'
+        contents = writer.stream('', content)
+        page_ids.append(writer.add(f'<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+                                   f'/Resources {resources} /Contents {contents} 0 R{annots} >>'))
+    kids = ' '.join(f'{page_id} 0 R' for page_id in page_ids)
+    writer.objects[pages_id - 1] = f'<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>'
+    acroform = ''
+    if fields:
+        acroform = ' /AcroForm << /Fields [' + ' '.join(f'{field} 0 R' for field in fields) + '] >>'
+    root = writer.add(f'<< /Type /Catalog /Pages {pages_id} 0 R{acroform} >>')
+    writer.write(path, root)
+
+
+def generate_trip(folder, num_guests, revision='presplit', seed=0, trip_name='Kenya Safari', static_xobject=False):
+    """
+    Writes a folder of guest forms named the way the operators name them.
+
+    Args:
+        folder (str | Path): destination folder, created if missing
+        num_guests (int): number of guest forms to write
+        revision (str): one of REVISIONS, or 'mixed' to cycle through all of them
+        seed (int): seed for the random guest answers
+        trip_name (str): first two words of every file name
+        static_xobject (bool): whether the prompts are drawn in a "Fm0" form XObject, see write_guest_form
+
+    Returns:
+        list: paths of the generated PDFs
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for guest_num in range(num_guests):
+        guest = random_guest(rng)
+        guest_revision = REVISIONS[guest_num % len(REVISIONS)] if revision == 'mixed' else revision
+        path = os.path.join(folder, f'{trip_name} {guest_num:04d} {guest["name"]} OB Paperwork.pdf')
+        write_guest_form(path, guest, guest_revision, static_xobject)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    #Writes a sample trip, e.g. for the folder the GUI opens by default (INITIALDIR):
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    folder = sys.argv[1]
+    num_guests = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    revision = sys.argv[3] if len(sys.argv) > 3 else 'mixed'
+    for path in generate_trip(folder, num_guests, revision):
+        print(path)
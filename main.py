@@ -1,6 +1,11 @@
-from app.gui import AutomationApp
+import multiprocessing
 
 
 if __name__ == "__main__":
+    #Required for the extraction worker processes when running as a PyInstaller executable:
+    multiprocessing.freeze_support()
+    #Imported here so the worker processes, which import this module, don't load the GUI:
+    from app.gui import AutomationApp
+
     app = AutomationApp()
     app.mainloop()
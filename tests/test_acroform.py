@@ -0,0 +1,36 @@
+"""
+Checks the AcroForm fast path on synthetic guest forms.
+"""
+from app.text_extraction.acroform import extract_acroform_data, may_have_acroform
+from app.text_extraction.constants import FIRST_PAGE_DEFAULTS
+from app.text_extraction.data_extraction import extract_customer_data
+from benchmarks.synthetic_forms import generate_trip
+
+
+def test_forms_without_acroform_are_skipped(tmp_path):
+    for pdf_file_path in generate_trip(tmp_path, 3, 'presplit'):
+        with open(pdf_file_path, 'rb') as f:
+            assert not may_have_acroform(f.read())
+        customer_data = {}
+        assert not extract_acroform_data(pdf_file_path, customer_data)
+        assert not customer_data
+
+
+def test_fillable_forms_are_read_from_their_fields(tmp_path):
+    for pdf_file_path in generate_trip(tmp_path, 3, 'acroform'):
+        customer_data = {}
+        assert extract_acroform_data(pdf_file_path, customer_data)
+        assert list(customer_data)[:len(FIRST_PAGE_DEFAULTS)] == FIRST_PAGE_DEFAULTS
+        assert customer_data['medications']
+
+
+def test_fillable_forms_spell_options_like_the_layout_parser(tmp_path):
+    #Same guests (same seed) in the presplit revision, parsed from their layout:
+    fillable = generate_trip(tmp_path / 'acroform', 8, 'acroform')
+    presplit = generate_trip(tmp_path / 'presplit', 8, 'presplit')
+    for acroform_path, presplit_path in zip(fillable, presplit):
+        acroform_data, layout_data = {}, {}
+        assert extract_acroform_data(acroform_path, acroform_data)
+        extract_customer_data(presplit_path, layout_data, use_cache=False)
+        for key in ('gender', 'room type', 'bed type', 'shirt size'):
+            assert acroform_data[key] == layout_data[key]
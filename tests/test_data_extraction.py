@@ -0,0 +1,114 @@
+"""
+Checks the layout parser on synthetic guest forms.
+"""
+from contextlib import closing
+import logging
+import random
+import pytest
+from app.text_extraction import data_extraction
+from app.text_extraction.constants import FORM_PAGE_NUMBERS
+from app.text_extraction.data_extraction import (REQUIRED_KEYS, clear_form_caches, get_required_keys, parse_input_layers,
+                                                 parse_page)
+from app.text_extraction.form_templates import DEFAULT_TEMPLATE, select_form_template
+from app.text_extraction.page_summary import summarize_page
+from app.text_extraction.pdf_backends import get_pdf_backend
+from benchmarks.backend_parity import normalize
+from benchmarks.synthetic_forms import generate_trip, random_guest, write_guest_form
+
+
+BACKENDS = ['pdfminer', 'pymupdf']
+
+
+@pytest.fixture(autouse=True)
+def form_caches():
+    #Every test starts like a new worker process, without the prompts of earlier forms:
+    clear_form_caches()
+    yield
+    clear_form_caches()
+
+
+def extract_full_layout(pdf_file_path, backend, required_keys=REQUIRED_KEYS, num_pages=None):
+    customer_data = {}
+    with closing(get_pdf_backend(backend).extract_pages(pdf_file_path, page_numbers=FORM_PAGE_NUMBERS)) as pages:
+        parse_page(pages, customer_data, required_keys, pdf_file_path, num_pages)
+    return customer_data
+
+
+def comparable(customer_data):
+    #The pair_text fallback maps layout objects, which are compared by text or position:
+    return {normalize(key): normalize(value) for key, value in customer_data.items()}
+
+
+def extract_input_layers(pdf_file_path, backend, required_keys=REQUIRED_KEYS):
+    customer_data = {}
+    with closing(get_pdf_backend(backend).extract_input_layers(pdf_file_path, page_numbers=FORM_PAGE_NUMBERS)) as layers:
+        parsed = parse_input_layers(layers, customer_data, required_keys, pdf_file_path)
+    return parsed, customer_data
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('revision, static_xobject', [('presplit', False), ('merged', False), ('presplit', True),
+                                                      ('merged', True)])
+def test_input_layers_match_full_layout(tmp_path, backend, revision, static_xobject):
+    first, second = generate_trip(tmp_path, 2, revision, static_xobject=static_xobject)
+    extract_full_layout(first, backend)
+    parsed, customer_data = extract_input_layers(second, backend)
+    assert parsed
+
+    clear_form_caches()
+    assert customer_data == extract_full_layout(second, backend)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_input_layers_skip_forms_with_other_static_xobjects(tmp_path, backend):
+    #Same page content stream, the prompts of each revision are drawn in its own /Fm0:
+    presplit = generate_trip(tmp_path / 'presplit', 1, 'presplit', static_xobject=True)[0]
+    merged = generate_trip(tmp_path / 'merged', 1, 'merged', static_xobject=True)[0]
+    extract_full_layout(presplit, backend)
+    parsed, customer_data = extract_input_layers(merged, backend)
+    assert not parsed and not customer_data
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('revision, template_name', [('presplit', 'presplit'), ('merged', 'merged'), ('flat', 'flat'),
+                                                     ('acroform', 'flat')])
+def test_revision_templates(tmp_path, monkeypatch, backend, revision, template_name):
+    pdf_file_path = generate_trip(tmp_path, 1, revision)[0]
+    with closing(get_pdf_backend(backend).extract_pages(pdf_file_path, page_numbers=[0])) as pages:
+        assert select_form_template(summarize_page(next(pages))).name == template_name
+
+    #The revision's template gives the same data as the legacy one, which measures the layout at runtime:
+    customer_data = comparable(extract_full_layout(pdf_file_path, backend))
+    clear_form_caches()
+    monkeypatch.setattr(data_extraction, 'select_form_template', lambda summary: DEFAULT_TEMPLATE)
+    assert customer_data == comparable(extract_full_layout(pdf_file_path, backend))
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_early_exit_keeps_long_answers_continued_on_later_pages(tmp_path, backend):
+    guest = {**random_guest(random.Random(0)), 'medications': 'Ibuprofen', 'more_medications': ['Aspirin']}
+    first, second = tmp_path / 'first.pdf', tmp_path / 'second.pdf'
+    write_guest_form(first, guest)
+    write_guest_form(second, guest)
+    required_keys = get_required_keys(['medications'])
+
+    customer_data = extract_full_layout(first, backend, required_keys)
+    assert customer_data['medications'].split() == ['Ibuprofen', 'Aspirin']
+    assert customer_data == extract_full_layout(first, backend, required_keys=None)
+
+    #Same with the input layers of a form sharing the prompts of the first one:
+    parsed, customer_data = extract_input_layers(second, backend, required_keys)
+    assert parsed and customer_data['medications'].split() == ['Ibuprofen', 'Aspirin']
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_early_exit_logs_only_existing_pages(tmp_path, caplog, backend):
+    pdf_file_path = generate_trip(tmp_path, 1)[0]
+    required_keys = get_required_keys(['Passport expiration date:'])
+    num_pages = get_pdf_backend(backend).get_page_count(pdf_file_path)
+    assert num_pages == 3 < len(FORM_PAGE_NUMBERS)
+
+    with caplog.at_level(logging.INFO, logger=data_extraction.__name__):
+        customer_data = extract_full_layout(pdf_file_path, backend, required_keys, num_pages)
+    assert 'flying doctors:' not in customer_data
+    assert caplog.messages[-1].endswith('skipping the remaining requested pages [2, 3]')
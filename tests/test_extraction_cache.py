@@ -0,0 +1,49 @@
+"""
+Checks the cache keys of the extracted forms.
+"""
+import importlib
+import pytest
+from app.text_extraction import extraction_cache
+from app.text_extraction.extraction_cache import EXTRACTION_MODULES, get_cache_key, get_constants_digest
+from app.text_extraction.manifest import get_manifest_version
+from benchmarks.synthetic_forms import generate_trip
+
+
+class FrozenLoader:
+    """
+    Loader of a module bundled without its source, like PyInstaller's, optionally without its code.
+    """
+
+    def __init__(self, loader, has_code):
+        self.loader = loader
+        self.has_code = has_code
+
+    def get_source(self, fullname):
+        raise OSError(f"No source for {fullname}")
+
+    def get_code(self, fullname):
+        return self.loader.get_code(fullname) if self.has_code else None
+
+
+@pytest.fixture
+def frozen_modules(monkeypatch, tmp_path, request):
+    #No .py file next to the modules either:
+    monkeypatch.setattr(extraction_cache, '__file__', str(tmp_path / 'bundle' / 'extraction_cache.pyc'))
+    for module_name in EXTRACTION_MODULES:
+        module = importlib.import_module(f"app.text_extraction.{module_name}")
+        monkeypatch.setattr(module, '__loader__', FrozenLoader(module.__loader__, request.param))
+    get_constants_digest.cache_clear()
+    yield
+    get_constants_digest.cache_clear()
+
+
+@pytest.mark.parametrize('frozen_modules', [True, False], indirect=True)
+def test_cache_keys_without_module_sources(tmp_path, frozen_modules):
+    pdf_file_path = generate_trip(tmp_path, 1)[0]
+    assert len(get_cache_key(pdf_file_path, 'pdfminer')) == 64
+    assert get_manifest_version('pdfminer').startswith('pdfminer|')
+
+
+def test_module_code_is_read_from_the_loader():
+    for module_name in EXTRACTION_MODULES:
+        assert extraction_cache.get_module_code(module_name)
@@ -0,0 +1,46 @@
+"""
+Checks the incremental extraction of a folder against its manifest.
+"""
+import json
+import os
+from app.text_extraction.manifest import extract_guest_files_incremental, get_manifest_path
+from benchmarks.synthetic_forms import generate_trip
+
+
+def load_records(manifest_path):
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)['files']
+
+
+def test_unchanged_forms_are_reused(tmp_path):
+    pdf_file_paths = generate_trip(tmp_path, 2, 'presplit')
+    manifest_path = get_manifest_path(tmp_path)
+    first = extract_guest_files_incremental(pdf_file_paths, manifest_path, use_cache=False)
+    assert len(load_records(manifest_path)) == 2
+
+    extracted = []
+    second = extract_guest_files_incremental(pdf_file_paths, manifest_path, use_cache=False,
+                                             progress_callback=extracted.append)
+    assert [result.customer_data for result in second] == [result.customer_data for result in first]
+    assert len(extracted) == 2 and all(result.error is None for result in extracted)
+
+
+def test_backend_is_used_to_extract(tmp_path):
+    pdf_file_paths = generate_trip(tmp_path, 1, 'presplit')
+    results = extract_guest_files_incremental(pdf_file_paths, get_manifest_path(tmp_path), backend='unknown',
+                                              use_cache=False)
+    assert 'Unknown PDF backend' in results[0].error
+
+
+def test_forms_changed_while_extracted_are_not_recorded(tmp_path):
+    pdf_file_paths = generate_trip(tmp_path, 2, 'presplit')
+    replacement = generate_trip(tmp_path / 'other', 1, 'merged', seed=1)[0]
+    manifest_path = get_manifest_path(tmp_path)
+
+    def overwrite_first(result):
+        #The operator saves a new version of the form while the folder is extracted:
+        if result.file_path == pdf_file_paths[0]:
+            os.replace(replacement, pdf_file_paths[0])
+
+    extract_guest_files_incremental(pdf_file_paths, manifest_path, use_cache=False, progress_callback=overwrite_first)
+    assert list(load_records(manifest_path)) == [os.path.basename(pdf_file_paths[1])]
@@ -0,0 +1,75 @@
+"""
+Checks that the PDF backends agree on synthetic guest forms, and the content digest of the pages'
+static layer, which decides when a guest form reuses the prompts parsed on a previous form of the
+same revision.
+"""
+from contextlib import closing
+import random
+import pytest
+from app.text_extraction.page_summary import summarize_page
+from app.text_extraction.pdf_backends import get_pdf_backend, strip_subset_prefix
+from benchmarks.backend_parity import REFERENCE_BACKEND, extract_with_backends
+from benchmarks.synthetic_forms import REVISIONS, generate_trip, random_guest, write_guest_form
+
+
+BACKENDS = ['pdfminer', 'pymupdf']
+PAGE_NUMBERS = [0, 1, 2, 3]
+
+
+def get_page_texts(pdf_file_path, backend):
+    with closing(get_pdf_backend(backend).extract_pages(pdf_file_path, PAGE_NUMBERS)) as pages:
+        return [[(item.text, item.bbox) for item in summarize_page(page).items] for page in pages]
+
+
+@pytest.mark.parametrize('revision', REVISIONS)
+def test_backends_extract_the_same_customer_data(tmp_path, revision):
+    for pdf_file_path in generate_trip(tmp_path, 3, revision):
+        results = extract_with_backends(pdf_file_path, {})
+        for backend in BACKENDS:
+            assert results[backend] == results[REFERENCE_BACKEND]
+
+
+@pytest.mark.parametrize('revision', REVISIONS)
+def test_backends_order_text_boxes_the_same(tmp_path, revision):
+    #The merged revision has boxes_flow reorder the diet options and two lines of the same height:
+    pdf_file_path = generate_trip(tmp_path, 1, revision)[0]
+    reference = get_page_texts(pdf_file_path, REFERENCE_BACKEND)
+    for backend in BACKENDS:
+        pages = get_page_texts(pdf_file_path, backend)
+        assert [[text for text, _ in page] for page in pages] == [[text for text, _ in page] for page in reference]
+        for page, reference_page in zip(pages, reference):
+            for (_, bbox), (_, reference_bbox) in zip(page, reference_page):
+                assert bbox == pytest.approx(reference_bbox, abs=0.01)
+
+
+def get_digests(pdf_file_path, backend):
+    return [layer.content_digest for layer in get_pdf_backend(backend).extract_input_layers(pdf_file_path, PAGE_NUMBERS)]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_digest_is_shared_by_the_forms_of_a_revision(tmp_path, backend):
+    first, second = generate_trip(tmp_path, 2, 'presplit', static_xobject=True)
+    assert get_digests(first, backend) == get_digests(second, backend)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_digest_covers_static_form_xobjects(tmp_path, backend):
+    #Both revisions draw their prompts in /Fm0, their page content streams are identical:
+    presplit = generate_trip(tmp_path / 'presplit', 1, 'presplit', static_xobject=True)[0]
+    merged = generate_trip(tmp_path / 'merged', 1, 'merged', static_xobject=True)[0]
+    assert get_digests(presplit, backend)[0] != get_digests(merged, backend)[0]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_digest_ignores_font_subset_tags(tmp_path, backend):
+    guest = random_guest(random.Random(0))
+    paths = [tmp_path / 'ABCDEF.pdf', tmp_path / 'GHIJKL.pdf']
+    for path in paths:
+        write_guest_form(path, guest, 'presplit', font_tag=path.stem)
+    assert get_digests(paths[0], backend) == get_digests(paths[1], backend)
+
+
+@pytest.mark.parametrize('font_name, expected', [('ABCDEF+Helvetica', 'Helvetica'), (b'XYZABC+Arial-Bold', 'Arial-Bold'),
+                                                 ('Helvetica', 'Helvetica'), ('Abcdef+Font', 'Abcdef+Font'), (None, None)])
+def test_strip_subset_prefix(font_name, expected):
+    assert strip_subset_prefix(font_name) == expected
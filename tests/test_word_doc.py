@@ -0,0 +1,78 @@
+"""
+Checks the Word document generated from synthetic guest forms.
+"""
+import os
+import zipfile
+import pytest
+from docx import Document
+from app.text_extraction import output_schema, table_writer, word_doc
+from app.text_extraction.constants import OUTPUT_SCHEMA, TITLES
+from app.text_extraction.containers import extraction_result
+from app.text_extraction.data_extraction import extract_customer_data
+from app.text_extraction.word_doc import GuestDocumentGenerator
+from benchmarks.synthetic_forms import generate_trip
+
+
+def extract_trip(folder, num_guests, revision='presplit'):
+    extraction_results = []
+    for pdf_file_path in generate_trip(folder, num_guests, revision):
+        customer_data = {}
+        extract_customer_data(pdf_file_path, customer_data, use_cache=False)
+        extraction_results.append(extraction_result(pdf_file_path, customer_data, None))
+    return extraction_results
+
+
+class BulkGenerator(GuestDocumentGenerator):
+    """
+    Document generator filling its tables with write_table (bulk) or populate_table.
+    """
+
+    def __init__(self, output_dir, bulk):
+        super().__init__(str(output_dir), str(output_dir))
+        self.bulk = bulk
+
+    def populate_page(self, table, extractions, bulk=None, guests_rows=None):
+        return super().populate_page(table, extractions, self.bulk, guests_rows)
+
+
+def build_document(output_dir, extraction_results, bulk):
+    guest_files = [os.path.basename(extraction.file_path) for extraction in extraction_results]
+    return BulkGenerator(output_dir, bulk).build_document(guest_files, extraction_results)
+
+
+@pytest.mark.parametrize('bulk', [True, False])
+def test_tables_have_a_row_per_schema_row(tmp_path, monkeypatch, bulk):
+    extra_row = {'title': 'Passport number', 'keys': ['passport number:'], 'combiner': None, 'default': 'M',
+                 'converter': None}
+    titles = TITLES + [extra_row['title']]
+    monkeypatch.setattr(output_schema, 'render_row',
+                        output_schema.compile_row_renderer(output_schema.build_schema(OUTPUT_SCHEMA + [extra_row])))
+    monkeypatch.setattr(word_doc, 'TITLES', titles)
+    monkeypatch.setattr(table_writer, 'TITLES', titles)
+
+    extraction_results = extract_trip(tmp_path / 'forms', 4)
+    tables = Document(build_document(tmp_path, extraction_results, bulk)).tables
+    assert len(tables) == 2
+    for table, extractions in zip(tables, (extraction_results[:3], extraction_results[3:])):
+        assert [cell.text for cell in table.columns[0].cells] == titles
+        assert [cell.text for cell in table.rows[-1].cells[1:len(extractions) + 1]] == \
+               [extraction.customer_data['passport number:'] for extraction in extractions]
+
+
+def test_bulk_writer_writes_the_same_xml_as_populate_table(tmp_path):
+    extraction_results = extract_trip(tmp_path / 'forms', 7, 'mixed')
+    #Blank, tab, line break and padded values, missing or not for the other guests of the page:
+    edge_values = [{'preferred name:': '', 'city:': 'Santa\tFe', 'medications': ' Insulin\r\nAspirin'},
+                   {'preferred name:': '   ', 'fitness': '  Walks daily  ', 'Additional info:': 'Line\rbreak\n'},
+                   {'email:': '\t', 'roommate': ' ', 'celebrating': 'Birthday\t '},
+                   {'full name (as shown on passport):': '', 'diet exclusions': '\n\n'}]
+    for extraction, values in zip(extraction_results[1:], edge_values):
+        extraction.customer_data.update(values)
+
+    documents = {}
+    for bulk in (True, False):
+        os.makedirs(tmp_path / str(bulk))
+        with zipfile.ZipFile(build_document(tmp_path / str(bulk), extraction_results, bulk)) as docx:
+            documents[bulk] = docx.read('word/document.xml')
+    assert documents[True].count(b'<w:tbl>') == 3
+    assert documents[True] == documents[False]
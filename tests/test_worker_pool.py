@@ -0,0 +1,31 @@
+"""
+Checks the isolated worker pool.
+"""
+import multiprocessing
+import operator
+import threading
+import pytest
+from app.text_extraction.worker_pool import IsolatedWorkerPool, get_worker_context
+
+
+@pytest.mark.parametrize('start_method', [method for method in ('forkserver', 'spawn')
+                                          if method in multiprocessing.get_all_start_methods()])
+def test_workers_started_from_a_background_thread(start_method):
+    assert get_worker_context(operator.truediv, (start_method,)).get_start_method() == start_method
+
+    #Like the GUI, which extracts the forms from a background thread:
+    outcomes = []
+    def run():
+        with IsolatedWorkerPool(operator.truediv, 2, timeout=60, start_methods=(start_method,)) as pool:
+            outcomes.extend(pool.imap_unordered([(i, (i, 2)) for i in range(4)] + [('zero', (1, 0))]))
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join(timeout=60)
+
+    assert not thread.is_alive()
+    assert sorted(outcomes, key=str) == sorted([(i, i / 2, None) for i in range(4)] +
+                                               [('zero', None, 'ZeroDivisionError: division by zero')], key=str)
+
+
+def test_workers_are_never_forked():
+    assert get_worker_context(operator.truediv).get_start_method() in ('forkserver', 'spawn')